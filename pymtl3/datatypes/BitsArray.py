@@ -0,0 +1,467 @@
+"""
+========================================================================
+BitsArray.py
+========================================================================
+A fixed-bitwidth vector of N values with the same semantics as Bits.
+Every operation is applied elementwise, so FL/CL models and test vector
+generators that process thousands of words per cycle don't have to
+allocate one Bits object per word.
+
+The values are stored in a NumPy uint64 array if NumPy is installed and
+nbits <= 64, or in a list of Python ints otherwise.
+
+The operand of a binary operation can be another BitsArray with the
+same nbits and length, a Bits object with the same nbits, or an int in
+the range of Bits, which is broadcast to every element. Comparisons
+return a BitsArray of 1-bit values. Use all()/any() to reduce them.
+
+  a = BitsArray( 32, range(1024) )
+  b = ( a + 1 ) ^ a[:, 0:16].zext( 32 )
+  assert ( b > 0 ).all()
+
+Date   : Oct 18, 2026
+"""
+import operator
+
+from .bits_import import Bits, mk_bits
+from .PythonBits import _lower, _upper
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+def _use_numpy( nbits ):
+  return np is not None and nbits <= 64
+
+class BitsArray:
+  __slots__ = ( "_nbits", "_data" )
+
+  def __init__( self, nbits, values=(), trunc_int=False ):
+    nbits = int(nbits)
+    if nbits < 1 or nbits >= 1024: raise ValueError(f"Only support 1 <= nbits < 1024, not {nbits}")
+
+    self._nbits = nbits
+    up = _upper[nbits]
+
+    # Fast path for a NumPy array that is already unsigned 64-bit
+    if np is not None and isinstance( values, np.ndarray ) and values.dtype == np.uint64 and nbits <= 64:
+      if nbits < 64:
+        if trunc_int:
+          values = values & np.uint64(up)
+        elif ( values > np.uint64(up) ).any():
+          raise ValueError( f"Some value is too wide for Bits{nbits}!\n" \
+                            f"(Bits{nbits} only accepts 0 <= value <= {hex(up)})" )
+      self._data = values.copy()
+      return
+
+    if np is not None and isinstance( values, np.ndarray ):
+      values = values.tolist()
+
+    lo = _lower[nbits]
+    data = []
+    for v in values:
+      if isinstance( v, Bits ):
+        if v.nbits != nbits:
+          raise ValueError( f"Cannot construct a BitsArray{nbits} element from a Bits{v.nbits} object!\n"
+                            f"- Suggestion: zext/sext/trunc the value to Bits{nbits} first" )
+        data.append( int(v) )
+      else:
+        v = int(v)
+        if not trunc_int and ( v < lo or v > up ):
+          raise ValueError( f"Value {hex(v)} is too wide for Bits{nbits}!\n" \
+                            f"(Bits{nbits} only accepts {hex(lo)} <= value <= {hex(up)})" )
+        data.append( v & up )
+
+    if _use_numpy( nbits ):
+      data = np.array( data, dtype=np.uint64 )
+    self._data = data
+
+  @classmethod
+  def _from_raw( cls, nbits, data ):
+    """ Bypass the check. data holds valid unsigned values but it may be
+    of the wrong storage kind if the bitwidth changed. """
+    if _use_numpy( nbits ):
+      if not isinstance( data, np.ndarray ):
+        data = np.array( data, dtype=np.uint64 )
+    elif not isinstance( data, list ):
+      data = data.tolist()
+
+    ret = object.__new__( cls )
+    ret._nbits = nbits
+    ret._data  = data
+    return ret
+
+  @classmethod
+  def zeros( cls, nbits, n ):
+    if _use_numpy( nbits ):
+      return cls._from_raw( nbits, np.zeros( n, dtype=np.uint64 ) )
+    return cls._from_raw( nbits, [0] * n )
+
+  @classmethod
+  def from_bits_list( cls, bits_list, nbits=None ):
+    bits_list = list(bits_list)
+    if nbits is None:
+      if not bits_list:
+        raise ValueError( "Cannot infer the bitwidth of an empty list, please specify nbits" )
+      nbits = bits_list[0].nbits
+    return cls( nbits, bits_list )
+
+  def to_bits_list( self ):
+    BitsN = mk_bits( self._nbits )
+    return [ BitsN( x ) for x in self.uint() ]
+
+  @property
+  def nbits( self ):
+    return self._nbits
+
+  def __len__( self ):
+    return len(self._data)
+
+  def __iter__( self ):
+    BitsN = mk_bits( self._nbits )
+    for x in self.uint():
+      yield BitsN( x )
+
+  def clone( self ):
+    return BitsArray._from_raw( self._nbits, self._data.copy() )
+
+  def __deepcopy__( self, memo ):
+    return self.clone()
+
+  def uint( self ):
+    if isinstance( self._data, list ):
+      return list(self._data)
+    return self._data.tolist()
+
+  def int( self ):
+    nbits = self._nbits
+    sign = 1 << (nbits - 1)
+    return [ x - (1 << nbits) if x & sign else x for x in self.uint() ]
+
+  #-----------------------------------------------------------------------
+  # Indexing
+  #-----------------------------------------------------------------------
+  # a[i] returns the i-th element as Bits, a[i:j] returns a BitsArray of
+  # the elements, and a[idx, b] / a[idx, lo:hi] slices the bits of the
+  # selected elements just like Bits.__getitem__.
+
+  def __getitem__( self, idx ):
+    if isinstance( idx, tuple ):
+      eidx, bidx = idx
+      arr = self[eidx]
+      if not isinstance( arr, BitsArray ):
+        return arr[bidx]
+      return arr._get_bits( bidx )
+
+    if isinstance( idx, slice ):
+      return BitsArray._from_raw( self._nbits, self._data[idx] )
+
+    return mk_bits( self._nbits )( int(self._data[idx]) )
+
+  def _get_bits( self, idx ):
+    nbits = self._nbits
+    if isinstance( idx, slice ):
+      if idx.step:
+        raise IndexError( "Index cannot contain step" )
+      try:
+        start, stop = int(idx.start or 0), int(idx.stop or nbits)
+        assert 0 <= start < stop <= nbits
+      except:
+        raise IndexError( f"Invalid access: [{idx.start}:{idx.stop}] in a BitsArray{nbits} instance" )
+    else:
+      start = int(idx)
+      if start >= nbits or start < 0:
+        raise IndexError( f"Invalid access: [{start}] in a BitsArray{nbits} instance" )
+      stop = start + 1
+
+    new_nbits = stop - start
+    up = _upper[new_nbits]
+    data = self._data
+    if isinstance( data, list ):
+      return BitsArray._from_raw( new_nbits, [ (x >> start) & up for x in data ] )
+    return BitsArray._from_raw( new_nbits, (data >> np.uint64(start)) & np.uint64(up) )
+
+  def __setitem__( self, idx, v ):
+    nbits = self._nbits
+
+    if isinstance( idx, slice ):
+      n = len( range( *idx.indices( len(self._data) ) ) )
+      if isinstance( v, BitsArray ):
+        if v._nbits != nbits:
+          raise ValueError( f"Cannot assign a BitsArray{v._nbits} to a slice of BitsArray{nbits}" )
+        if len(v) != n:
+          raise ValueError( f"Cannot assign {len(v)} values to a slice of {n} elements" )
+        self._data[idx] = v._data
+      else:
+        v = self._coerce( v, "slice assignment" )
+        if isinstance( self._data, list ): self._data[idx] = [ v ] * n
+        else:                              self._data[idx] = v
+      return
+
+    if isinstance( v, Bits ):
+      if v.nbits != nbits:
+        raise ValueError( f"Cannot assign a Bits{v.nbits} object to an element of BitsArray{nbits}" )
+      self._data[idx] = int(v)
+    else:
+      v = int(v)
+      lo, up = _lower[nbits], _upper[nbits]
+      if v < lo or v > up:
+        raise ValueError( f"Value {hex(v)} is too wide for Bits{nbits}!\n" \
+                          f"(Bits{nbits} only accepts {hex(lo)} <= value <= {hex(up)})" )
+      self._data[idx] = v & up
+
+  #-----------------------------------------------------------------------
+  # Arithmetics
+  #-----------------------------------------------------------------------
+
+  def _coerce( self, other, op ):
+    """ Return either the raw data of another BitsArray or a scalar. """
+    nbits = self._nbits
+    if isinstance( other, BitsArray ):
+      if other._nbits != nbits:
+        raise ValueError( f"Operands of '{op}' operation must have matching bitwidth, "\
+                          f"but here BitsArray{nbits} != BitsArray{other._nbits}.\n" )
+      if len(other._data) != len(self._data):
+        raise ValueError( f"Operands of '{op}' operation must have matching length, "\
+                          f"but here {len(self._data)} != {len(other._data)}.\n" )
+      return other._data
+
+    if isinstance( other, Bits ):
+      if other.nbits != nbits:
+        raise ValueError( f"Operands of '{op}' operation must have matching bitwidth, "\
+                          f"but here BitsArray{nbits} != Bits{other.nbits}.\n" )
+      other = int(other)
+    else:
+      other = int(other)
+      up = _upper[ nbits ]
+      if other < 0 or other > up:
+        raise ValueError( f"Integer {hex(other)} is not a valid binop operand with BitsArray{nbits}!\n"
+                          f"Suggestion: 0 <= x <= {hex(up)}" )
+
+    if isinstance( self._data, list ):
+      return other
+    return np.uint64(other)
+
+  def _binop( self, other, op, func, nbits, reverse=False, mask=True ):
+    b = self._coerce( other, op )
+    a = self._data
+    if reverse:
+      a, b = b, a
+
+    up = _upper[nbits]
+
+    if isinstance( self._data, list ):
+      if isinstance( a, list ) and isinstance( b, list ):
+        data = [ func( x, y ) for x, y in zip( a, b ) ]
+      elif isinstance( a, list ):
+        data = [ func( x, b ) for x in a ]
+      else:
+        data = [ func( a, y ) for y in b ]
+      if mask:
+        data = [ int(x) & up for x in data ]
+      else:
+        data = [ int(x) for x in data ]
+    else:
+      data = func( a, b )
+      if mask:
+        data = data & np.uint64(up)
+      else:
+        data = data.astype( np.uint64 )
+
+    return BitsArray._from_raw( nbits, data )
+
+  def _check_divisor( self, divisor ):
+    # NumPy silently returns 0 for division by zero. Python ints raise
+    # by themselves.
+    if isinstance( divisor, (list, int) ) or not ( divisor == 0 ).any():
+      return
+    raise ZeroDivisionError( "integer division or modulo by zero in BitsArray" )
+
+  def __add__( self, other ):
+    return self._binop( other, '+', operator.add, self._nbits )
+
+  def __radd__( self, other ):
+    return self.__add__( other )
+
+  def __sub__( self, other ):
+    return self._binop( other, '-', operator.sub, self._nbits )
+
+  def __rsub__( self, other ):
+    return self._binop( other, '-', operator.sub, self._nbits, reverse=True )
+
+  def __mul__( self, other ):
+    return self._binop( other, '*', operator.mul, self._nbits )
+
+  def __rmul__( self, other ):
+    return self.__mul__( other )
+
+  def __and__( self, other ):
+    return self._binop( other, '&', operator.and_, self._nbits, mask=False )
+
+  def __rand__( self, other ):
+    return self.__and__( other )
+
+  def __or__( self, other ):
+    return self._binop( other, '|', operator.or_, self._nbits, mask=False )
+
+  def __ror__( self, other ):
+    return self.__or__( other )
+
+  def __xor__( self, other ):
+    return self._binop( other, '^', operator.xor, self._nbits, mask=False )
+
+  def __rxor__( self, other ):
+    return self.__xor__( other )
+
+  def __floordiv__( self, other ):
+    self._check_divisor( self._coerce( other, '//' ) )
+    return self._binop( other, '//', operator.floordiv, self._nbits, mask=False )
+
+  def __rfloordiv__( self, other ):
+    self._check_divisor( self._data )
+    return self._binop( other, '//', operator.floordiv, self._nbits, reverse=True, mask=False )
+
+  def __mod__( self, other ):
+    self._check_divisor( self._coerce( other, '%' ) )
+    return self._binop( other, '%', operator.mod, self._nbits, mask=False )
+
+  def __rmod__( self, other ):
+    self._check_divisor( self._data )
+    return self._binop( other, '%', operator.mod, self._nbits, reverse=True, mask=False )
+
+  def __invert__( self ):
+    nbits = self._nbits
+    up = _upper[nbits]
+    data = self._data
+    if isinstance( data, list ):
+      return BitsArray._from_raw( nbits, [ ~x & up for x in data ] )
+    return BitsArray._from_raw( nbits, ~data & np.uint64(up) )
+
+  # NumPy shifts by >= 64 bits are undefined, so the shift amount is
+  # clamped and the result is zeroed explicitly
+
+  def __lshift__( self, other ):
+    nbits = self._nbits
+    if isinstance( self._data, list ):
+      return self._binop( other, '<<', lambda x, y: (x << y) if y < nbits else 0, nbits )
+    def lshift( a, b ):
+      return np.where( b >= np.uint64(nbits), np.uint64(0), a << np.minimum( b, np.uint64(63) ) )
+    return self._binop( other, '<<', lshift, nbits )
+
+  def __rshift__( self, other ):
+    nbits = self._nbits
+    if isinstance( self._data, list ):
+      return self._binop( other, '>>', operator.rshift, nbits, mask=False )
+    def rshift( a, b ):
+      return np.where( b >= np.uint64(64), np.uint64(0), a >> np.minimum( b, np.uint64(63) ) )
+    return self._binop( other, '>>', rshift, nbits, mask=False )
+
+  def _cmp( self, other, op, func ):
+    return self._binop( other, op, func, 1, mask=False )
+
+  def __eq__( self, other ):
+    try:
+      return self._cmp( other, '==', operator.eq )
+    except (TypeError, ValueError):
+      if isinstance( other, (BitsArray, Bits, int) ):
+        raise
+      return BitsArray.zeros( 1, len(self) )
+
+  def __ne__( self, other ):
+    try:
+      return self._cmp( other, '!=', operator.ne )
+    except (TypeError, ValueError):
+      if isinstance( other, (BitsArray, Bits, int) ):
+        raise
+      return ~BitsArray.zeros( 1, len(self) )
+
+  def __lt__( self, other ):
+    return self._cmp( other, '<', operator.lt )
+
+  def __le__( self, other ):
+    return self._cmp( other, '<=', operator.le )
+
+  def __gt__( self, other ):
+    return self._cmp( other, '>', operator.gt )
+
+  def __ge__( self, other ):
+    return self._cmp( other, '>=', operator.ge )
+
+  __hash__ = None
+
+  def __bool__( self ):
+    raise TypeError( "The truth value of a BitsArray is ambiguous. Use all() or any()" )
+
+  def all( self ):
+    if isinstance( self._data, list ):
+      return all( self._data )
+    return bool( self._data.all() )
+
+  def any( self ):
+    if isinstance( self._data, list ):
+      return any( self._data )
+    return bool( self._data.any() )
+
+  #-----------------------------------------------------------------------
+  # Width conversion
+  #-----------------------------------------------------------------------
+
+  def zext( self, new_width ):
+    new_width = getattr( new_width, 'nbits', new_width )
+    assert new_width >= self._nbits
+    return BitsArray._from_raw( new_width, self._data.copy() )
+
+  def sext( self, new_width ):
+    new_width = getattr( new_width, 'nbits', new_width )
+    nbits = self._nbits
+    assert new_width >= nbits
+    ext = _upper[new_width] & ~_upper[nbits]
+    sign = 1 << (nbits - 1)
+    data = self._data
+    if isinstance( data, list ) or not _use_numpy( new_width ):
+      data = data if isinstance( data, list ) else data.tolist()
+      return BitsArray._from_raw( new_width, [ x | ext if x & sign else x for x in data ] )
+    return BitsArray._from_raw( new_width,
+                                np.where( data & np.uint64(sign), data | np.uint64(ext), data ) )
+
+  def trunc( self, new_width ):
+    new_width = getattr( new_width, 'nbits', new_width )
+    assert new_width <= self._nbits
+    up = _upper[new_width]
+    data = self._data
+    if isinstance( data, list ):
+      return BitsArray._from_raw( new_width, [ x & up for x in data ] )
+    return BitsArray._from_raw( new_width, data & np.uint64(up) )
+
+  @staticmethod
+  def concat( *args ):
+    """ Elementwise concatenation. The first argument holds the most
+    significant bits, same as concat() of Bits. """
+    if len(args) == 1 and not isinstance( args[0], BitsArray ):
+      args = list(args[0])
+
+    n = len(args[0])
+    for x in args:
+      if len(x) != n:
+        raise ValueError( f"Cannot concat BitsArrays of different lengths {n} != {len(x)}" )
+
+    nbits = sum( x._nbits for x in args )
+    if _use_numpy( nbits ):
+      data = np.zeros( n, dtype=np.uint64 )
+      for x in args:
+        data = ( data << np.uint64(x._nbits) ) | x._data if x._nbits < 64 else x._data
+      return BitsArray._from_raw( nbits, data )
+
+    data = [0] * n
+    for x in args:
+      xnb = x._nbits
+      data = [ (v << xnb) | w for v, w in zip( data, x.uint() ) ]
+    return BitsArray._from_raw( nbits, data )
+
+  # Print
+
+  def __repr__( self ):
+    width = ((self._nbits-1)//4)+1
+    return "BitsArray{}([{}])".format( self._nbits,
+            ", ".join( "0x" + "{:x}".format(x).zfill(width) for x in self.uint() ) )
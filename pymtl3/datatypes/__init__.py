@@ -1,4 +1,5 @@
 from .bits_import import *
 from .bits_import import _bitwidths
+from .BitsArray import BitsArray
 from .bitstructs import bitstruct, is_bitstruct_class, is_bitstruct_inst, mk_bitstruct
 from .helpers import clog2, concat, reduce_and, reduce_or, reduce_xor, sext, trunc, zext
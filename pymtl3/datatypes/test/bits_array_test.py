@@ -0,0 +1,122 @@
+"""
+==========================================================================
+bits_array_test.py
+==========================================================================
+Test cases for BitsArray. Every operation is checked against the same
+operation applied to each element as Bits.
+
+Date   : Oct 18, 2026
+"""
+import operator
+import random
+
+import pytest
+
+from pymtl3.datatypes import *
+
+
+def _check( arr, expected ):
+  assert arr.nbits == expected[0].nbits
+  assert arr.to_bits_list() == expected
+  assert [ x.nbits for x in arr ] == [ x.nbits for x in expected ]
+
+def _rand_values( nbits, n, seed ):
+  rng = random.Random( seed )
+  corner = [ 0, 1, (1 << nbits) - 1, 1 << (nbits-1) ]
+  return corner + [ rng.getrandbits( nbits ) for _ in range(n - len(corner)) ]
+
+@pytest.mark.parametrize( "nbits", [ 1, 8, 32, 63, 64, 65, 128 ] )
+def test_binops_match_bits( nbits ):
+  BitsN = mk_bits( nbits )
+  xs = _rand_values( nbits, 64, 0 )
+  ys = _rand_values( nbits, 64, 1 )[::-1]
+  a, b = BitsArray( nbits, xs ), BitsArray( nbits, ys )
+  ax, by = [ BitsN(x) for x in xs ], [ BitsN(y) for y in ys ]
+
+  for op in [ operator.add, operator.sub, operator.mul, operator.and_,
+              operator.or_, operator.xor, operator.rshift, operator.lshift,
+              operator.eq, operator.ne, operator.lt, operator.le,
+              operator.gt, operator.ge ]:
+    _check( op( a, b ), [ op( x, y ) for x, y in zip( ax, by ) ] )
+    # Broadcast a Bits and an int
+    _check( op( a, by[5] ), [ op( x, by[5] ) for x in ax ] )
+    _check( op( a, int(by[5]) ), [ op( x, int(by[5]) ) for x in ax ] )
+
+  nonzero = [ y | 1 for y in ys ]
+  c = BitsArray( nbits, nonzero )
+  for op in [ operator.floordiv, operator.mod ]:
+    _check( op( a, c ), [ op( x, BitsN(y) ) for x, y in zip( ax, nonzero ) ] )
+
+  _check( ~a, [ ~x for x in ax ] )
+  _check( 1 - a, [ 1 - x for x in ax ] )
+
+def test_width_checks():
+  a = BitsArray( 8, [ 1, 2, 3 ] )
+  with pytest.raises( ValueError ):
+    a + BitsArray( 16, [ 1, 2, 3 ] )
+  with pytest.raises( ValueError ):
+    a + BitsArray( 8, [ 1, 2 ] )
+  with pytest.raises( ValueError ):
+    a + Bits4(1)
+  with pytest.raises( ValueError ):
+    a + 256
+  with pytest.raises( ValueError ):
+    BitsArray( 8, [ 256 ] )
+  with pytest.raises( ValueError ):
+    BitsArray( 8, [ Bits4(1) ] )
+  with pytest.raises( ZeroDivisionError ):
+    a // 0
+  with pytest.raises( TypeError ):
+    bool( a == a )
+
+  # Negative ints are accepted at construction, same as Bits
+  assert BitsArray( 8, [ -1, -128 ] ).uint() == [ 0xff, 0x80 ]
+  assert BitsArray( 8, [ 0x1ff ], trunc_int=True ).uint() == [ 0xff ]
+
+@pytest.mark.parametrize( "nbits", [ 8, 64, 100 ] )
+def test_indexing( nbits ):
+  BitsN = mk_bits( nbits )
+  xs = _rand_values( nbits, 16, 2 )
+  a = BitsArray( nbits, xs )
+
+  assert a[3] == BitsN( xs[3] )
+  assert a[2:5].uint() == xs[2:5]
+  _check( a[:, 0], [ BitsN(x)[0] for x in xs ] )
+  _check( a[:, 2:7], [ BitsN(x)[2:7] for x in xs ] )
+  _check( a[1:4, 0:nbits//2], [ BitsN(x)[0:nbits//2] for x in xs[1:4] ] )
+  assert a[3, 0:4] == BitsN( xs[3] )[0:4]
+
+  a[0] = BitsN(7)
+  a[1] = 9
+  a[2:4] = BitsArray( nbits, [ 1, 2 ] )
+  a[4:6] = 5
+  assert a.uint()[:6] == [ 7, 9, 1, 2, 5, 5 ]
+
+@pytest.mark.parametrize( "nbits", [ 8, 40, 64 ] )
+def test_ext_trunc_concat( nbits ):
+  BitsN = mk_bits( nbits )
+  xs = _rand_values( nbits, 16, 3 )
+  a = BitsArray( nbits, xs )
+  ax = [ BitsN(x) for x in xs ]
+
+  for w in [ nbits, nbits + 8, 96 ]:
+    _check( a.zext( w ), [ zext( x, w ) for x in ax ] )
+    _check( a.sext( w ), [ sext( x, w ) for x in ax ] )
+  _check( a.sext( Bits128 ), [ sext( x, Bits128 ) for x in ax ] )
+  _check( a.trunc( 4 ), [ trunc( x, 4 ) for x in ax ] )
+
+  _check( BitsArray.concat( a, a.trunc( 4 ), a ),
+          [ concat( x, trunc( x, 4 ), x ) for x in ax ] )
+  _check( BitsArray.concat( [ a.trunc( 4 ), a.trunc( 2 ) ] ),
+          [ concat( trunc( x, 4 ), trunc( x, 2 ) ) for x in ax ] )
+
+def test_bits_list_conversion():
+  bits_list = [ Bits16(x) for x in range(0, 60000, 1000) ]
+  a = BitsArray.from_bits_list( bits_list )
+  assert a.nbits == 16 and len(a) == len(bits_list)
+  assert a.to_bits_list() == bits_list
+  assert list(a) == bits_list
+  assert a.int()[-1] == Bits16(59000).int()
+  assert repr( BitsArray( 12, [ 1, 0xabc ] ) ) == "BitsArray12([0x001, 0xabc])"
+  assert ( BitsArray.zeros( 4, 3 ) == 0 ).all()
+  assert not ( BitsArray.zeros( 4, 3 ) != 0 ).any()
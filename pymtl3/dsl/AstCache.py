@@ -0,0 +1,101 @@
+"""
+========================================================================
+AstCache.py
+========================================================================
+Persistent on-disk cache of the per-update-block metadata computed by
+ComponentLevel2._cache_func_meta, i.e. the source, the parsed AST, and
+the name-level read/write/call lists.
+
+The cache is disabled by default. Set PYMTL_AST_CACHE to a directory to
+enable it, or to 1 to use ~/.cache/pymtl3/ast. Each entry is keyed by a
+hash of the Python version, the path and content of the source file,
+the first line number and qualified name of the function, and the
+closure/global names that influence name extraction. Hence editing the
+source file automatically invalidates every entry of that file.
+
+Date   : Oct 18, 2026
+"""
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+_env = os.getenv( "PYMTL_AST_CACHE" )
+
+if not _env or _env == "0":
+  cache_dir = None
+elif _env == "1":
+  cache_dir = os.path.join( os.path.expanduser("~"), ".cache", "pymtl3", "ast" )
+else:
+  cache_dir = os.path.abspath( os.path.expanduser( _env ) )
+
+# path -> (mtime_ns, size, digest)
+_file_digests = {}
+
+def _get_file_digest( path ):
+  try:
+    st = os.stat( path )
+  except OSError:
+    return None
+
+  entry = _file_digests.get( path )
+  if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+    return entry[2]
+
+  try:
+    with open( path, 'rb' ) as f:
+      digest = hashlib.sha256( f.read() ).hexdigest()
+  except OSError:
+    return None
+
+  _file_digests[ path ] = ( st.st_mtime_ns, st.st_size, digest )
+  return digest
+
+def get_key( func ):
+  """ Return the cache key of func, or None if func has no source file
+  (e.g. it is defined in a string passed to exec). """
+
+  code = func.__code__
+  path = os.path.abspath( code.co_filename )
+  digest = _get_file_digest( path )
+  if digest is None:
+    return None
+
+  # AstHelper decides whether a name used as an index is a global or a
+  # closure variable, so the same source can extract different names
+  _globals = func.__globals__
+  global_names = sorted( x for x in code.co_names if x in _globals )
+
+  h = hashlib.sha256()
+  for x in ( sys.version, path, digest, code.co_firstlineno, func.__qualname__,
+             code.co_freevars, global_names ):
+    h.update( repr(x).encode() )
+    h.update( b'\0' )
+  return h.hexdigest()
+
+def load( key ):
+  if cache_dir is None or key is None:
+    return None
+  try:
+    with open( os.path.join( cache_dir, key + ".pkl" ), 'rb' ) as f:
+      return pickle.load( f )
+  except Exception:
+    return None
+
+def store( key, value ):
+  if cache_dir is None or key is None:
+    return
+  # Write to a temporary file and rename so that concurrent pytest
+  # workers never observe a partially written entry
+  try:
+    os.makedirs( cache_dir, exist_ok=True )
+    fd, tmp = tempfile.mkstemp( dir=cache_dir, suffix=".tmp" )
+    try:
+      with os.fdopen( fd, 'wb' ) as f:
+        pickle.dump( value, f, protocol=pickle.HIGHEST_PROTOCOL )
+      os.replace( tmp, os.path.join( cache_dir, key + ".pkl" ) )
+    except Exception:
+      os.unlink( tmp )
+  except Exception:
+    pass
@@ -20,6 +20,7 @@ from .Connectable import (
     Signal,
     Wire,
 )
+from .ElaborationProfiler import ElaborationProfiler, profile_construct, profile_phase
 from .errors import (
     InvalidAPICallError,
     InvalidConnectionError,
@@ -108,7 +109,10 @@ class Component( ComponentLevel7 ):
 
   def _flush_pending_value_connections( s ):
     if s._dsl._has_pending_value_connections:
-      s._dsl.all_value_nets = s._resolve_value_connections()
+      # Only re-resolve the nets touched by the mutations since the last
+      # flush instead of all nets of the design
+      s._dsl.all_value_nets = s._resolve_value_connections_incremental( s._dsl.dirty_signals )
+      s._dsl.dirty_signals = set()
       s._dsl._has_pending_value_connections = False
 
   def _flush_pending_method_connections( s ):
@@ -189,7 +193,7 @@ class Component( ComponentLevel7 ):
 
       NamedObject._elaborate_stack.append( obj )
       NamedObject.__setattr__ = NamedObject.__setattr_for_elaborate__
-      obj._construct()
+      profile_construct( obj )
       del NamedObject.__setattr__
 
       NamedObject._elaborate_stack.pop()
@@ -215,6 +219,10 @@ class Component( ComponentLevel7 ):
     for c in added_components:
       top._collect_vars( c )
 
+    if added_signals:
+      top._dsl.dirty_signals |= added_signals
+      top._dsl._has_pending_value_connections = True
+
     # Lazy -- to avoid resolve_connection call which takes non-trivial
     # time upon adding any connect, I just mark pending here. Whenever you
     # call the right API which is get_all_value_nets()/get_method_nets(),
@@ -225,6 +233,8 @@ class Component( ComponentLevel7 ):
     for (x, y) in provided_connections:
       connection_pairs.append( x )
       connection_pairs.append( eval(y) )
+      if isinstance( x, Signal ):
+        top._dsl.dirty_signals.add( x )
       if not top._dsl._has_pending_value_connections and isinstance( x, Signal ):
         top._dsl._has_pending_value_connections = True
       if not top._dsl._has_pending_method_connections and isinstance( x, MethodPort ):
@@ -306,6 +316,9 @@ class Component( ComponentLevel7 ):
       removed_connectables = removed_signals | removed_method_ports
       top._dsl.all_named_objects -= removed_connectables
 
+      # The nets of the removed signals need to be re-resolved
+      top._dsl.dirty_signals |= removed_signals
+
       removed_consts = set()
       if isinstance( foo, Placeholder ):
         # No need to uncollect vars from a placeholder
@@ -391,6 +404,8 @@ class Component( ComponentLevel7 ):
             # If other will be removed, we don't need to remove it here ..
             if other not in removed_connectables and other not in removed_consts:
               top._dsl.all_adjacency[other].remove( x )
+              if isinstance( other, Signal ):
+                top._dsl.dirty_signals.add( other )
               if isinstance( other, Const ):
                 other = other._dsl.const
               saved_connections.append( (other, "top"+repr(x)[1:]) ) # other is from outside
@@ -445,7 +460,16 @@ class Component( ComponentLevel7 ):
     except:
       pass
 
-    super().elaborate()
+    with profile_phase( "elaborate" ):
+      super().elaborate()
+
+    # Signals whose nets are changed by the mutation APIs since the last
+    # net resolution
+    s._dsl.dirty_signals = set()
+
+    prof = ElaborationProfiler.active
+    if prof is not None:
+      prof.record_counts( s )
 
     # try:
       # import pypyjit
@@ -527,7 +551,8 @@ class Component( ComponentLevel7 ):
     assert type(pass_instance) is not type, f"Should pass in a pass instance like " \
                                             f"'{pass_instance.__name__}()' instead of '{pass_instance.__name__}'"
     assert callable( pass_instance ), f"Should override __call__ of {pass_instance.__name__} for a valid pass"
-    pass_instance( s )
+    with profile_phase( f"apply:{pass_instance.__class__.__name__}" ):
+      pass_instance( s )
 
   def check( s ):
     s._check_valid_dsl_code()
@@ -829,6 +854,8 @@ class Component( ComponentLevel7 ):
 
       top._dsl.all_adjacency[o1].add(o2)
       top._dsl.all_adjacency[o2].add(o1)
+      top._dsl.dirty_signals.add( o1 )
+      top._dsl.dirty_signals.add( o2 )
       top._dsl._has_pending_value_connections = True
 
   def add_connections( s, *args ):
@@ -20,10 +20,11 @@ from collections import defaultdict
 
 from pymtl3.datatypes import Bits, is_bitstruct_class
 
-from . import AstHelper
+from . import AstCache, AstHelper
 from .ComponentLevel1 import ComponentLevel1
 from .Connectable import Connectable, Const, InPort, Interface, OutPort, Signal, Wire
 from .ConstraintTypes import RD, WR, U, ValueConstraint
+from .ElaborationProfiler import ElaborationProfiler, profile_phase
 from .errors import (
     InvalidConstraintError,
     InvalidFuncCallError,
@@ -113,6 +114,15 @@ class ComponentLevel2( ComponentLevel1 ):
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
 
     elif name not in name_info:
+      # Try the on-disk cache first to skip getsourcelines and ast.parse.
+      # The AST and the name lists are pickled together to preserve the
+      # sharing of ast nodes between them.
+      key = AstCache.get_key( func ) if AstCache.cache_dir else None
+      cached = AstCache.load( key )
+      if cached is not None:
+        name_info[ name ], name_rd[ name ], name_wr[ name ], name_fc[ name ] = cached
+        return
+
       _src, _line = inspect.getsourcelines( func )
       _src = "".join( _src )
       _ast = ast.parse( compiled_re.sub( r'\2', _src ) )
@@ -123,6 +133,8 @@ class ComponentLevel2( ComponentLevel1 ):
       name_fc[ name ]   = _fc   = []
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
 
+      AstCache.store( key, ( name_info[ name ], _rd, _wr, _fc ) )
+
   def _elaborate_read_write_func( s ):
 
     # We have parsed AST to extract every read/write variable name.
@@ -627,18 +639,28 @@ class ComponentLevel2( ComponentLevel1 ):
   # Override
   def elaborate( s ):
     # Don't directly use the base class elaborate anymore
-    s._elaborate_construct()
+    with profile_phase( "construct" ):
+      s._elaborate_construct()
 
     # First elaborate all functions to spawn more named objects
-    for c in s._collect_all_single( lambda s: isinstance( s, ComponentLevel2 ) ):
-      c._elaborate_read_write_func()
+    with profile_phase( "read_write_func" ):
+      prof = ElaborationProfiler.active
+      for c in s._collect_all_single( lambda s: isinstance( s, ComponentLevel2 ) ):
+        if prof is None:
+          c._elaborate_read_write_func()
+        else:
+          with prof.component( c, "read_write_func" ):
+            c._elaborate_read_write_func()
 
-    s._elaborate_collect_all_named_objects()
+    with profile_phase( "collect_named_objects" ):
+      s._elaborate_collect_all_named_objects()
 
-    s._elaborate_declare_vars()
-    s._elaborate_collect_all_vars()
+    with profile_phase( "collect_vars" ):
+      s._elaborate_declare_vars()
+      s._elaborate_collect_all_vars()
 
-    s._check_valid_dsl_code()
+    with profile_phase( "check" ):
+      s._check_valid_dsl_code()
 
   #-----------------------------------------------------------------------
   # Post-elaborate public APIs (can only be called after elaboration)
@@ -32,6 +32,7 @@ from .Connectable import (
     Wire,
     _connect_check,
 )
+from .ElaborationProfiler import profile_phase
 from .errors import (
     InvalidConnectionError,
     InvalidPlaceholderError,
@@ -371,7 +372,7 @@ class ComponentLevel3( ComponentLevel2 ):
         nets.append( net )
     return nets
 
-  def _resolve_value_connections( s ):
+  def _resolve_value_connections( s, nets=None, signals=None ):
     """ The case of nested data struct: the writer of a net can be one of
     the three: signal itself (s.x.a), ancestor (s.x), descendant (s.x.b)
 
@@ -392,11 +393,15 @@ class ComponentLevel3( ComponentLevel2 ):
     deeper, so all of those parent/child relationship work easily.
     However, unlike different fields of a data struct, different slices
     may _intersect_, so they need to check sibling slices' write/read
-    status as well. """
+    status as well.
+
+    The incremental resolution passes in the nets to resolve and the set
+    of signals that can affect their writers. """
 
     # First of all, bfs the "forest" to find out all nets
 
-    nets = s._floodfill_nets( s._dsl.all_signals, s._dsl.all_adjacency )
+    if nets is None:
+      nets = s._floodfill_nets( s._dsl.all_signals, s._dsl.all_adjacency )
 
     # Then figure out writers: all writes in upblks and their nest objects
 
@@ -404,6 +409,9 @@ class ComponentLevel3( ComponentLevel2 ):
 
     for blk, writes in s._dsl.all_upblk_writes.items():
       for obj in writes:
+        if signals is not None and obj not in signals:
+          continue
+
         writer_prop[ obj ] = True # propagatable
 
         obj = obj.get_parent_object()
@@ -518,6 +526,108 @@ class ComponentLevel3( ComponentLevel2 ):
 
     return headed + [ (None, x) for x in headless ]
 
+  @staticmethod
+  def _get_signals_under( root ):
+    """ Return root and all of its struct fields and slices. """
+    ret   = []
+    stack = [ root ]
+    while stack:
+      u = stack.pop()
+      ret.append( u )
+      for name, obj in u.__dict__.items():
+        if isinstance( name, str ) and name[0] == '_':
+          continue
+        if isinstance( obj, Signal ):
+          stack.append( obj )
+        elif isinstance( obj, list ):
+          Q = list( obj )
+          while Q:
+            x = Q.pop()
+            if isinstance( x, Signal ):
+              stack.append( x )
+            elif isinstance( x, list ):
+              Q.extend( x )
+    return ret
+
+  def _resolve_value_connections_incremental( s, dirty_signals ):
+    """ Re-resolve only the nets affected by adding/deleting the signals
+    in dirty_signals or their connections, and keep the other nets of
+    the last resolution.
+
+    The writer of a net may be inferred from the writes to an ancestor,
+    descendant, or overlapping sibling slice of one of its members, i.e.,
+    from a signal that shares the top level signal with it. Hence we
+    re-resolve the closure of the nets that transitively share top level
+    signals with the dirty signals. Any other net has exactly the same
+    members and the same writer as before. """
+
+    adjacency = s._dsl.all_adjacency
+
+    # signal -> (writer, net) of the last resolution. It is rebuilt only
+    # if the nets were resolved from scratch in the meantime
+    old_nets = s._dsl.all_value_nets
+    index    = s._dsl.value_net_index
+    if index is None or index[0] is not old_nets:
+      net_of = {}
+      for x in old_nets:
+        for v in x[1]:
+          net_of[ v ] = x
+    else:
+      net_of = index[1]
+
+    nets    = []
+    covered = set()
+    signals = set()
+    roots   = { x._dsl.top_level_signal for x in dirty_signals }
+    Q       = list( roots )
+
+    while Q:
+      seeds = []
+      for r in Q:
+        for x in s._get_signals_under( r ):
+          signals.add( x )
+          if x in adjacency and x not in covered:
+            seeds.append( x )
+
+      Q = []
+      for net in s._floodfill_nets( seeds, adjacency ):
+        nets.append( net )
+        covered |= net
+        for x in net:
+          if isinstance( x, Signal ):
+            r = x._dsl.top_level_signal
+            if r not in roots:
+              roots.add( r )
+              Q.append( r )
+
+    # The old nets of these signals are replaced by the new ones
+    removed = set()
+    for x in signals:
+      if x in net_of:
+        removed.add( id(net_of[x]) )
+    for x in dirty_signals:
+      if x in net_of:
+        removed.add( id(net_of[x]) )
+
+    new_nets = s._resolve_value_connections( nets, signals )
+
+    ret = []
+    for x in old_nets:
+      if id(x) in removed:
+        for v in x[1]:
+          if net_of.get( v ) is x:
+            del net_of[ v ]
+      else:
+        ret.append( x )
+
+    for x in new_nets:
+      ret.append( x )
+      for v in x[1]:
+        net_of[ v ] = x
+
+    s._dsl.value_net_index = ( ret, net_of )
+    return ret
+
   def _check_port_in_nets( s ):
     nets = s._dsl.all_value_nets
 
@@ -775,11 +885,13 @@ class ComponentLevel3( ComponentLevel2 ):
   def _elaborate_declare_vars( s ):
     super()._elaborate_declare_vars()
     s._dsl.all_adjacency = defaultdict(set)
+    s._dsl.value_net_index = None
 
   # Override
   def _elaborate_collect_all_vars( s ):
     super()._elaborate_collect_all_vars()
-    s._dsl.all_value_nets = s._resolve_value_connections()
+    with profile_phase( "resolve_nets" ):
+      s._dsl.all_value_nets = s._resolve_value_connections()
     s._dsl._has_pending_value_connections = False
 
     s._check_valid_dsl_code()
@@ -11,6 +11,7 @@ from .ComponentLevel1 import ComponentLevel1
 from .ComponentLevel2 import ComponentLevel2
 from .ComponentLevel4 import ComponentLevel4
 from .Connectable import CalleePort, CallerPort, Const, Interface, MethodPort, Signal
+from .ElaborationProfiler import profile_phase
 from .errors import InvalidConnectionError, MultiWriterError
 from .NamedObject import NamedObject
 from .Placeholder import Placeholder
@@ -153,8 +154,9 @@ class ComponentLevel5( ComponentLevel4 ):
       elif isinstance( c, MethodPort ):
         s._dsl.all_method_ports.add( c )
 
-    s._dsl.all_value_nets  = s._resolve_value_connections()
-    # Added here
-    s._dsl.all_method_nets = s._resolve_method_connections()
+    with profile_phase( "resolve_nets" ):
+      s._dsl.all_value_nets  = s._resolve_value_connections()
+      # Added here
+      s._dsl.all_method_nets = s._resolve_method_connections()
     s._dsl._has_pending_value_connections = False
     s._dsl._has_pending_method_connections = False
@@ -0,0 +1,181 @@
+"""
+========================================================================
+ElaborationProfiler.py
+========================================================================
+Opt-in instrumentation of elaboration and of the passes applied with
+Component.apply. It records the wall time of each phase, the construct
+and read/write-function analysis time of each component class, and the
+number of elaborated objects.
+
+  with ElaborationProfiler() as prof:
+    top = SoC()
+    top.elaborate()
+    top.apply( DefaultPassGroup() )
+  prof.dump_json( "elab.json" )
+  prof.dump_folded( "elab.folded" ) # input of flamegraph.pl/speedscope
+
+Phases and constructs nest, e.g. the construct time of a child component
+is part of the construct time of its parent. The "self_time" entries
+exclude the time spent in nested frames. The folded stack file has one
+"frame;frame;... <microseconds>" line per distinct stack with its self
+time.
+
+Set PYMTL_ELAB_PROFILE to a path prefix to profile the whole process and
+dump <prefix>.json and <prefix>.folded at exit.
+
+Date   : Oct 18, 2026
+"""
+import atexit
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+class ElaborationProfiler:
+
+  # The profiler that the elaboration hooks report to
+  active = None
+
+  def __init__( s ):
+    s.phases  = {} # name -> { calls, time, self_time }
+    s.classes = {} # class name -> { instances, <kind>_time, <kind>_self_time }
+    s.counts  = {} # object counts of the last elaborated top
+
+    s._prev   = None
+    s._stack  = [] # [ frame name, start time, time of nested frames ]
+    s._folded = defaultdict(float)
+
+  #-----------------------------------------------------------------------
+  # Enable/disable
+  #-----------------------------------------------------------------------
+
+  def start( s ):
+    s._prev = ElaborationProfiler.active
+    ElaborationProfiler.active = s
+
+  def stop( s ):
+    ElaborationProfiler.active = s._prev
+    s._prev = None
+
+  def __enter__( s ):
+    s.start()
+    return s
+
+  def __exit__( s, *exc ):
+    s.stop()
+
+  #-----------------------------------------------------------------------
+  # Recording
+  #-----------------------------------------------------------------------
+
+  def _enter( s, name ):
+    s._stack.append( [ name, perf_counter(), 0.0 ] )
+
+  def _exit( s ):
+    name, start, nested = s._stack.pop()
+    elapsed   = perf_counter() - start
+    self_time = elapsed - nested
+    if s._stack:
+      s._stack[-1][2] += elapsed
+    s._folded[ ";".join( [ x[0] for x in s._stack ] + [ name ] ) ] += self_time
+    return elapsed, self_time
+
+  @contextmanager
+  def phase( s, name ):
+    s._enter( name )
+    try:
+      yield
+    finally:
+      elapsed, self_time = s._exit()
+      entry = s.phases.get( name )
+      if entry is None:
+        entry = s.phases[ name ] = { "calls": 0, "time": 0.0, "self_time": 0.0 }
+      entry["calls"]     += 1
+      entry["time"]      += elapsed
+      entry["self_time"] += self_time
+
+  @contextmanager
+  def component( s, obj, kind ):
+    """ Attribute the enclosed work (e.g. "construct") to the class of
+    obj. """
+    name = obj.__class__.__name__
+    entry = s.classes.get( name )
+    if entry is None:
+      entry = s.classes[ name ] = defaultdict(float)
+      entry["instances"] = 0
+    if kind == "construct":
+      entry["instances"] += 1
+
+    s._enter( name )
+    try:
+      yield
+    finally:
+      elapsed, self_time = s._exit()
+      entry[ f"{kind}_time" ]      += elapsed
+      entry[ f"{kind}_self_time" ] += self_time
+
+  def record_counts( s, top ):
+    sd = top._dsl
+    s.counts = {
+      "named_objects": len(sd.all_named_objects),
+      "components":    len(sd.all_components),
+      "signals":       len(sd.all_signals),
+      "update_blocks": len(sd.all_upblks),
+      "update_ff":     len(sd.all_update_ff),
+      "value_nets":    len(sd.all_value_nets),
+    }
+
+  #-----------------------------------------------------------------------
+  # Export
+  #-----------------------------------------------------------------------
+
+  def to_dict( s ):
+    return {
+      "phases":  { k: dict(v) for k, v in s.phases.items() },
+      "classes": { k: dict(v) for k, v in sorted( s.classes.items(),
+                       key=lambda x: -x[1]["construct_self_time"] ) },
+      "counts":  dict(s.counts),
+    }
+
+  def dump_json( s, path ):
+    with open( path, 'w' ) as f:
+      json.dump( s.to_dict(), f, indent=2 )
+
+  def dump_folded( s, path ):
+    with open( path, 'w' ) as f:
+      for stack, t in sorted( s._folded.items() ):
+        us = int( t * 1e6 )
+        if us > 0:
+          f.write( f"{stack} {us}\n" )
+
+def profile_phase( name ):
+  """ Return a context manager that records a phase if profiling is
+  enabled. """
+  prof = ElaborationProfiler.active
+  if prof is None:
+    return nullcontext()
+  return prof.phase( name )
+
+def profile_construct( obj ):
+  """ Construct obj and attribute the time to its class if profiling is
+  enabled. """
+  prof = ElaborationProfiler.active
+  if prof is None:
+    obj._construct()
+  else:
+    with prof.component( obj, "construct" ):
+      obj._construct()
+
+_env = os.getenv( "PYMTL_ELAB_PROFILE" )
+
+if _env:
+  _prof = ElaborationProfiler()
+  _prof.start()
+
+  def _dump_at_exit():
+    _prof.dump_json( _env + ".json" )
+    _prof.dump_folded( _env + ".folded" )
+
+  atexit.register( _dump_at_exit )
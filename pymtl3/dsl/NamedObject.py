@@ -21,6 +21,7 @@ Date   : Nov 3, 2018
 import re
 from collections import deque
 
+from .ElaborationProfiler import profile_construct
 from .errors import FieldReassignError, NotElaboratedError
 
 
@@ -191,7 +192,7 @@ class NamedObject:
         top = ud.elaborate_top = sd.elaborate_top
 
         NamedObject._elaborate_stack.append( obj )
-        obj._construct()
+        profile_construct( obj )
         NamedObject._elaborate_stack.pop()
 
       # ONLY LIST IS SUPPORTED, SORRY.
@@ -248,7 +249,7 @@ class NamedObject:
             top = ud.elaborate_top = sd.elaborate_top
 
             NamedObject._elaborate_stack.append( u )
-            u._construct()
+            profile_construct( u )
             NamedObject._elaborate_stack.pop()
 
           elif isinstance( u, list ):
@@ -381,7 +382,7 @@ class NamedObject:
     NamedObject._elaborate_stack = [ s ]
 
     try:
-      s._construct()
+      profile_construct( s )
     except Exception:
       # re-raise here after deleting __setattr__
       del NamedObject.__setattr__ # not harming the rest of execution
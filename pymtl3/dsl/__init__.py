@@ -31,5 +31,6 @@ from .Connectable import (
     Wire,
 )
 from .ConstraintTypes import RD, WR, M, U
+from .ElaborationProfiler import ElaborationProfiler
 from .MetadataKey import MetadataKey
 from .Placeholder import Placeholder
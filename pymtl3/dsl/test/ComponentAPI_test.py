@@ -364,6 +364,63 @@ def test_ctrl_dpath_connected_replaced_both():
   a.tick()
   assert a.out == 10 + 444 * 2
 
+def test_replace_component_incremental_nets():
+
+  @bitstruct
+  class Point:
+    x: Bits8
+    y: Bits8
+
+  class Pass( Component ):
+    def construct( s ):
+      s.in_ = InPort( Point )
+      s.out = OutPort( Point )
+      connect( s.in_, s.out )
+
+  class Swap( Component ):
+    def construct( s ):
+      s.in_ = InPort( Point )
+      s.out = OutPort( Point )
+      s.out.x //= s.in_.y
+      @update
+      def up_swap():
+        s.out.y @= s.in_.x
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Point )
+      s.out = OutPort( Point )
+      s.mid = Wire( Bits16 )
+      s.sum = OutPort( Bits8 )
+      s.stages = [ Pass() for _ in range(4) ]
+      s.stages[0].in_ //= s.in_
+      for i in range(1, 4):
+        s.stages[i].in_ //= s.stages[i-1].out
+      s.stages[3].out //= s.out
+      s.mid[0:8]  //= s.stages[1].out.x
+      s.mid[8:16] //= s.stages[2].out.y
+      @update
+      def up_sum():
+        s.sum @= s.mid[4:12] + s.stages[3].out.y
+
+  def normalize( nets ):
+    return sorted( ( repr(w), sorted( repr(x) for x in net ) ) for w, net in nets )
+
+  a = Top()
+  a.elaborate()
+  for i, cls in [ (1, Swap), (2, Swap), (1, Pass), (3, Swap), (0, Swap) ]:
+    a.replace_component( a.stages[i], cls )
+    assert normalize( a.get_all_value_nets() ) == \
+           normalize( a._resolve_value_connections() )
+
+  simple_sim_pass( a )
+  a.in_ = Point( 1, 2 )
+  a.tick()
+  # Swap, Pass, Swap, Swap
+  assert a.out == Point( 2, 1 )
+  assert a.mid == 0x0202
+  assert a.sum == 0x20 + 1
+
 # Test orders
 
 def test_connect_upblk_orders():
@@ -814,3 +814,38 @@ def test_write_interface_update_ff():
     print("{} is thrown\n{}".format( e.__class__.__name__, e ))
     return
   raise Exception("Should've thrown WriteNonSignalError.")
+
+def test_ast_disk_cache( tmp_path, monkeypatch ):
+  import inspect
+
+  from pymtl3.dsl import AstCache
+
+  monkeypatch.setattr( AstCache, "cache_dir", str(tmp_path) )
+
+  def make_class():
+    class Top( ComponentLevel2 ):
+      def construct( s ):
+        s.in_ = InPort(Bits32)
+        s.out = OutPort(Bits32)
+
+        @update
+        def up():
+          s.out @= s.in_ + 1
+    return Top
+
+  A = make_class()()
+  A.elaborate()
+  assert len( list( tmp_path.glob("*.pkl") ) ) == 1
+
+  # A brand new class object with the same source must be served from
+  # the disk cache without going through inspect/ast
+  def fail( *args ):
+    raise AssertionError( "should hit the on-disk cache" )
+  monkeypatch.setattr( inspect, "getsourcelines", fail )
+
+  B = make_class()()
+  B.elaborate()
+
+  up = B._dsl.name_upblk['up']
+  assert { repr(x) for x in B._dsl.upblk_reads[up] }  == { "s.in_" }
+  assert { repr(x) for x in B._dsl.upblk_writes[up] } == { "s.out" }
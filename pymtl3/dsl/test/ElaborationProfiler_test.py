@@ -0,0 +1,92 @@
+"""
+========================================================================
+ElaborationProfiler_test.py
+========================================================================
+
+Date   : Oct 18, 2026
+"""
+import json
+
+from pymtl3.datatypes import *
+from pymtl3.dsl import (
+    Component,
+    ElaborationProfiler,
+    InPort,
+    OutPort,
+    update,
+    update_ff,
+)
+
+from .sim_utils import simple_sim_pass
+
+
+class Reg( Component ):
+  def construct( s ):
+    s.in_ = InPort ( Bits8 )
+    s.out = OutPort( Bits8 )
+    @update_ff
+    def up_reg():
+      s.out <<= s.in_
+
+class Pipe( Component ):
+  def construct( s, n=3 ):
+    s.in_  = InPort ( Bits8 )
+    s.out  = OutPort( Bits8 )
+    s.regs = [ Reg() for _ in range(n) ]
+    s.regs[0].in_ //= s.in_
+    for i in range(1, n):
+      s.regs[i].in_ //= s.regs[i-1].out
+    @update
+    def up_out():
+      s.out @= s.regs[n-1].out
+
+class CountPass:
+  def __call__( s, top ):
+    top._count_pass = True
+
+def test_profile_elaboration_and_apply( tmpdir ):
+  top = Pipe( 3 )
+  with ElaborationProfiler() as prof:
+    top.elaborate()
+    top.apply( CountPass() )
+  assert ElaborationProfiler.active is None
+
+  for name in [ "elaborate", "construct", "read_write_func",
+                "collect_named_objects", "collect_vars", "resolve_nets",
+                "check", "apply:CountPass" ]:
+    assert prof.phases[ name ]["calls"] >= 1, name
+  assert prof.phases["elaborate"]["time"] >= prof.phases["construct"]["time"]
+
+  assert prof.classes["Pipe"]["instances"] == 1
+  assert prof.classes["Reg"]["instances"] == 3
+  assert prof.classes["InPort"]["instances"] == 12 # with clk and reset
+  assert prof.classes["Pipe"]["construct_time"] >= prof.classes["Reg"]["construct_time"]
+  assert prof.classes["Reg"]["read_write_func_time"] > 0
+
+  assert prof.counts["components"] == 4
+  assert prof.counts["update_blocks"] == 4
+  assert prof.counts["update_ff"] == 3
+
+  prof.dump_json( str(tmpdir/"elab.json") )
+  with open( str(tmpdir/"elab.json") ) as f:
+    d = json.load( f )
+  assert d["classes"]["Reg"]["instances"] == 3
+
+  prof.dump_folded( str(tmpdir/"elab.folded") )
+  stacks = {}
+  with open( str(tmpdir/"elab.folded") ) as f:
+    for line in f:
+      stack, us = line.rsplit( ' ', 1 )
+      stacks[ stack ] = int( us )
+  assert all( x.split( ";" )[0] in ( "elaborate", "apply:CountPass" ) for x in stacks )
+  assert any( x.startswith( "elaborate;construct;Pipe;Reg" ) for x in stacks )
+
+def test_profiler_disabled_by_default():
+  top = Pipe( 2 )
+  top.elaborate()
+  simple_sim_pass( top )
+  top.in_ @= 3
+  for _ in range(3):
+    top.tick()
+  assert top.out == 3
+  assert ElaborationProfiler.active is None
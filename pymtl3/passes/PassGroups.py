@@ -1,10 +1,13 @@
 from .autotick.OpenLoopCLPass import OpenLoopCLPass
 from .BasePass import BasePass
+from .sim.ActivitySchedulePass import ActivitySchedulePass
 from .sim.DynamicSchedulePass import DynamicSchedulePass
 from .sim.GenDAGPass import GenDAGPass
+from .sim.ParallelSchedulePass import ParallelSchedulePass
 from .sim.PrepareSimPass import PrepareSimPass
 from .sim.SimpleSchedulePass import SimpleSchedulePass
 from .sim.SimpleTickPass import SimpleTickPass
+from .sim.SpecializeUpblkPass import SpecializeUpblkPass
 from .sim.WrapGreenletPass import WrapGreenletPass
 from .tracing.CLLineTracePass import CLLineTracePass
 from .tracing.LineTraceParamPass import LineTraceParamPass
@@ -27,12 +30,14 @@ class SimpleSimPass( BasePass ):
 
 class DefaultPassGroup( BasePass ):
   def __init__( s, *, vcdwave=None, textwave=False,
-                      linetrace=False, reset_active_high=True ):
+                      linetrace=False, reset_active_high=True,
+                      specialize=False ):
 
     s.vcdwave = vcdwave
     s.textwave = textwave
     s.linetrace = linetrace
     s.reset_active_high = reset_active_high
+    s.specialize = specialize
 
   def __call__( s, top ):
 
@@ -47,6 +52,8 @@ class DefaultPassGroup( BasePass ):
     WrapGreenletPass()( top )
     CLLineTracePass()( top )
     DynamicSchedulePass()( top )
+    if s.specialize:
+      SpecializeUpblkPass()( top )
     VcdGenerationPass()( top )
     PrintTextWavePass()( top )
 
@@ -0,0 +1,420 @@
+#=========================================================================
+# CSimPass.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Provide a pass that simulates an RTL design with generated C code.
+
+CSimPass generates a cycle-based C simulator of the whole design from
+the nets found by GenDAGPass, the schedule of a schedule pass, and the
+behavioral RTLIR of every update block. The simulator is compiled into
+a shared library and loaded through CFFI. It replaces the schedule of
+the design with one combinational block that copies the top-level input
+ports into the C model, evaluates all combinational logic, and copies
+the outputs back, plus one sequential block that evaluates all
+sequential logic. This skips the translation to Verilog and the
+Verilator build when iterating on a design.
+
+  m.elaborate()
+  m.apply( GenDAGPass() )
+  m.apply( SimpleSchedulePass( order='locality' ) )
+  m.apply( CSimPass() )
+  m.apply( PrepareSimPass() )
+
+The generated source follows the schedule, so use a deterministic
+schedule order to reuse the compiled library across runs.
+
+Like an imported Verilog model, only the top-level ports are visible to
+Python during simulation. The design has to be translatable with every
+signal at most 64 bits wide, and acyclic.
+"""
+import os
+import subprocess
+import timeit
+from hashlib import blake2b
+from linecache import cache as line_cache
+from textwrap import indent
+
+from cffi import FFI
+
+from pymtl3.dsl import Const, InPort, MetadataKey, MethodPort, OutPort
+from pymtl3.dsl.Connectable import Signal
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.BasePass import BasePass
+from pymtl3.passes.errors import PassOrderError
+from pymtl3.passes.rtlir import BehavioralRTLIR as bir
+from pymtl3.passes.rtlir import RTLIRGetter
+from pymtl3.passes.rtlir.behavioral.BehavioralRTLIRGenL5Pass import (
+    BehavioralRTLIRGeneratorL5,
+)
+from pymtl3.passes.rtlir.behavioral.BehavioralRTLIRTypeCheckL5Pass import (
+    BehavioralRTLIRTypeCheckVisitorL5,
+)
+
+from ..verilog.util.utility import get_component_unique_name, wrap
+from .csim_c_template import template as c_template
+from .CUpblkTranslator import (
+    MAX_NBITS,
+    CRef,
+    CUpblkTranslator,
+    get_const_value,
+    get_field_layout,
+    literal,
+    mask,
+    read_ref,
+    write_ref,
+)
+from .errors import CSimError
+
+
+def get_leaf_signals( x ):
+  """Return the Bits-typed fields of a port, or the port itself."""
+  if isinstance( x, list ):
+    return [ y for z in x for y in get_leaf_signals( z ) ]
+  Type = x._dsl.Type
+  if not hasattr( Type, '__bitstruct_fields__' ):
+    return [ x ]
+  return [ y for name in Type.__bitstruct_fields__ for y in get_leaf_signals( getattr( x, name ) ) ]
+
+class SlotAllocator:
+  """Map the signals of a design to slots of the C state array.
+
+  Top-level signals that are connected by a net without slicing share
+  one slot. A slice or a struct field is a bit range of the slot of its
+  top-level signal."""
+
+  def __init__( s ):
+    s.parent  = {}
+    s.slots   = {} # root signal -> slot index
+    s.widths  = [] # slot index -> bitwidth
+    s.tables  = {} # tuple of slot indices -> table name
+    s.ctables = {} # tuple of constants -> table name
+    s.scratch = None
+
+  def find( s, x ):
+    root = x
+    while s.parent.get( root, root ) is not root:
+      root = s.parent[ root ]
+    while x is not root:
+      s.parent[x], x = root, s.parent[x]
+    return root
+
+  def alias( s, x, y ):
+    s.parent[ s.find( x ) ] = s.find( y )
+
+  def new_slot( s, nbits ):
+    s.widths.append( nbits )
+    return len( s.widths ) - 1
+
+  def slot( s, x ):
+    root = s.find( x )
+    if root not in s.slots:
+      nbits = root._dsl.Type.nbits
+      if nbits > MAX_NBITS:
+        raise CSimError( root, f"signals wider than {MAX_NBITS} bits are not supported" )
+      s.slots[ root ] = s.new_slot( nbits )
+    return s.slots[ root ]
+
+  def loc( s, x ):
+    """Return ( slot, lsb, nbits, width ) of signal `x`."""
+    if not isinstance( x, Signal ):
+      raise CSimError( x, "only references to signals are supported" )
+
+    if x.is_top_level_signal():
+      k = s.slot( x )
+      return k, 0, s.widths[k], s.widths[k]
+
+    parent = x.get_parent_object()
+    k, lsb, _, width = s.loc( parent )
+    if x.is_sliced_signal():
+      sl = x._dsl.slice
+      return k, lsb + sl.start, sl.stop - sl.start, width
+
+    # A field of a bitstruct signal
+    off, nbits = get_field_layout( parent._dsl.Type, x._dsl._my_name, x._dsl._my_indices or () )
+    return k, lsb + off, nbits, width
+
+  def ref( s, x ):
+    k, lsb, nbits, width = s.loc( x )
+    return CRef( str(k), lsb, nbits, width, [k] )
+
+  def table( s, slots ):
+    if s.scratch is None:
+      s.scratch = s.new_slot( MAX_NBITS )
+    key = tuple( slots )
+    if key not in s.tables:
+      s.tables[ key ] = f"t{len(s.tables)}"
+    return s.tables[ key ]
+
+  def const_table( s, values ):
+    key = tuple( values )
+    if key not in s.ctables:
+      s.ctables[ key ] = f"c{len(s.ctables)}"
+    return s.ctables[ key ]
+
+  def gen_tables( s ):
+    ret = []
+    for key, name in s.tables.items():
+      entries = ", ".join( str(x) for x in key + ( s.scratch, ) )
+      ret.append( f"static const uint32_t {name}[{len(key)+1}] = {{ {entries} }};" )
+    for key, name in s.ctables.items():
+      entries = ", ".join( literal(x) for x in key + ( 0, ) )
+      ret.append( f"static const uint64_t {name}[{len(key)+1}] = {{ {entries} }};" )
+    return ret
+
+class CSimPass( BasePass ):
+  """Simulate the design rooted at top with a generated C simulator."""
+
+  #: Flags passed to the C compiler.
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ``'-O1'``
+  c_flags = MetadataKey(str)
+
+  #: Print out the C compiler command and the build time.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``False``
+  verbose = MetadataKey(bool)
+
+  #: The generated C source file.
+  #:
+  #: Type: ``str``; output
+  c_src_file = MetadataKey(str)
+
+  #: The shared library compiled from ``c_src_file``.
+  #:
+  #: Type: ``str``; output
+  shared_lib_file = MetadataKey(str)
+
+  def __call__( s, top ):
+    c = s.__class__
+
+    if not hasattr( top, "_dag" ):
+      raise PassOrderError( "_dag" )
+    if not hasattr( top, "_sched" ):
+      raise PassOrderError( "_sched" )
+    if not hasattr( top._sched, "update_schedule" ):
+      raise PassOrderError( "update_schedule" )
+    if hasattr( top, "_sim" ) and getattr( top._sim, "locked_simulation", False ):
+      raise CSimError( top, "CSimPass has to be applied before PrepareSimPass!" )
+
+    if top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) or \
+       top.get_all_update_once():
+      raise CSimError( top, "only pure RTL designs without method ports can be simulated in C" )
+
+    s.top     = top
+    s.c_flags = top.get_metadata( c.c_flags ) if top.has_metadata( c.c_flags ) else "-O1"
+    s.verbose = top.has_metadata( c.verbose ) and top.get_metadata( c.verbose )
+    s.name    = get_component_unique_name( RTLIRGetter(cache=False).get_component_ifc_rtlir( top ) ) + "__csim"
+
+    src = s.gen_c_source( top )
+    src_file, lib_file = s.build( top, src )
+    top.set_metadata( c.c_src_file, src_file )
+    top.set_metadata( c.shared_lib_file, lib_file )
+
+    comb_eval, seq_eval = s.load( top, lib_file )
+
+    top._sched.update_schedule = [ comb_eval ]
+    top._sched.schedule_ff = [ seq_eval ]
+    # The C model commits the values written by <<= by itself
+    top._sched.schedule_posedge_flip = []
+
+  #-----------------------------------------------------------------------
+  # gen_c_source
+  #-----------------------------------------------------------------------
+
+  def gen_c_source( s, top ):
+    nets = { blk: ( writer, readers )
+             for ( writer, _ ), ( blk, readers ) in top._dag.genblk_cache.items() }
+    upblks    = top.get_all_update_blocks()
+    upblk_ffs = top.get_all_update_ff()
+
+    for blk in top._sched.update_schedule + top._sched.schedule_ff:
+      if blk not in nets and blk not in upblks:
+        raise CSimError( top, f"{blk.__name__} is not an update block. CSimPass requires "
+                              f"an acyclic schedule of update blocks." )
+
+    slots = s.slots = SlotAllocator()
+
+    # Signals connected by a net without slicing share one slot
+    for writer, readers in nets.values():
+      if not isinstance( writer, Const ) and writer.is_top_level_signal():
+        for x in readers:
+          if x.is_top_level_signal():
+            slots.alias( x, writer )
+
+    # Allocate the top-level ports first
+    s.ports = sorted( top.get_all_object_filter(
+                        lambda x: isinstance( x, (InPort, OutPort) ) and x.is_top_level_signal() and
+                                  x.get_host_component() is top and x is not top.clk ), key=repr )
+    for x in s.ports:
+      slots.loc( x )
+
+    # Number the other signals in a fixed order so that the generated
+    # source only depends on the design and its schedule
+    for x in sorted( top.get_all_object_filter(
+                       lambda x: isinstance( x, Signal ) and x.is_top_level_signal() and
+                                 x._dsl.Type.nbits <= MAX_NBITS ), key=repr ):
+      slots.loc( x )
+
+    rtlir_getter = RTLIRGetter( cache=True )
+    funcs, ff_writes = [], set()
+
+    def gen_blks( schedule ):
+      body = []
+      for blk in schedule:
+        if blk in nets:
+          body.extend( s.gen_net( *nets[ blk ] ) )
+        else:
+          fname = f"upblk{len(funcs)}_{blk.__name__}"
+          m = top.get_update_block_host_component( blk )
+          upblk_type = bir.SeqUpblk if blk in upblk_ffs else bir.CombUpblk
+          lines, writes = s.gen_upblk( m, blk, upblk_type, rtlir_getter )
+          ff_writes.update( writes )
+          funcs.append( "\n".join( [ f"// {blk.__name__} of {m!r}",
+                                     f"static inline void {fname}( uint64_t * v, uint64_t * n )",
+                                     "{" ] + [ "  "+x for x in lines ] + [ "}" ] ) )
+          body.append( f"{fname}( v, n );" )
+      return body
+
+    comb_eval = gen_blks( top._sched.update_schedule )
+    seq_eval  = gen_blks( top._sched.schedule_ff )
+    commit    = [ f"v[{k}] = n[{k}];" for k in sorted( ff_writes ) ]
+
+    nslots = len( slots.widths )
+    return c_template.format(
+      name      = s.name,
+      top       = top.__class__.__name__,
+      nslots    = nslots,
+      nslots2   = 2 * nslots,
+      tables    = "\n".join( slots.gen_tables() ),
+      upblks    = "\n\n".join( funcs ),
+      comb_eval = indent( "\n".join( comb_eval ), "  " ),
+      seq_eval  = indent( "\n".join( seq_eval ), "  " ),
+      commit    = indent( "\n".join( commit ), "  " ),
+    )
+
+  def gen_net( s, writer, readers ):
+    # Copy the writer to the readers that don't share its slot
+    slots = s.slots
+    if isinstance( writer, Const ):
+      value = literal( get_const_value( writer._dsl.const ) & mask( writer._dsl.Type.nbits ) )
+    else:
+      if writer.is_top_level_signal():
+        readers = [ x for x in readers if not x.is_top_level_signal() ]
+      value = read_ref( slots.ref( writer ) )
+
+    ret = []
+    for x in sorted( readers, key=repr ):
+      ret.extend( write_ref( "v", slots.ref( x ), value ) )
+    return ret
+
+  def gen_upblk( s, m, blk, upblk_type, rtlir_getter ):
+    try:
+      visitor = BehavioralRTLIRGeneratorL5( m )
+      visitor._upblk_type = upblk_type
+      rtlir = visitor.enter( blk, m.get_update_block_info( blk )[-1] )
+
+      type_checker = BehavioralRTLIRTypeCheckVisitorL5( m, {}, set(), {}, rtlir_getter )
+      type_checker.enter( blk, rtlir )
+
+      translator = CUpblkTranslator( m, s.slots )
+      lines = translator.enter( rtlir )
+    except CSimError:
+      raise
+    except Exception as e:
+      raise CSimError( m, f"cannot translate update block {blk.__name__}: {e}" ) from e
+    return lines, translator.ff_writes
+
+  #-----------------------------------------------------------------------
+  # build
+  #-----------------------------------------------------------------------
+  # The shared library is named after the hash of the source, so an
+  # unchanged design is not compiled again and a stale library that is
+  # still loaded is never reused for a changed design.
+
+  def build( s, top, src ):
+    digest   = blake2b( (src + s.c_flags).encode(), digest_size=8 ).hexdigest()
+    src_file = os.path.abspath( f"{s.name}.c" )
+    lib_file = os.path.abspath( f"lib{s.name}_{digest}.so" )
+
+    with open( src_file, "w" ) as f:
+      f.write( src )
+
+    if os.path.exists( lib_file ):
+      if s.verbose:
+        print( f"{lib_file} is cached!" )
+      return src_file, lib_file
+
+    # Compile to a temporary file first in case another process builds
+    # the same library
+    tmp_file = f"{lib_file}.{os.getpid()}"
+    cc  = os.environ.get( "CC", "cc" )
+    cmd = f"{cc} {s.c_flags} -std=c99 -fPIC -shared -o {tmp_file} {src_file}"
+    if s.verbose:
+      print( f"Compiling C simulator with command:\n  {cmd}" )
+
+    t0 = timeit.default_timer()
+    try:
+      subprocess.check_output( cmd, stderr=subprocess.STDOUT, shell=True,
+                               universal_newlines=True )
+    except subprocess.CalledProcessError as e:
+      raise CSimError( top, f"Failed to compile the C simulator:\n"
+                            f"  C compiler command:\n{indent(cmd, '    ')}\n\n"
+                            f"  C compiler output:\n{indent(wrap(e.output), '    ')}\n" )
+    os.replace( tmp_file, lib_file )
+
+    if s.verbose:
+      print( f"C simulator compilation time: {timeit.default_timer()-t0}" )
+    return src_file, lib_file
+
+  #-----------------------------------------------------------------------
+  # load
+  #-----------------------------------------------------------------------
+
+  def load( s, top, lib_file ):
+    ffi = FFI()
+    ffi.cdef( f"void {s.name}_comb_eval( uint64_t * );\n"
+              f"void {s.name}_seq_eval( uint64_t * );" )
+    lib   = ffi.dlopen( lib_file )
+    state = ffi.new( "uint64_t[]", 2 * len( s.slots.widths ) )
+
+    # Python expressions that copy the top-level ports from/to the state
+    # array. Input fields of a bitstruct port share one slot.
+    inputs, outputs = {}, []
+    for port in s.ports:
+      for x in get_leaf_signals( port ):
+        k, lsb, nbits, _ = s.slots.loc( x )
+        name = repr(x)
+        if port.is_input_value_port():
+          inputs.setdefault( k, [] ).append( f"int({name})" if lsb == 0 else f"(int({name}) << {lsb})" )
+        elif lsb == 0 and nbits == s.slots.widths[k]:
+          outputs.append( f"{name} @= _v[{k}]" )
+        else:
+          outputs.append( f"{name} @= (_v[{k}] >> {lsb}) & {hex(mask(nbits))}" )
+
+    src = "\n".join(
+      [ "def c_comb_eval():" ] +
+      [ f"  _v[{k}] = {' | '.join( terms )}" for k, terms in inputs.items() ] +
+      [ "  _comb_eval( _v )" ] +
+      [ f"  {x}" for x in outputs ] +
+      [ "def c_seq_eval():",
+        "  _seq_eval( _v )" ] ) + "\n"
+
+    _globals = {
+      's'          : top,
+      '_v'         : state,
+      '_comb_eval' : getattr( lib, f"{s.name}_comb_eval" ),
+      '_seq_eval'  : getattr( lib, f"{s.name}_seq_eval" ),
+      # Keep the library loaded as long as the blocks are alive
+      '_lib'       : lib,
+      '_ffi'       : ffi,
+    }
+    _locals = {}
+    fname = f"C simulator wrapper of {top!r}"
+    custom_exec( compile( src, filename=fname, mode="exec" ), _globals, _locals )
+    line_cache[ fname ] = ( len(src), None, src.splitlines(), fname )
+
+    return _locals[ "c_comb_eval" ], _locals[ "c_seq_eval" ]
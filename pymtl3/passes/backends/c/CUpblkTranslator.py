@@ -0,0 +1,512 @@
+#=========================================================================
+# CUpblkTranslator.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Translate the behavioral RTLIR of one update block into C.
+
+Every signal of the simulated design lives in one uint64_t slot of the
+state array ``v`` (signals connected by a net share a slot). Bitstruct
+signals are stored packed as in ``to_bits()``, so a struct field is a
+bit range of its slot. Values written by ``<<=`` go to the slot of the
+same index in ``n`` and are committed after all sequential blocks ran.
+
+The generated C code follows the semantics of Bits: the value of an
+expression with an explicit width is always masked into [0, 2**nbits),
+while ints (e.g., loop variables) are 64-bit integers.
+"""
+from pymtl3.datatypes import Bits, is_bitstruct_inst
+from pymtl3.passes.rtlir import BehavioralRTLIR as bir
+from pymtl3.passes.rtlir import RTLIRDataType as rdt
+from pymtl3.passes.rtlir import RTLIRType as rt
+
+from .errors import CSimError
+
+MAX_NBITS = 64
+
+def mask( nbits ):
+  return (1 << nbits) - 1
+
+def literal( v ):
+  v &= mask( MAX_NBITS )
+  return f"{v}ULL" if v < 256 else f"{hex(v)}ULL"
+
+def get_nbits( t ):
+  """Return the bitwidth of a Bits/bitstruct class or a list of them."""
+  if isinstance( t, list ):
+    return sum( get_nbits( x ) for x in t )
+  return t.nbits
+
+def get_field_layout( cls, name, indices=() ):
+  """Return ( lsb, nbits ) of field `name`[`indices`] of a bitstruct.
+
+  The layout is the same as ``to_bits()``: the first field is in the
+  most significant bits, and so is element 0 of a list field."""
+  pos = cls.nbits
+  for field, t in cls.__bitstruct_fields__.items():
+    nbits = get_nbits( t )
+    pos  -= nbits
+    if field == name:
+      for i in indices:
+        nbits = get_nbits( t[0] )
+        pos  += ( len(t) - 1 - i ) * nbits
+        t     = t[i]
+      return pos, nbits
+  raise AttributeError( f"{cls.__name__} has no field {name}" )
+
+def get_const_value( obj ):
+  if is_bitstruct_inst( obj ):
+    return int( obj.to_bits() )
+  if isinstance( obj, (int, Bits) ):
+    return int( obj )
+  raise TypeError( f"{obj!r} is not a constant" )
+
+class CRef:
+  """A bit range of a storage slot.
+
+  `idx` is the C expression of the slot index, `lsb` is an int or the C
+  expression of the lowest bit, and `width` is the bitwidth of the
+  signal that owns the slot. `slots` are all slots `idx` may refer to."""
+
+  def __init__( s, idx, lsb, nbits, width, slots ):
+    s.idx   = idx
+    s.lsb   = lsb
+    s.nbits = nbits
+    s.width = width
+    s.slots = slots
+
+  def is_whole( s ):
+    return s.lsb == 0 and s.nbits == s.width
+
+def read_ref( ref ):
+  """Return the C expression of the value of `ref`."""
+  slot = f"v[{ref.idx}]"
+  if ref.is_whole():
+    return slot
+  m = literal( mask( ref.nbits ) )
+  if isinstance( ref.lsb, int ):
+    if ref.lsb == 0:
+      return f"({slot} & {m})"
+    return f"(({slot} >> {ref.lsb}) & {m})"
+  return f"(({ref.lsb} < {ref.width}) ? (({slot} >> {ref.lsb}) & {m}) : 0)"
+
+def write_ref( arr, ref, rhs ):
+  """Return the C statements that write `rhs` to `ref` in array `arr`."""
+  slot = f"{arr}[{ref.idx}]"
+  if ref.is_whole():
+    return [ f"{slot} = {rhs};" ]
+  m    = mask( ref.nbits )
+  full = mask( ref.width )
+  if isinstance( ref.lsb, int ):
+    keep    = full ^ ( m << ref.lsb )
+    shifted = rhs if ref.lsb == 0 else f"({rhs} << {ref.lsb})"
+    return [ f"{slot} = ({slot} & {literal(keep)}) | {shifted};" ]
+  return [ "{",
+           f"  uint64_t _lsb = {ref.lsb};",
+           f"  if ( _lsb < {ref.width} )",
+           f"    {slot} = (({slot} & ~({literal(m)} << _lsb)) | ({rhs} << _lsb)) & {literal(full)};",
+           "}" ]
+
+class CUpblkTranslator( bir.BehavioralRTLIRNodeVisitor ):
+  """Translate one type-checked update block into the body of a C function.
+
+  `storage` maps DSL signals to slots (see CSimPass). Signal references
+  with variable array indices are resolved at generation time into
+  tables of slot indices, one entry per array element plus a trailing
+  scratch slot that out-of-range indices fall back to."""
+
+  def __init__( s, component, storage ):
+    s.component = component
+    s.storage   = storage
+    s.tmpvars   = []
+    # slots written by <<=
+    s.ff_writes = set()
+
+  def enter( s, rtlir ):
+    body = []
+    for stmt in rtlir.body:
+      body.extend( s.visit( stmt ) )
+    decls = [ f"uint64_t tmp_{x};" for x in s.tmpvars ]
+    return decls + body
+
+  def generic_visit( s, node, *args ):
+    raise CSimError( s.component, f"{node.__class__.__name__} is not supported" )
+
+  #-----------------------------------------------------------------------
+  # Statements
+  #-----------------------------------------------------------------------
+
+  def visit_Assign( s, node ):
+    ret = []
+    value = None
+    if len( node.targets ) > 1:
+      ret.append( f"_rhs = {s.val( node.value )};" )
+      value = "_rhs"
+
+    for target in node.targets:
+      if isinstance( target, bir.TmpVar ):
+        if target.name not in s.tmpvars:
+          s.tmpvars.append( target.name )
+        ret.append( f"tmp_{target.name} = {value or s.val( node.value )};" )
+        continue
+
+      ref = s.ref( target )
+      rhs = value or s.val_as( node.value, ref.nbits )
+      if value and not node.value._is_explicit:
+        rhs = f"({rhs} & {literal(mask(ref.nbits))})"
+      arr = "v" if node.blocking else "n"
+      if not node.blocking:
+        s.ff_writes.update( ref.slots )
+      ret.extend( write_ref( arr, ref, rhs ) )
+
+    if len( node.targets ) > 1:
+      ret = [ "{", "  uint64_t _rhs;" ] + [ "  "+x for x in ret ] + [ "}" ]
+    return ret
+
+  def visit_If( s, node ):
+    ret = [ f"if ( {s.cond( node.cond )} ) {{" ]
+    ret.extend( s.block( node.body ) )
+    orelse = node.orelse
+    while len( orelse ) == 1 and isinstance( orelse[0], bir.If ):
+      ret.append( f"}} else if ( {s.cond( orelse[0].cond )} ) {{" )
+      ret.extend( s.block( orelse[0].body ) )
+      orelse = orelse[0].orelse
+    if orelse:
+      ret.append( "} else {" )
+      ret.extend( s.block( orelse ) )
+    ret.append( "}" )
+    return ret
+
+  def visit_For( s, node ):
+    if not hasattr( node.step, '_value' ):
+      raise CSimError( s.component, "the step of a for loop has to be a constant" )
+    var  = f"lv_{node.var.name}"
+    step = int( node.step._value )
+    cmp  = "<" if step > 0 else ">"
+    ret  = [ f"for ( int64_t {var} = (int64_t){s.val( node.start )}; "
+             f"{var} {cmp} (int64_t){s.val( node.end )}; {var} += {step} ) {{" ]
+    ret.extend( s.block( node.body ) )
+    ret.append( "}" )
+    return ret
+
+  def block( s, stmts ):
+    body = []
+    for stmt in stmts:
+      body.extend( s.visit( stmt ) )
+    return [ "  "+x for x in body ]
+
+  #-----------------------------------------------------------------------
+  # Signal references
+  #-----------------------------------------------------------------------
+
+  def nbits( s, node ):
+    dtype = node.Type.get_dtype()
+    if not isinstance( dtype, (rdt.Vector, rdt.Bool, rdt.Struct) ):
+      raise CSimError( s.component, f"{dtype} values are not supported" )
+    nbits = dtype.get_length()
+    if nbits > MAX_NBITS:
+      raise CSimError( s.component, f"values wider than {MAX_NBITS} bits are not supported" )
+    return nbits
+
+  def is_bit_select( s, node ):
+    # Index/Slice on a vector instead of an array
+    if isinstance( node, bir.Slice ):
+      return True
+    Type = node.value.Type
+    return isinstance( Type, rt.Signal ) and not Type.is_packed_indexable()
+
+  def lower( s, node ):
+    # The lowest bit of a bit selection/slice, int if it is constant
+    if isinstance( node, bir.Index ):
+      idx = node.idx
+    elif node.base is not None and node.size:
+      idx = node.base
+    else:
+      idx = node.lower
+    if hasattr( idx, '_value' ):
+      return int( idx._value )
+    return s.val( idx )
+
+  def resolve( s, node ):
+    """Return the flattened list of objects `node` may refer to and the
+    ( C index expression, length ) of every variable array index."""
+    if isinstance( node, bir.Base ):
+      if node.base is not s.component:
+        raise CSimError( s.component, f"{node.base} is not the host component" )
+      return [ node.base ], []
+
+    if isinstance( node, bir.Attribute ):
+      objs, dims = s.resolve( node.value )
+      return [ getattr( x, node.attr ) for x in objs ], dims
+
+    if isinstance( node, bir.Index ) and not s.is_bit_select( node ):
+      objs, dims = s.resolve( node.value )
+      if hasattr( node.idx, '_value' ):
+        i = int( node.idx._value )
+        return [ x[i] for x in objs ], dims
+      n = len( objs[0] )
+      return [ x[i] for x in objs for i in range(n) ], dims + [ ( s.val( node.idx ), n ) ]
+
+    raise CSimError( s.component, f"{node.__class__.__name__} does not refer to a signal" )
+
+  def flat_index( s, dims ):
+    # Row-major index into the resolved objects, or the length of the
+    # table if any index is out of range
+    flat, total, guards = "", 1, []
+    for idx, n in dims:
+      flat = idx if not flat else f"({flat}) * {n} + {idx}"
+      guards.append( f"{idx} < {n}" )
+      total *= n
+    return f"(({' && '.join( guards )}) ? {flat} : {total})"
+
+  def ref( s, node ):
+    if isinstance( node, (bir.Index, bir.Slice) ) and s.is_bit_select( node ):
+      base  = s.ref( node.value )
+      lower = s.lower( node )
+      nbits = s.nbits( node )
+      if isinstance( base.lsb, int ) and isinstance( lower, int ):
+        lsb = base.lsb + lower
+      elif base.lsb == 0:
+        lsb = lower
+      else:
+        lsb = f"({base.lsb} + {lower})"
+      return CRef( base.idx, lsb, nbits, base.width, base.slots )
+
+    objs, dims = s.resolve( node )
+    locs = [ s.storage.loc( x ) for x in objs ]
+    if len( { (lsb, nbits, width) for _, lsb, nbits, width in locs } ) != 1:
+      raise CSimError( s.component, "array elements have different layouts" )
+    _, lsb, nbits, width = locs[0]
+    slots = [ x[0] for x in locs ]
+
+    if not dims:
+      return CRef( str(slots[0]), lsb, nbits, width, slots )
+
+    table = s.storage.table( slots )
+    return CRef( f"{table}[{s.flat_index( dims )}]", lsb, nbits, width, slots )
+
+  #-----------------------------------------------------------------------
+  # Expressions
+  #-----------------------------------------------------------------------
+  # val returns a uint64_t C expression in a string.
+
+  def val_as( s, node, nbits ):
+    # Value that is assigned to an nbits-wide signal. Python ints are
+    # truncated by @= and <<=.
+    if hasattr( node, '_value' ):
+      return literal( int( node._value ) & mask( nbits ) )
+    value = s.val( node )
+    if node._is_explicit or nbits == MAX_NBITS:
+      return value
+    return f"({value} & {literal(mask(nbits))})"
+
+  def cond( s, node ):
+    if isinstance( node, bir.Compare ) and not hasattr( node, '_value' ):
+      return s.compare( node )
+    return s.val( node )
+
+  def val( s, node ):
+    if hasattr( node, '_value' ):
+      value = int( node._value )
+      if node._is_explicit:
+        value &= mask( s.nbits( node ) )
+      return literal( value )
+
+    method = getattr( s, 'val_' + node.__class__.__name__, None )
+    if method is None:
+      raise CSimError( s.component, f"{node.__class__.__name__} is not supported" )
+    return method( node )
+
+  def val_signal( s, node ):
+    if isinstance( node.Type, rt.Const ):
+      # Constant attribute that is not folded by the type checker
+      objs, dims = s.resolve( node )
+      values = [ get_const_value( x ) for x in objs ]
+      if node._is_explicit:
+        values = [ x & mask( s.nbits( node ) ) for x in values ]
+      if not dims:
+        return literal( values[0] )
+      return f"{s.storage.const_table( values )}[{s.flat_index( dims )}]"
+    s.nbits( node )
+    return read_ref( s.ref( node ) )
+
+  def val_Attribute( s, node ):
+    dtype = node.value.Type.get_dtype() if hasattr( node.value.Type, 'get_dtype' ) else None
+    if isinstance( dtype, rdt.Struct ) and not s.is_ref( node.value ):
+      # Field of a struct value that is not a signal, e.g., a temporary
+      lsb, nbits = get_field_layout( dtype.get_class(), node.attr )
+      return f"(({s.val( node.value )} >> {lsb}) & {literal(mask(nbits))})"
+    return s.val_signal( node )
+
+  def is_ref( s, node ):
+    if isinstance( node, bir.Base ):
+      return True
+    if isinstance( node, (bir.Attribute, bir.Index, bir.Slice) ):
+      return s.is_ref( node.value )
+    return False
+
+  def val_Index( s, node ):
+    if not s.is_bit_select( node ):
+      return s.val_signal( node )
+    if s.is_ref( node.value ):
+      return read_ref( s.ref( node ) )
+    value = s.val( node.value )
+    lower = s.lower( node )
+    if isinstance( lower, int ):
+      return f"(({value} >> {lower}) & 1ULL)"
+    return f"(({lower} < {s.nbits( node.value )}) ? (({value} >> {lower}) & 1ULL) : 0)"
+
+  def val_Slice( s, node ):
+    if s.is_ref( node.value ):
+      return read_ref( s.ref( node ) )
+    nbits = s.nbits( node )
+    value = s.val( node.value )
+    lower = s.lower( node )
+    if isinstance( lower, int ):
+      return f"(({value} >> {lower}) & {literal(mask(nbits))})"
+    return f"(({lower} < {s.nbits( node.value )}) ? (({value} >> {lower}) & {literal(mask(nbits))}) : 0)"
+
+  def val_TmpVar( s, node ):
+    return f"tmp_{node.name}"
+
+  def val_LoopVar( s, node ):
+    return f"((uint64_t)lv_{node.name})"
+
+  def val_Concat( s, node ):
+    terms, offset = [], 0
+    for child in reversed( node.values ):
+      value = s.val_as( child, s.nbits( child ) )
+      terms.append( value if offset == 0 else f"({value} << {offset})" )
+      offset += s.nbits( child )
+    if offset > MAX_NBITS:
+      raise CSimError( s.component, f"values wider than {MAX_NBITS} bits are not supported" )
+    return f"({' | '.join( reversed( terms ) )})"
+
+  def val_StructInst( s, node ):
+    cls = node.Type.get_dtype().get_class()
+    terms = []
+    for field, value in zip( cls.__bitstruct_fields__, node.values ):
+      lsb, nbits = get_field_layout( cls, field )
+      value = s.val_as( value, nbits )
+      terms.append( value if lsb == 0 else f"({value} << {lsb})" )
+    return f"({' | '.join( terms )})"
+
+  def val_ZeroExt( s, node ):
+    return s.val_as( node.value, s.nbits( node.value ) )
+
+  def val_SignExt( s, node ):
+    nbits, old_nbits = node.nbits, s.nbits( node.value )
+    if nbits > MAX_NBITS:
+      raise CSimError( s.component, f"values wider than {MAX_NBITS} bits are not supported" )
+    value = s.val_as( node.value, old_nbits )
+    if nbits == old_nbits:
+      return value
+    sign = 1 << (old_nbits - 1)
+    return f"((({value} ^ {literal(sign)}) - {literal(sign)}) & {literal(mask(nbits))})"
+
+  def val_Truncate( s, node ):
+    value = s.val( node.value )
+    if node.value._is_explicit and node.nbits == s.nbits( node.value ):
+      return value
+    return f"({value} & {literal(mask(node.nbits))})"
+
+  def val_SizeCast( s, node ):
+    # Bits16( x ) rejects Bits of other widths but casts ints
+    if node.nbits > MAX_NBITS:
+      raise CSimError( s.component, f"values wider than {MAX_NBITS} bits are not supported" )
+    value = s.val( node.value )
+    if isinstance( node.value.Type.get_dtype(), rdt.Struct ):
+      # Bits64( struct ) zero-extends the packed struct
+      if node.nbits < s.nbits( node.value ):
+        return f"({value} & {literal(mask(node.nbits))})"
+      return value
+    if node.value._is_explicit:
+      if node.nbits != s.nbits( node.value ):
+        raise CSimError( s.component, "size casting Bits to a different width is not supported" )
+      return value
+    return f"({value} & {literal(mask(node.nbits))})"
+
+  def val_Reduce( s, node ):
+    nbits = s.nbits( node.value )
+    value = s.val_as( node.value, nbits )
+    if isinstance( node.op, bir.BitAnd ):
+      return f"((uint64_t)({value} == {literal(mask(nbits))}))"
+    if isinstance( node.op, bir.BitOr ):
+      return f"((uint64_t)({value} != 0))"
+    if isinstance( node.op, bir.BitXor ):
+      return f"((uint64_t)__builtin_parityll( {value} ))"
+    raise CSimError( s.component, f"reduce {node.op.__class__.__name__} is not supported" )
+
+  def val_IfExp( s, node ):
+    return f"(({s.cond( node.cond )}) ? {s.val( node.body )} : {s.val( node.orelse )})"
+
+  def val_UnaryOp( s, node ):
+    value = s.val( node.operand )
+    if not node._is_explicit:
+      op = { bir.Invert: '~', bir.UAdd: '+', bir.USub: '-' }[ type(node.op) ]
+      return f"({op}{value})"
+    # Bits only implements ~
+    if not isinstance( node.op, bir.Invert ):
+      raise CSimError( s.component, f"{node.op.__class__.__name__} on Bits is not supported" )
+    return f"({value} ^ {literal(mask(s.nbits(node)))})"
+
+  _binops = {
+    bir.Add : '+',  bir.Sub : '-',  bir.Mult : '*', bir.Mod : '%',
+    bir.ShiftLeft : '<<', bir.ShiftRightLogic : '>>',
+    bir.BitAnd : '&', bir.BitOr : '|', bir.BitXor : '^',
+  }
+  # Operations that cannot overflow if both operands are in range
+  _binops_in_range = ( bir.Mod, bir.ShiftRightLogic, bir.BitAnd, bir.BitOr, bir.BitXor )
+
+  def val_BinOp( s, node ):
+    op_t  = type( node.op )
+    if op_t not in s._binops:
+      # True division and power of non-constant ints
+      raise CSimError( s.component, f"{op_t.__name__} is not supported" )
+
+    op    = s._binops[ op_t ]
+    left  = s.val( node.left )
+    right = s.val( node.right )
+    const = int( node.right._value ) if hasattr( node.right, '_value' ) else None
+
+    if not node._is_explicit:
+      if op_t in ( bir.ShiftRightLogic, bir.Mod ):
+        return f"((uint64_t)((int64_t){left} {op} (int64_t){right}))"
+      return f"({left} {op} {right})"
+
+    nbits = s.nbits( node )
+    m     = literal( mask( nbits ) )
+
+    if op_t is bir.ShiftLeft:
+      if const is not None:
+        return "0ULL" if const >= nbits else f"(({left} << {const}) & {m})"
+      return f"(({right} < {nbits}) ? (({left} << {right}) & {m}) : 0)"
+
+    if op_t is bir.ShiftRightLogic:
+      if const is not None:
+        ret = "0ULL" if const >= MAX_NBITS else f"({left} >> {const})"
+      else:
+        ret = f"(({right} < {MAX_NBITS}) ? ({left} >> {right}) : 0)"
+      return ret if node.left._is_explicit else f"({ret} & {m})"
+
+    if op_t is bir.Mod and const is None:
+      ret = f"({right} ? ({left} % {right}) : 0)"
+    else:
+      ret = f"({left} {op} {right})"
+
+    if nbits == MAX_NBITS or \
+       ( op_t in s._binops_in_range and node.left._is_explicit and node.right._is_explicit ):
+      return ret
+    return f"({ret} & {m})"
+
+  _cmpops = {
+    bir.Eq : '==', bir.NotEq : '!=', bir.Lt : '<', bir.LtE : '<=', bir.Gt : '>', bir.GtE : '>=',
+  }
+
+  def compare( s, node ):
+    left, right = s.val( node.left ), s.val( node.right )
+    if not node.left._is_explicit and not node.right._is_explicit:
+      left, right = f"(int64_t){left}", f"(int64_t){right}"
+    return f"{left} {s._cmpops[ type(node.op) ]} {right}"
+
+  def val_Compare( s, node ):
+    return f"((uint64_t)({s.compare( node )}))"
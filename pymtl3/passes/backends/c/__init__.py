@@ -0,0 +1 @@
+from .CSimPass import CSimPass
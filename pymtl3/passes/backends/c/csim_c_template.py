@@ -0,0 +1,35 @@
+template = \
+'''//========================================================================
+// {name}.c
+//========================================================================
+// Cycle-based C simulator of {top} generated by CSimPass.
+//
+// v[0:{nslots}] holds the current value of every slot and
+// v[{nslots}:{nslots2}] the values written by <<= in this cycle.
+
+#include <stdint.h>
+
+#define NSLOTS {nslots}
+
+// Slot indices of dynamically indexed arrays
+{tables}
+
+// Update blocks
+{upblks}
+
+void {name}_comb_eval( uint64_t * v )
+{{
+  uint64_t * n = v + NSLOTS;
+  (void) n;
+{comb_eval}
+}}
+
+void {name}_seq_eval( uint64_t * v )
+{{
+  uint64_t * n = v + NSLOTS;
+{seq_eval}
+
+  // Commit the values written by <<=
+{commit}
+}}
+'''
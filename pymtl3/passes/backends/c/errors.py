@@ -0,0 +1,12 @@
+#=========================================================================
+# errors.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Exception classes for the C simulation backend."""
+
+
+class CSimError( Exception ):
+  """Error while generating or building the C simulator."""
+  def __init__( self, obj, msg ):
+    return super().__init__(
+      f"\nError trying to simulate {obj} in C:\n- {msg}" )
@@ -0,0 +1,285 @@
+#=========================================================================
+# CSimPass_test.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Test the C simulation backend."""
+
+import os
+import random
+
+import pytest
+
+from pymtl3.datatypes import *
+from pymtl3.dsl import Component, InPort, OutPort, Wire, update, update_ff
+from pymtl3.passes.backends.verilog.translation.behavioral.test.VBehavioralTranslatorL1_test import (
+    test_verilog_behavioral_L1,
+)
+from pymtl3.passes.backends.verilog.translation.behavioral.test.VBehavioralTranslatorL2_test import (
+    test_verilog_behavioral_L2,
+)
+from pymtl3.passes.backends.verilog.translation.behavioral.test.VBehavioralTranslatorL3_test import (
+    test_verilog_behavioral_L3,
+)
+from pymtl3.passes.backends.verilog.translation.behavioral.test.VBehavioralTranslatorL4_test import (
+    test_verilog_behavioral_L4,
+)
+from pymtl3.passes.backends.verilog.translation.behavioral.test.VBehavioralTranslatorL5_test import (
+    test_verilog_behavioral_L5,
+)
+from pymtl3.passes.backends.verilog.translation.structural.test.VStructuralTranslatorL1_test import (
+    test_verilog_structural_L1,
+)
+from pymtl3.passes.backends.verilog.translation.structural.test.VStructuralTranslatorL2_test import (
+    test_verilog_structural_L2,
+)
+from pymtl3.passes.backends.verilog.translation.structural.test.VStructuralTranslatorL3_test import (
+    test_verilog_structural_L3,
+)
+from pymtl3.passes.backends.verilog.translation.structural.test.VStructuralTranslatorL4_test import (
+    test_verilog_structural_L4,
+)
+from pymtl3.passes.PassGroups import DefaultPassGroup
+from pymtl3.passes.rtlir.util.test_utility import get_parameter
+from pymtl3.passes.sim.GenDAGPass import GenDAGPass
+from pymtl3.passes.sim.PrepareSimPass import PrepareSimPass
+from pymtl3.passes.sim.SimpleSchedulePass import SimpleSchedulePass
+from pymtl3.passes.testcases import (
+    CaseBehavioralArraySubCompArrayStructIfcComp,
+    CaseConnectArrayStructAttrToOutComp,
+    CaseConnectLiteralStructComp,
+    CaseConnectNestedStructPackedArrayComp,
+    CaseNestedStructPackedArrayUpblkComp,
+    CaseStructPackedArrayUpblkComp,
+)
+from pymtl3.stdlib.primitive.arbiters import RoundRobinArbiterEn
+from pymtl3.stdlib.stream.queues import StreamNormalQueue
+
+from .. import CSimPass
+from ..errors import CSimError
+
+# Cases with signals wider than 64 bits
+wide_cases = [
+  CaseStructPackedArrayUpblkComp,
+  CaseNestedStructPackedArrayUpblkComp,
+  CaseConnectLiteralStructComp,
+  CaseConnectArrayStructAttrToOutComp,
+  CaseConnectNestedStructPackedArrayComp,
+]
+
+# Cases that SimpleSchedulePass cannot schedule
+cyclic_cases = [
+  CaseBehavioralArraySubCompArrayStructIfcComp,
+]
+
+def get_cases( *test_funcs ):
+  cases = []
+  for func in test_funcs:
+    for param in get_parameter( 'case', func ):
+      case = getattr( param, 'values', [ param ] )[0]
+      # The test modules extend the cases with their own attributes
+      if case.__name__ not in { x.__name__ for x in wide_cases + cyclic_cases }:
+        cases.append( case )
+  return cases
+
+@pytest.fixture( autouse=True )
+def build_dir( tmpdir, monkeypatch ):
+  monkeypatch.chdir( tmpdir )
+
+def apply_csim( m ):
+  m.elaborate()
+  m.apply( GenDAGPass() )
+  m.apply( SimpleSchedulePass( order='locality' ) )
+  m.apply( CSimPass() )
+  m.apply( PrepareSimPass( print_line_trace=False ) )
+
+def run_test( case ):
+  m = case.DUT()
+  apply_csim( m )
+  m.sim_reset()
+  for tv in case.TV:
+    case.TV_IN( m, tv )
+    m.sim_eval_combinational()
+    case.TV_OUT( m, tv )
+    m.sim_tick()
+
+@pytest.mark.parametrize(
+  'case', get_cases( test_verilog_behavioral_L1, test_verilog_behavioral_L2,
+                     test_verilog_behavioral_L3, test_verilog_behavioral_L4,
+                     test_verilog_behavioral_L5 )
+)
+def test_csim_behavioral( case ):
+  run_test( case )
+
+@pytest.mark.parametrize(
+  'case', get_cases( test_verilog_structural_L1, test_verilog_structural_L2,
+                     test_verilog_structural_L3, test_verilog_structural_L4 )
+)
+def test_csim_structural( case ):
+  run_test( case )
+
+@pytest.mark.parametrize( 'case', wide_cases )
+def test_csim_wide_signals( case ):
+  with pytest.raises( CSimError, match="wider than 64 bits" ):
+    apply_csim( case.DUT() )
+
+#-------------------------------------------------------------------------
+# Compare against the Python simulation
+#-------------------------------------------------------------------------
+
+@bitstruct
+class Point:
+  x: Bits8
+  y: Bits8
+  z: [ Bits4, Bits4 ]
+
+class Triple( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.out //= lambda: s.in_ * 3
+
+class Mixed( Component ):
+  def construct( s ):
+    s.a    = InPort( Bits32 )
+    s.b    = InPort( Bits32 )
+    s.sel  = InPort( Bits3 )
+    s.p    = InPort( Point )
+    s.idx  = InPort( Bits2 )
+
+    s.o1   = OutPort( Bits32 )
+    s.o2   = OutPort( Bits64 )
+    s.o3   = OutPort( Bits1 )
+    s.o4   = OutPort( Bits8 )
+    s.q    = OutPort( Point )
+    s.r    = OutPort( Bits32 )
+    s.hi   = OutPort( Bits4 )
+    s.cnt  = Wire( Bits8 )
+    s.subs = [ Triple() for _ in range(4) ]
+
+    s.hi //= s.a[28:32]
+
+    @update
+    def up_comb():
+      s.o1 @= 0
+      for i in range(4):
+        s.o1[i*8:i*8+8] @= s.a[(3-i)*8:(3-i)*8+8] + s.b[i*8:i*8+8]
+      s.o1[zext(s.sel, 5)] @= s.a[zext(s.sel, 5)] ^ 1
+      tmp = s.a - s.b
+      s.o2 @= concat( tmp[0:16], sext( s.b[0:8], 16 ), zext( s.sel, 32 ) )
+      s.o3 @= reduce_xor( s.a ) | reduce_and( s.b[0:3] ) | ( s.a < s.b )
+      s.o4 @= s.subs[s.idx].out - s.p.y * zext( s.p.z[1], 8 ) + ( s.a[0:8] << zext( s.sel, 8 ) )
+
+    @update
+    def up_subs():
+      for i in range(4):
+        s.subs[i].in_ @= s.p.x + i
+
+    @update
+    def up_fields():
+      s.q.x    @= s.p.y
+      s.q.y    @= s.p.x + 1
+      s.q.z[0] @= s.p.z[1]
+      s.q.z[1] @= s.p.z[0] if s.sel == 2 else s.cnt[0:4]
+
+    @update_ff
+    def up_regs():
+      if s.reset:
+        s.r   <<= 0
+        s.cnt <<= 0
+      elif s.sel == 1:
+        s.r   <<= s.a
+        s.cnt <<= s.cnt + 1
+      elif s.sel > 5:
+        s.r   <<= s.r - 1
+      else:
+        s.r   <<= s.r + s.o1
+
+class PointSink( Component ):
+  def construct( s ):
+    s.i = InPort( Point )
+    s.o = OutPort( Bits8 )
+
+    @update
+    def up_sink():
+      s.o @= s.i.x - s.i.y + zext( s.i.z[0], 8 )
+
+class FieldConnects( Component ):
+  def construct( s ):
+    s.a   = InPort( Bits8 )
+    s.b   = InPort( Bits8 )
+    s.c   = InPort( Bits4 )
+    s.q   = OutPort( Point )
+    s.out = OutPort( Bits8 )
+    s.w   = Wire( Point )
+    s.sub = PointSink()
+
+    # Connections to plain and list fields of bitstruct signals
+    s.sub.i.x    //= s.a
+    s.sub.i.y    //= s.b
+    s.sub.i.z[0] //= s.c
+    s.sub.i.z[1] //= s.a[4:8]
+    s.w.x        //= s.sub.o
+    s.w.y        //= s.b
+    s.w.z[0]     //= s.a[0:4]
+    s.w.z[1]     //= s.c
+    s.q          //= s.w
+    s.out        //= s.w.x
+
+def get_ports( m, cls ):
+  return sorted( m.get_all_object_filter(
+    lambda x: isinstance( x, cls ) and x.is_top_level_signal() and
+              x.get_host_component() is m and x is not m.clk and x is not m.reset ), key=repr )
+
+def simulate( m, csim, ncycles=200 ):
+  if csim:
+    apply_csim( m )
+  else:
+    m.elaborate()
+    m.apply( DefaultPassGroup() )
+  m.sim_reset()
+
+  get = lambda x: eval( 'm' + repr(x)[1:], { 'm': m } )
+  inports, outports = get_ports( m, InPort ), get_ports( m, OutPort )
+
+  rng = random.Random( 0xdeadbeef )
+  trace = []
+  for _ in range( ncycles ):
+    for x in inports:
+      v = get( x )
+      bits = Bits( v.nbits, rng.getrandbits( v.nbits ) )
+      v @= bits if isinstance( v, Bits ) else type(v).from_bits( bits )
+    m.sim_eval_combinational()
+    trace.append( [ get( x ).clone() for x in outports ] )
+    m.sim_tick()
+  return trace
+
+@pytest.mark.parametrize( 'cls, args', [
+  ( Mixed, () ),
+  ( FieldConnects, () ),
+  ( RoundRobinArbiterEn, ( 8, ) ),
+  ( StreamNormalQueue, ( Bits8, 3 ) ),
+])
+def test_csim_matches_python( cls, args ):
+  assert simulate( cls( *args ), True ) == simulate( cls( *args ), False )
+
+def test_csim_build_cache():
+  m = Mixed()
+  apply_csim( m )
+  lib_file = m.get_metadata( CSimPass.shared_lib_file )
+  mtime = os.path.getmtime( lib_file )
+  assert os.path.exists( m.get_metadata( CSimPass.c_src_file ) )
+
+  # The same design is not compiled again
+  m2 = Mixed()
+  apply_csim( m2 )
+  assert m2.get_metadata( CSimPass.shared_lib_file ) == lib_file
+  assert os.path.getmtime( lib_file ) == mtime
+
+def test_csim_after_prepare_sim():
+  m = Mixed()
+  m.elaborate()
+  m.apply( GenDAGPass() )
+  m.apply( SimpleSchedulePass() )
+  m.apply( PrepareSimPass( print_line_trace=False ) )
+  with pytest.raises( CSimError, match="before PrepareSimPass" ):
+    m.apply( CSimPass() )
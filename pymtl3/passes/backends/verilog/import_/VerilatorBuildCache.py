@@ -0,0 +1,143 @@
+#=========================================================================
+# VerilatorBuildCache.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Global content-addressed cache of Verilator-compiled shared libraries.
+
+The local cache of the import pass only works if the previous build
+sits in the current working directory. This cache is shared by every
+working directory (pytest tmpdirs, CI jobs, checkouts) on the machine.
+
+It is disabled by default. Set ``PYMTL_VERILATOR_CACHE`` to a directory
+to enable it, or to 1 to use ``~/.cache/pymtl3/verilator``. The total
+size is bounded by ``PYMTL_VERILATOR_CACHE_MAX_MB`` (default 4096) and
+the least recently used entries are evicted first.
+
+Each entry is a shared library keyed by the hash of the lean Verilog,
+the serialized import configuration, the generated C wrapper, the
+extra C sources, and the versions of Verilator and the C++ compiler.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+_env = os.getenv( "PYMTL_VERILATOR_CACHE" )
+
+if not _env or _env == "0":
+  cache_dir = None
+elif _env == "1":
+  cache_dir = os.path.join( os.path.expanduser("~"), ".cache", "pymtl3", "verilator" )
+else:
+  cache_dir = os.path.abspath( os.path.expanduser( _env ) )
+
+max_nbytes = int( os.getenv( "PYMTL_VERILATOR_CACHE_MAX_MB", "4096" ) ) << 20
+
+@functools.lru_cache()
+def _get_tool_version( cmd ):
+  try:
+    return subprocess.check_output( cmd, stderr=subprocess.STDOUT, shell=True,
+                                    universal_newlines=True ).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def _hash_file( h, path ):
+  try:
+    with open( path, 'rb' ) as fd:
+      h.update( fd.read() )
+  except OSError:
+    h.update( f"<missing {path}>".encode() )
+
+def get_key( pass_name, ip_cfg, cfg_d ):
+  """Return the cache key of the shared library of ``ip_cfg``, or None if
+  the cache is disabled or the tool versions cannot be determined. The C
+  wrapper must have been generated."""
+  if cache_dir is None:
+    return None
+
+  vl_version = _get_tool_version( "verilator --version" )
+  cc_version = _get_tool_version( "g++ --version" )
+  if vl_version is None or cc_version is None:
+    return None
+
+  h = hashlib.blake2b()
+  for x in ( pass_name, ip_cfg.translated_top_module, ip_cfg.verilog_hash,
+             json.dumps( cfg_d, sort_keys=True, default=repr ),
+             ip_cfg.fast, ip_cfg.create_vl_cmd(), vl_version, cc_version ):
+    h.update( repr(x).encode() )
+    h.update( b'\0' )
+
+  _hash_file( h, ip_cfg.get_c_wrapper_path() )
+  for src in ip_cfg.c_srcs:
+    _hash_file( h, os.path.expanduser( os.path.expandvars( src ) ) )
+
+  return h.hexdigest()
+
+def _entry_path( key ):
+  return os.path.join( cache_dir, key + ".so" )
+
+def fetch( key, dst ):
+  """Copy the cached shared library to ``dst``. Return True on a hit."""
+  if key is None:
+    return False
+
+  src = _entry_path( key )
+  try:
+    # Bump the access time used by LRU eviction
+    os.utime( src )
+    fd, tmp = tempfile.mkstemp( dir=os.path.dirname( os.path.abspath( dst ) ), suffix=".so.tmp" )
+    os.close( fd )
+    shutil.copyfile( src, tmp )
+    os.chmod( tmp, 0o755 )
+    os.replace( tmp, dst )
+    return True
+  except OSError:
+    return False
+
+def store( key, src ):
+  """Put the shared library ``src`` into the cache and evict the least
+  recently used entries if the cache grows over the size limit."""
+  if key is None:
+    return
+
+  # Write to a temporary file and rename so that concurrent builds never
+  # observe a partially written entry
+  try:
+    os.makedirs( cache_dir, exist_ok=True )
+    fd, tmp = tempfile.mkstemp( dir=cache_dir, suffix=".tmp" )
+    os.close( fd )
+    try:
+      shutil.copyfile( src, tmp )
+      os.replace( tmp, _entry_path( key ) )
+    except OSError:
+      os.unlink( tmp )
+      return
+  except OSError:
+    return
+
+  evict( max_nbytes )
+
+def evict( limit ):
+  try:
+    entries = []
+    for name in os.listdir( cache_dir ):
+      if name.endswith( ".so" ):
+        path = os.path.join( cache_dir, name )
+        st = os.stat( path )
+        entries.append( ( st.st_mtime, st.st_size, path ) )
+  except OSError:
+    return
+
+  total = sum( x[1] for x in entries )
+  for _, size, path in sorted( entries ):
+    if total <= limit:
+      break
+    try:
+      os.unlink( path )
+    except OSError:
+      pass
+    total -= size
@@ -114,9 +114,41 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # enable signal.
     "vl_trace_on_demand_portname" : "",
 
+    # Marshal all ports through one contiguous buffer that is exposed to
+    # Python as a memoryview. Inputs are only copied into the buffer when
+    # their value changes and outputs are only read back when they changed
+    # during the last evaluation.
+    "vl_port_buffer" : False,
+
+    # --savable
+    # Generate the serialization functions of the verilated model so that
+    # its state can be saved in simulation checkpoints
+    "vl_savable" : False,
+
+    # --threads
+    # Number of threads of the verilated model; 1 for a single-threaded
+    # model. The thread pool is created with the model and destroyed
+    # when the imported component is finalized.
+    "vl_threads" : 1,
+
+    # --threads-dpi
+    # Which DPI functions are called from the model threads; one of
+    # ['none', 'pure', 'all'] or "" to use the Verilator default
+    "vl_threads_dpi" : "",
+
+    # --output-split and --output-split-cfuncs
+    # Split the generated C++ into files of roughly this many statements
+    # so that they can be compiled in parallel; 0 to disable
+    "vl_output_split" : 0,
+
     # C-compilation options
     # These options will be passed to the C compiler to create a shared lib.
 
+    # Number of parallel compile jobs. 1 compiles everything with one
+    # compiler invocation. Otherwise each translation unit is compiled
+    # into an object with `make -j`; 0 to use all CPUs
+    "cc_jobs" : 1,
+
     # Additional flags to be passed to the C compiler.
     # By default, CC is called with `-O0 -fPIC -shared`.
     # "" to disable this option
@@ -147,7 +179,7 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
   Checkers = {
     ("enable", "verbose", "vl_enable_assert", "vl_line_trace", "vl_W_lint", "vl_W_style",
      "vl_W_fatal", "vl_trace", "vl_coverage", "vl_line_coverage", "vl_toggle_coverage",
-     "vl_trace_on_demand", "vl_trace_struct"):
+     "vl_trace_on_demand", "vl_trace_struct", "vl_port_buffer", "vl_savable"):
       Checker( lambda v: isinstance(v, bool), "expects a boolean" ),
 
     ("c_flags", "ld_flags", "ld_libs", "vl_trace_filename", "vl_trace_on_demand_portname", "vl_trace_format"):
@@ -169,6 +201,14 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
 
     "vl_mk_dir": Checker( lambda v: isinstance(v, str), "expects a path to directory" ),
 
+    ("vl_output_split", "cc_jobs"): Checker( lambda v: isinstance(v, int) and v >= 0,
+                                             "expects a non-negative integer" ),
+
+    "vl_threads": Checker( lambda v: isinstance(v, int) and v >= 1, "expects a positive integer" ),
+
+    "vl_threads_dpi": Checker( lambda v: v in ["", "none", "pure", "all"],
+                               "expects one of ['', 'none', 'pure', 'all']" ),
+
     "c_include_path": Checker( lambda v: isinstance(v, list) and all(os.path.isdir(expand(p)) for p in v),
                                 "expects a list of paths to directories" ),
 
@@ -278,12 +318,19 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     opt_level   = "-O3"
     loop_unroll = "--unroll-count 1000000"
     stmt_unroll = "--unroll-stmts 1000000"
-    thread      = "--threads 1"
+    thread      = f"--threads {s.vl_threads}"
+    if s.vl_threads_dpi:
+      thread   += f" --threads-dpi {s.vl_threads_dpi}"
+    if s.vl_output_split:
+      split     = f"--output-split {s.vl_output_split} --output-split-cfuncs {s.vl_output_split}"
+    else:
+      split     = ""
     if (s.vl_trace_format == "vcd") or (s.vl_trace_format == "Vcd"):
       trace       = "--trace" if s.vl_trace else ""
     else:
       trace       = "--trace-fst" if s.vl_trace else ""
     trace_struct = "-trace-structs" if s.vl_trace_struct else ""
+    savable     = "--savable" if s.vl_savable else ""
     coverage    = "--coverage" if s.vl_coverage else ""
     line_cov    = "--coverage-line" if s.vl_line_coverage else ""
     toggle_cov  = "--coverage-toggle" if s.vl_toggle_coverage else ""
@@ -292,7 +339,7 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     all_opts = [
       top_module, mk_dir, include, en_assert, opt_level, loop_unroll,
       # stmt_unroll, trace, warnings, flist, src, coverage,
-      stmt_unroll, thread, trace, trace_struct, warnings, src, vlibs, coverage,
+      stmt_unroll, thread, split, trace, trace_struct, savable, warnings, src, vlibs, coverage,
       line_cov, toggle_cov,
     ]
     return f"verilator --cc {' '.join(opt for opt in all_opts if opt)}"
@@ -340,15 +387,26 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
 
     c_flags += f" -fPIC -shared -std=c++14 -pthread"
 
+    # Verilator 4 only builds the runtime of multithreaded models with
+    # VL_THREADED; Verilator 5 always does
+    if s.vl_threads > 1:
+      c_flags += " -DVL_THREADED"
+
     c_include_path = " ".join("-I"+p for p in s._get_all_includes() if p)
     out_file = s.get_shared_lib_path()
-    c_src_files = " ".join(s._get_c_src_files())
     ld_flags = expand(s.ld_flags)
     ld_libs = s.ld_libs
     coverage = "-DVM_COVERAGE" if s.vl_coverage or \
                                   s.vl_line_coverage or \
                                   s.vl_toggle_coverage else ""
 
+    if s.cc_jobs != 1:
+      makefile = s._create_cc_makefile( c_flags, c_include_path, ld_flags, ld_libs, coverage )
+      jobs = s.cc_jobs or os.cpu_count() or 1
+      return f"make -j {jobs} -f {makefile} {out_file}"
+
+    c_src_files = " ".join(s._get_c_src_files())
+
     return f"g++ {c_flags} {c_include_path} {ld_flags}"\
            f" -o {out_file} {c_src_files} {ld_libs} {coverage}"
 
@@ -439,6 +497,47 @@ $PYMTL_VERILATOR_INCLUDE_DIR is set or `pkg-config` has been configured properly
     cxx_inputs += objs
     return cxx_inputs
 
+  def _create_cc_makefile( s, c_flags, c_include_path, ld_flags, ld_libs, coverage ):
+    """Write a makefile that compiles every translation unit into its own
+    object under the Verilator make directory and links the shared lib.
+    Return the path to the makefile."""
+    top_module = s.translated_top_module.replace('__', '___05F')
+    vl_mk_dir = s.vl_mk_dir
+    vl_class_mk = f"{vl_mk_dir}/V{top_module}_classes.mk"
+
+    fast = [ expand(x) for x in s.c_srcs ] + [ s.get_c_wrapper_path() ]
+    slow = []
+
+    with open(vl_class_mk) as class_mk:
+      all_lines = class_mk.readlines()
+      fast += s._get_srcs_from_vl_class_mk( all_lines, vl_mk_dir, "VM_CLASSES_FAST" )
+      fast += s._get_srcs_from_vl_class_mk( all_lines, vl_mk_dir, "VM_SUPPORT_FAST" )
+      slow += s._get_srcs_from_vl_class_mk( all_lines, vl_mk_dir, "VM_CLASSES_SLOW" )
+      slow += s._get_srcs_from_vl_class_mk( all_lines, vl_mk_dir, "VM_SUPPORT_SLOW" )
+      fast += s._compile_vl_srcs_from_vl_class_mk( all_lines, s.vl_include_dir, "VM_GLOBAL_FAST" )
+      fast += s._compile_vl_srcs_from_vl_class_mk( all_lines, s.vl_include_dir, "VM_GLOBAL_SLOW" )
+
+    # Same as the pickled single-file build: SLOW files are not worth
+    # optimizing even with the fast option
+    rules, objs = [], []
+    for srcs, extra in [ (fast, ""), (slow, " -O0" if s.fast else "") ]:
+      for src in srcs:
+        obj = os.path.join( vl_mk_dir, "pymtl_objs",
+                            os.path.basename(src).replace('.cpp', '') + f"_{len(objs)}.o" )
+        objs.append( obj )
+        rules.append( f"{obj}: {src}\n"
+                      f"\t@mkdir -p $(dir $@)\n"
+                      f"\tg++ {c_flags}{extra} {c_include_path} {coverage} -c -o $@ $<\n" )
+
+    out_file = s.get_shared_lib_path()
+    makefile = os.path.join( vl_mk_dir, f"{top_module}_v_pymtl.mk" )
+    with open(makefile, 'w') as out:
+      out.write( f"{out_file}: {' '.join(objs)}\n"
+                 f"\tg++ {c_flags} {ld_flags} -o $@ $^ {ld_libs}\n\n" )
+      out.write( "\n".join( rules ) )
+
+    return makefile
+
   def _get_srcs_from_vl_class_mk( s, all_lines, path, label ):
     """Return all files under `path` directory in `label` section of `mk`."""
     srcs, found = [], False
@@ -15,10 +15,12 @@ import shutil
 import subprocess
 import sys
 import timeit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
 from fasteners import InterProcessLock
 from functools import reduce
 from importlib import reload
-from itertools import cycle
+from itertools import cycle, product
 from textwrap import indent
 
 from pymtl3 import MetadataKey
@@ -41,10 +43,48 @@ from ..util.utility import (
     wrap,
 )
 from ..VerilogPlaceholderPass import VerilogPlaceholderPass
+from . import VerilatorBuildCache
 from .verilator_wrapper_c_template import template as c_template
 from .verilator_wrapper_py_template import template as py_template
 
 
+class ImportJob:
+  """The state of importing one component across the import phases."""
+
+  def __init__( s, m, ph_cfg, ip_cfg, rtype, ports, cached, config_file, cfg_d ):
+    s.m           = m
+    s.ph_cfg      = ph_cfg
+    s.ip_cfg      = ip_cfg
+    s.rtype       = rtype
+    s.ports       = ports
+    s.cached      = cached
+    s.config_file = config_file
+    s.cfg_d       = cfg_d
+    s.port_cdefs  = None
+    s.symbols     = None
+
+class PortLayout:
+  """The layout of the ports exchanged through comb_eval.
+
+  In the port buffer used by ``vl_port_buffer``, every C port element
+  (e.g., ``in_[1]``) has an 8-byte aligned slot as wide as its Verilator
+  storage and one dirty byte per output follows the slots.
+
+  In the traces of ``run_n_cycles``, each cycle has one input record and
+  one output record in which the elements are packed back to back."""
+
+  def __init__( s ):
+    s.slots     = {} # element -> ( offset, nbytes )
+    s.inputs    = {} # input element -> index of its last written value
+    s.outputs   = {} # output element -> offset of its dirty byte
+    s.nbytes    = 0
+    s.nbits     = {} # element -> bitwidth
+    s.trace     = {} # element -> offset in its input/output record
+    s.in_nbytes  = 0
+    s.out_nbytes = 0
+    s.names     = {} # element -> PyMTL port name, set by gen_comb_input/output
+    s.buffered  = False # ports are exchanged through the port buffer
+
 class VerilogVerilatorImportPass( BasePass ):
   """Import an arbitrary SystemVerilog module as a PyMTL component."""
 
@@ -228,6 +268,58 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``""``
   vl_trace_on_demand_portname = MetadataKey(str)
 
+  #: Marshal all ports through one contiguous C buffer exposed as a
+  #: ``memoryview``. Only the ports whose value changed since the last
+  #: evaluation are copied between Python and C.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``False``
+  vl_port_buffer      = MetadataKey(bool)
+
+  #: Generate the serialization functions of the verilated model
+  #: (``--savable``) so that ``sim_checkpoint`` and ``sim_restore`` can
+  #: save and restore its internal state.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``False``
+  vl_savable          = MetadataKey(bool)
+
+  #: Number of threads of the verilated model (``--threads``). The thread
+  #: pool lives as long as the imported component.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  vl_threads          = MetadataKey(int)
+
+  #: Which DPI functions may be called from the model threads
+  #: (``--threads-dpi``). One of ``'none'``, ``'pure'``, ``'all'``, or
+  #: ``''`` to use the Verilator default.
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ``''``
+  vl_threads_dpi      = MetadataKey(str)
+
+  #: Split the Verilator C++ output into files of roughly this many
+  #: statements (``--output-split``). 0 disables splitting.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``0``
+  vl_output_split     = MetadataKey(int)
+
+  #: Number of parallel C++ compile jobs. With more than one job every
+  #: translation unit is compiled into its own object through ``make -j``
+  #: instead of one monolithic compiler invocation. 0 uses all CPUs.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  cc_jobs             = MetadataKey(int)
+
   #: Optional flags to be passed to the C compiler.
   #:
   #: Type: ``str``; input
@@ -263,6 +355,15 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``''``
   ld_libs             = MetadataKey(str)
 
+  #: Maximum number of Verilator builds that run in parallel when several
+  #: components in the hierarchy are imported. Only read from the top
+  #: component. 0 uses all CPUs.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``0``
+  import_jobs         = MetadataKey(int)
+
   # Import pass output pass data
 
   #: An instnace of :class:`VerilatorImportConfigs` containing the parsed options.
@@ -277,7 +378,14 @@ class VerilogVerilatorImportPass( BasePass ):
       raise VerilogImportError( top,
         f"please elaborate design {top} before applying the import pass!" )
 
-    ret = s.traverse_hierarchy( top )
+    ret = None
+    ms = s.traverse_hierarchy( top )
+    for m, imp in zip( ms, s.import_all( ms ) ):
+      if m is top:
+        ret = imp
+      else:
+        s._check( m, top.replace_component_with_obj, m, imp )
+
     if ret is None:
       ret = top
     else:
@@ -285,27 +393,19 @@ class VerilogVerilatorImportPass( BasePass ):
     return ret
 
   def traverse_hierarchy( s, m ):
+    # Return the list of components to be imported
     c = s.__class__
     ph_pass = c.get_placeholder_pass()
     # Import can only be performed on Placeholders
     if m.has_metadata( ph_pass.enable ) and m.get_metadata( ph_pass.enable ):
       m.set_metadata( c.import_config, c.get_import_config()( m ) )
-      return s.do_import( m )
+      return [ m ]
 
     else:
+      ms = []
       for child in m.get_child_components(repr):
-        s.traverse_hierarchy( child )
-
-  def do_import( s, m ):
-    try:
-      imp = s.get_imported_object( m )
-      if m is s.top:
-        return imp
-      else:
-        s.top.replace_component_with_obj( m, imp )
-    except AssertionError as e:
-      msg = '' if e.args[0] is None else e.args[0]
-      raise VerilogImportError( m, msg )
+        ms.extend( s.traverse_hierarchy( child ) )
+      return ms
 
   #-----------------------------------------------------------------------
   # Backend-specific methods
@@ -367,10 +467,68 @@ class VerilogVerilatorImportPass( BasePass ):
     return is_source_cached and is_config_cached, config_file, new_cfg
 
   #-----------------------------------------------------------------------
-  # get_imported_object
+  # import_all
   #-----------------------------------------------------------------------
+  # Return the imported objects of all components in `ms`. Python-side
+  # work happens in the calling thread while the Verilator and C++ builds
+  # of different modules run in a thread pool. Each module has its own
+  # lock, which is released as soon as the shared library and the Python
+  # wrapper of that module are ready, so other processes (e.g.,
+  # pytest-xdist workers) only wait for the modules they also import.
+
+  def import_all( s, ms ):
+    jobs = [ s._check( m, s.prepare_import, m ) for m in ms ]
+
+    # Each verilated module is built at most once even if it is
+    # instantiated multiple times
+    pending = {}
+    for job in jobs:
+      if not job.cached:
+        pending.setdefault( job.ip_cfg.translated_top_module, job )
+
+    # Acquire the locks in a fixed order to avoid deadlocks with other
+    # processes that import an overlapping set of modules. All lock files
+    # live in one directory instead of cluttering the working directory.
+    lock_dir = "_verilog_import_pass_locks"
+    if pending:
+      os.makedirs( lock_dir, exist_ok=True )
+
+    locks = {}
+    try:
+      builds = []
+      for name in sorted( pending ):
+        lock = InterProcessLock( os.path.join( lock_dir, f"{name}.lock" ) )
+        lock.acquire()
+        locks[ name ] = lock
+
+        # The build could have been finished by another process after the
+        # first is_cached check.
+        job = pending[ name ]
+        job.cached, _, _ = s.is_cached( job.m, job.ip_cfg )
+        if job.cached:
+          locks.pop( name ).release()
+        else:
+          s._check( job.m, s.prepare_build, job )
+          builds.append( job )
+
+      # Closing the generator waits for the builds in flight if creating
+      # a wrapper fails, so no lock is released while its module builds
+      with closing( s.run_builds( builds ) ) as built:
+        for job in built:
+          job.symbols = s._check( job.m, s.create_py_wrapper, job.m, job.ph_cfg,
+                                  job.ip_cfg, job.rtype, job.ports, job.port_cdefs )
+          locks.pop( job.ip_cfg.translated_top_module ).release()
+
+    finally:
+      for lock in locks.values():
+        lock.release()
+
+    return [ s._check( job.m, s.finish_import, job ) for job in jobs ]
 
   def get_imported_object( s, m ):
+    return s.import_all( [ m ] )[0]
+
+  def prepare_import( s, m ):
     c = s.__class__
     ph_cfg = m.get_metadata( c.get_placeholder_pass().placeholder_config )
     ip_cfg = m.get_metadata( c.import_config )
@@ -386,44 +544,83 @@ class VerilogVerilatorImportPass( BasePass ):
 
     cached, config_file, cfg_d = s.is_cached( m, ip_cfg )
 
-    if not cached:
-      lock = InterProcessLock("_verilog_import_pass.lock")
-      lock.acquire()
+    return ImportJob( m, ph_cfg, ip_cfg, rtype, ports, cached, config_file, cfg_d )
 
-      # The build could have been finished by another process after the first
-      # is_cached check.
-      cached, _, _ = s.is_cached( m, ip_cfg )
+  def prepare_build( s, job ):
+    # Dump configuration dict to config_file
+    with open( job.config_file, 'w' ) as fd:
+      json.dump( job.cfg_d, fd, indent = 4 )
 
-      if not cached:
-        # Dump configuration dict to config_file
-        with open( config_file, 'w' ) as fd:
-          json.dump( cfg_d, fd, indent = 4 )
+    # The C wrapper doesn't depend on the Verilator output. Generate
+    # it first because it is part of the global build cache key.
+    job.port_cdefs = s.create_verilator_c_wrapper( job.m, job.ph_cfg, job.ip_cfg, job.ports )
 
-        # Build the Verilated model
-        s.create_verilator_model( m, ph_cfg, ip_cfg )
-        port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, ports )
-        s.create_shared_lib( m, ph_cfg, ip_cfg )
-        symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, rtype, ports, port_cdefs )
-
-      lock.release()
+  def build( s, job ):
+    # Verilate and compile `job` into a shared library. This method runs
+    # in a worker thread so it must not touch the component hierarchy.
+    c = s.__class__
+    m, ph_cfg, ip_cfg = job.m, job.ph_cfg, job.ip_cfg
+    cache_key = VerilatorBuildCache.get_key( c.__name__, ip_cfg, job.cfg_d )
 
+    if VerilatorBuildCache.fetch( cache_key, ip_cfg.get_shared_lib_path() ):
+      ip_cfg.vprint(f"{ip_cfg.translated_top_module} is found in the global build cache!", 2)
     else:
-      ip_cfg.vprint(f"{ip_cfg.translated_top_module} is cached!", 2)
+      # Build the Verilated model
+      s.create_verilator_model( m, ph_cfg, ip_cfg )
+      s.create_shared_lib( m, ph_cfg, ip_cfg )
+      VerilatorBuildCache.store( cache_key, ip_cfg.get_shared_lib_path() )
+
+  def run_builds( s, jobs ):
+    # Yield each job as soon as its build has finished
+    if len(jobs) <= 1:
+      for job in jobs:
+        s._check( job.m, s.build, job )
+        yield job
+      return
+
+    c = s.__class__
+    n_workers = 0
+    if s.top.has_metadata( c.import_jobs ):
+      n_workers = s.top.get_metadata( c.import_jobs )
+    if n_workers <= 0:
+      n_workers = os.cpu_count() or 1
+
+    # Verilator and the C++ compiler run as subprocesses that don't hold
+    # the GIL, so threads are enough to overlap the builds. A failure is
+    # reported after the other builds in flight have finished.
+    with ThreadPoolExecutor( max_workers=min( n_workers, len(jobs) ) ) as pool:
+      futures = { pool.submit( s._check, job.m, s.build, job ): job for job in jobs }
+      for future in as_completed( futures ):
+        future.result()
+        yield futures[ future ]
+
+  def finish_import( s, job ):
+    m, ph_cfg, ip_cfg = job.m, job.ph_cfg, job.ip_cfg
 
     # Re-generate the necessary data structure but don't dump to files
     # because they have been cached.
-    if cached:
-      port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, ports, dump=False )
-      symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, rtype, ports, port_cdefs, dump=False )
+    if job.symbols is None:
+      ip_cfg.vprint(f"{ip_cfg.translated_top_module} is cached!", 2)
+      port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, job.ports, dump=False )
+      job.symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, job.rtype, job.ports,
+                                         port_cdefs, dump=False )
 
-    imp = s.import_component( m, ph_cfg, ip_cfg, symbols )
+    imp = s.import_component( m, ph_cfg, ip_cfg, job.symbols )
 
     imp._ip_cfg = ip_cfg
     imp._ph_cfg = ph_cfg
-    imp._ports = ports
+    imp._ports = job.ports
 
     return imp
 
+  def _check( s, m, func, *args ):
+    # Report failed internal assertions as import errors of `m`
+    try:
+      return func( *args )
+    except AssertionError as e:
+      msg = '' if e.args[0] is None else e.args[0]
+      raise VerilogImportError( m, msg )
+
   #-----------------------------------------------------------------------
   # create_verilator_model
   #-----------------------------------------------------------------------
@@ -487,6 +684,8 @@ class VerilogVerilatorImportPass( BasePass ):
     has_clk = int(ph_cfg.has_clk)
     vl_trace_format = ip_cfg.vl_trace_format
     header_file_trace_format = ip_cfg.vl_trace_format.lower()
+    vl_threads = ip_cfg.vl_threads
+    savable = int(ip_cfg.vl_savable)
 
     # On-demand VCD dumping configs
     on_demand_dump_vcd = int(ip_cfg.vl_trace_on_demand)
@@ -515,6 +714,29 @@ class VerilogVerilatorImportPass( BasePass ):
     make_indent( port_inits, 1 )
     port_inits = '\n'.join( port_inits )
 
+    layout = s.gen_port_layout( ports )
+
+    # Generate the copies between the port buffer and the model
+    port_buffer = int(ip_cfg.vl_port_buffer)
+    port_buffer_nbytes = 0
+    port_buffer_copy_in, port_buffer_copy_out = '', ''
+    if port_buffer:
+      port_buffer_nbytes = layout.nbytes
+      copy_in, copy_out = s.gen_port_buffer_copy_c( layout )
+      make_indent( copy_in, 1 )
+      make_indent( copy_out, 1 )
+      port_buffer_copy_in  = '\n'.join( copy_in )
+      port_buffer_copy_out = '\n'.join( copy_out )
+
+    # Generate the copies between the traces of run_n_cycles and the model
+    trace_in_nbytes  = layout.in_nbytes
+    trace_out_nbytes = layout.out_nbytes
+    trace_copy_in, trace_copy_out = s.gen_trace_copy_c( layout )
+    make_indent( trace_copy_in, 2 )
+    make_indent( trace_copy_out, 2 )
+    trace_copy_in  = '\n'.join( trace_copy_in )
+    trace_copy_out = '\n'.join( trace_copy_out )
+
     # Fill in the C wrapper template
     if dump:
       with open( wrapper_name, 'w' ) as output:
@@ -582,9 +804,19 @@ class VerilogVerilatorImportPass( BasePass ):
     symbols, port_defs = s.gen_signal_decl_py( rtype )
     make_indent( port_defs, 2 )
 
+    # Port layout. This has to be set up before generating the comb
+    # blocks because the port buffer changes how ports are written and
+    # read.
+    layout = s.gen_port_layout( ports )
+    layout.buffered = bool(ip_cfg.vl_port_buffer)
+    port_buffer_init = s.gen_port_buffer_init_py( layout )
+
     # Set upblk inputs and outputs
-    set_comb_input, structs_input   = s.gen_comb_input( ports, symbols )
-    set_comb_output, structs_output = s.gen_comb_output( ports, symbols )
+    set_comb_input, structs_input   = s.gen_comb_input( ports, symbols, layout )
+    set_comb_output, structs_output = s.gen_comb_output( ports, symbols, layout )
+
+    # Inputs and outputs of run_n_cycles
+    trace_inputs, trace_outputs = s.gen_trace_ports_py( layout )
     make_indent( structs_input, 2 )
     make_indent( structs_output, 2 )
     make_indent( set_comb_input, 3 )
@@ -602,6 +834,15 @@ class VerilogVerilatorImportPass( BasePass ):
     else:
       external_trace_c_def = ''
 
+    # Checkpoint function definitions
+    if ip_cfg.vl_savable:
+      save_c_def = '\n'.join([
+        f'void V{ip_cfg.translated_top_module}_save_model( V{ip_cfg.translated_top_module}_t *, const char * );',
+        f'      void V{ip_cfg.translated_top_module}_restore_model( V{ip_cfg.translated_top_module}_t *, const char * );',
+      ])
+    else:
+      save_c_def = ''
+
     # Fill in the python wrapper template
     if dump:
       with open( wrapper_name, 'w' ) as output:
@@ -624,7 +865,14 @@ class VerilogVerilatorImportPass( BasePass ):
           vl_trace_filename     = ip_cfg.vl_trace_filename,
           external_trace        = int(ip_cfg.vl_line_trace),
           trace_c_def           = external_trace_c_def,
+          save_c_def            = save_c_def,
+          savable               = int(ip_cfg.vl_savable),
           vl_trace_format       = ip_cfg.vl_trace_format.lower(),
+          port_buffer_init      = port_buffer_init,
+          trace_in_nbytes       = layout.in_nbytes,
+          trace_out_nbytes      = layout.out_nbytes,
+          trace_inputs          = trace_inputs,
+          trace_outputs         = trace_outputs,
         )
         output.write( py_wrapper )
 
@@ -691,7 +939,8 @@ class VerilogVerilatorImportPass( BasePass ):
       'vl_W_lint', 'vl_W_style', 'vl_W_fatal', 'vl_Wno_list',
       'vl_xinit', 'vl_trace', 'vl_trace_format', 'vl_trace_struct',
       'vl_trace_timescale', 'vl_trace_cycle_time',
-      'vl_trace_on_demand', 'vl_trace_on_demand_portname',
+      'vl_trace_on_demand', 'vl_trace_on_demand_portname', 'vl_port_buffer',
+      'vl_savable', 'vl_threads', 'vl_threads_dpi', 'vl_output_split',
       'c_flags', 'c_include_path', 'c_srcs',
       'ld_flags', 'ld_libs',
     ]
@@ -766,6 +1015,107 @@ m->{name}{sub} = {deference}model->{name}{sub};
 
     return ret
 
+  #-------------------------------------------------------------------------
+  # gen_port_layout
+  #-------------------------------------------------------------------------
+  # Return the PortLayout of all ports exchanged through comb_eval.
+  # The clk input is driven by seq_eval and is not part of the layout.
+
+  def gen_port_layout( s, ports ):
+    layout = PortLayout()
+    offset = 0
+    for pnames, v_name, port, _ in ports:
+      direction = s._get_direction( port )
+      if not v_name or ( direction == 'InPort' and pnames[0] == 'clk' ):
+        continue
+      name   = s._verilator_name( v_name )
+      nbits  = s._get_c_nbits( port )
+      nbytes = s._get_c_nbytes( nbits )
+      for idx in product( *[ range(n) for n in s._get_c_n_dim( port ) ] ):
+        elem = name + "".join( f"[{i}]" for i in idx )
+        layout.slots[ elem ] = ( offset, nbytes )
+        layout.nbits[ elem ] = nbits
+        if direction == 'InPort':
+          layout.inputs[ elem ] = len(layout.inputs)
+          layout.trace[ elem ] = layout.in_nbytes
+          layout.in_nbytes += nbytes
+        else:
+          layout.outputs[ elem ] = None
+          layout.trace[ elem ] = layout.out_nbytes
+          layout.out_nbytes += nbytes
+        offset += ( nbytes + 7 ) // 8 * 8
+
+    for elem in layout.outputs:
+      layout.outputs[ elem ] = offset
+      offset += 1
+
+    layout.nbytes = offset
+    return layout
+
+  #-------------------------------------------------------------------------
+  # gen_port_buffer_copy_c
+  #-------------------------------------------------------------------------
+  # Return the C statements that copy the inputs from the port buffer into
+  # the model before eval() and the changed outputs back after eval().
+
+  def gen_port_buffer_copy_c( s, layout ):
+    copy_in, copy_out = [], []
+    for elem in layout.inputs:
+      offset, nbytes = layout.slots[ elem ]
+      copy_in.append( f'memcpy( m->{elem}, buf + {offset}, {nbytes} );' )
+    for elem, dirty in layout.outputs.items():
+      offset, nbytes = layout.slots[ elem ]
+      copy_out.append( f'buf[{dirty}] = memcmp( buf + {offset}, m->{elem}, {nbytes} ) != 0;' )
+      copy_out.append( f'if ( buf[{dirty}] ) memcpy( buf + {offset}, m->{elem}, {nbytes} );' )
+    return copy_in, copy_out
+
+  #-------------------------------------------------------------------------
+  # gen_trace_copy_c
+  #-------------------------------------------------------------------------
+  # Return the C statements that copy the inputs of one cycle from the
+  # input trace into the model and the outputs into the output trace.
+
+  def gen_trace_copy_c( s, layout ):
+    copy_in, copy_out = [], []
+    for elem in layout.inputs:
+      _, nbytes = layout.slots[ elem ]
+      copy_in.append( f'memcpy( m->{elem}, in + {layout.trace[elem]}, {nbytes} );' )
+    for elem in layout.outputs:
+      _, nbytes = layout.slots[ elem ]
+      copy_out.append( f'memcpy( out + {layout.trace[elem]}, m->{elem}, {nbytes} );' )
+    return copy_in, copy_out
+
+  #-------------------------------------------------------------------------
+  # gen_trace_ports_py
+  #-------------------------------------------------------------------------
+  # Return the (name, offset, nbytes, nbits) tuples of the input and output
+  # records of run_n_cycles, where name is the PyMTL port name.
+
+  def gen_trace_ports_py( s, layout ):
+    trace_inputs, trace_outputs = [], []
+    for elems, ret in [ ( layout.inputs, trace_inputs ), ( layout.outputs, trace_outputs ) ]:
+      for elem in elems:
+        _, nbytes = layout.slots[ elem ]
+        ret.append( ( layout.names[ elem ], layout.trace[ elem ], nbytes, layout.nbits[ elem ] ) )
+    return trace_inputs, trace_outputs
+
+  #-------------------------------------------------------------------------
+  # gen_port_buffer_init_py
+  #-------------------------------------------------------------------------
+  # Return the statements in `construct` that set up the port buffer.
+
+  def gen_port_buffer_init_py( s, layout ):
+    if not layout.buffered:
+      return ''
+    return '\n'.join([
+      '',
+      '    # All ports are marshalled through one contiguous buffer. Inputs',
+      '    # are only written when they change and outputs are only read when',
+      '    # they are marked dirty by comb_eval.',
+      f'    _port_buf  = memoryview( s.ffi.buffer( _ffi_m._cffi_port_buf, {layout.nbytes} ) )',
+      f'    _port_last = [ None ] * {len(layout.inputs)}',
+    ])
+
   #-------------------------------------------------------------------------
   # gen_signal_decl_py
   #-------------------------------------------------------------------------
@@ -969,17 +1319,17 @@ m->{name}{sub} = {deference}model->{name}{sub};
   # gen_comb_input
   #-------------------------------------------------------------------------
 
-  def gen_port_vector_input( s, lhs, rhs, mangled_rhs, dtype, symbols ):
+  def gen_port_vector_input( s, lhs, rhs, mangled_rhs, dtype, symbols, layout=None ):
     dtype_nbits = dtype.get_length()
     blocks   = [ '',
                  f's.{mangled_rhs} = Wire( {s._gen_bits_decl(dtype_nbits)} )',
                  '@update',
                  f'def isignal_{mangled_rhs}():',
                  f'  s.{mangled_rhs} @= {rhs}' ]
-    set_comb = ( s._gen_ref_write( lhs, 's.'+mangled_rhs, dtype_nbits ) )
+    set_comb = ( s._gen_ref_write( lhs, 's.'+mangled_rhs, dtype_nbits, layout=layout ) )
     return set_comb, blocks
 
-  def gen_port_struct_input( s, lhs, rhs, mangled_rhs, dtype, symbols ):
+  def gen_port_struct_input( s, lhs, rhs, mangled_rhs, dtype, symbols, layout=None ):
     dtype_nbits = dtype.get_length()
     # If the top-level signal is a struct, we add the datatype to symbol?
     dtype_name = dtype.get_class().__name__
@@ -996,27 +1346,30 @@ m->{name}{sub} = {deference}model->{name}{sub};
     # land to verilator, i.e. this port is the input to the imported
     # component.
     # At the end, we write tmp to the corresponding CFFI variable
-    set_comb = s._gen_ref_write( lhs, 's.'+mangled_rhs, dtype_nbits )
+    set_comb = s._gen_ref_write( lhs, 's.'+mangled_rhs, dtype_nbits, layout=layout )
     return set_comb, blocks
 
-  def gen_port_input( s, lhs, rhs, pnames, dtype, symbols ):
+  def gen_port_input( s, lhs, rhs, pnames, dtype, symbols, layout=None ):
     rhs = rhs.format(next(pnames))
 
+    if layout is not None:
+      layout.names[ lhs[len('_ffi_m.'):] ] = rhs[len('s.'):]
+
     # We always name mangle now
     mangled_rhs = s._pymtl_name_mangle( rhs )
 
     if isinstance( dtype, rdt.Vector ):
-      return s.gen_port_vector_input( lhs, rhs, mangled_rhs, dtype, symbols )
+      return s.gen_port_vector_input( lhs, rhs, mangled_rhs, dtype, symbols, layout )
 
     elif isinstance( dtype, rdt.Struct ):
-      return s.gen_port_struct_input( lhs, rhs, mangled_rhs, dtype, symbols )
+      return s.gen_port_struct_input( lhs, rhs, mangled_rhs, dtype, symbols, layout )
 
     else:
       assert False, f"unrecognized data type {dtype}!"
 
-  def gen_port_array_input( s, lhs, rhs, pnames, dtype, index, n_dim, symbols ):
+  def gen_port_array_input( s, lhs, rhs, pnames, dtype, index, n_dim, symbols, layout=None ):
     if not n_dim:
-      return s.gen_port_input( lhs, rhs, pnames, dtype, symbols )
+      return s.gen_port_input( lhs, rhs, pnames, dtype, symbols, layout )
     else:
       set_comb, structs = [], []
       for idx in range( n_dim[0] ):
@@ -1027,12 +1380,12 @@ m->{name}{sub} = {deference}model->{name}{sub};
         else:
           _rhs = f"{rhs}"
           _index = index-1
-        _set_comb, _structs = s.gen_port_array_input( _lhs, _rhs, pnames, dtype, _index, n_dim[1:], symbols )
+        _set_comb, _structs = s.gen_port_array_input( _lhs, _rhs, pnames, dtype, _index, n_dim[1:], symbols, layout )
         set_comb += _set_comb
         structs  += _structs
       return set_comb, structs
 
-  def gen_comb_input( s, packed_ports, symbols ):
+  def gen_comb_input( s, packed_ports, symbols, layout=None ):
     set_comb, structs = [], []
     # Read all input ports ( except for 'clk' ) from component ports into
     # the verilated model. We do NOT want `clk` signal to be read into
@@ -1053,7 +1406,7 @@ m->{name}{sub} = {deference}model->{name}{sub};
         lhs = "_ffi_m."+s._verilator_name(vname)
         rhs = "s.{}"
         idx = port_idx
-        _set_comb, _structs = s.gen_port_array_input( lhs, rhs, pnames_iter, dtype, idx, p_n_dim, symbols )
+        _set_comb, _structs = s.gen_port_array_input( lhs, rhs, pnames_iter, dtype, idx, p_n_dim, symbols, layout )
         set_comb += _set_comb
         structs  += _structs
 
@@ -1063,7 +1416,7 @@ m->{name}{sub} = {deference}model->{name}{sub};
   # gen_comb_output
   #-------------------------------------------------------------------------
 
-  def gen_port_vector_output( s, lhs, mangled_lhs, rhs, dtype, symbols ):
+  def gen_port_vector_output( s, lhs, mangled_lhs, rhs, dtype, symbols, layout=None ):
     dtype_nbits = dtype.get_length()
     blocks   = [ '',
                  f's.{mangled_lhs} = Wire( {s._gen_bits_decl(dtype_nbits)} )',
@@ -1071,10 +1424,10 @@ m->{name}{sub} = {deference}model->{name}{sub};
                  f'def osignal_{mangled_lhs}():',
                  f'  {lhs} @= s.{mangled_lhs}' ]
 
-    set_comb = s._gen_ref_read( 's.'+mangled_lhs, rhs, dtype_nbits, '@=' )
+    set_comb = s._gen_ref_read( 's.'+mangled_lhs, rhs, dtype_nbits, '@=', layout )
     return set_comb, blocks
 
-  def gen_port_struct_output( s, lhs, mangled_lhs, rhs, dtype, symbols ):
+  def gen_port_struct_output( s, lhs, mangled_lhs, rhs, dtype, symbols, layout=None ):
     dtype_nbits = dtype.get_length()
     # If the top-level signal is a struct, we add the datatype to symbol?
     dtype_name = dtype.get_name()
@@ -1102,24 +1455,27 @@ m->{name}{sub} = {deference}model->{name}{sub};
 
     # We create a long Bits object tmp first
     # Then we load the full Bits to tmp
-    set_comb = s._gen_ref_read( 's.'+mangled_lhs, rhs, dtype_nbits, '@=' )
+    set_comb = s._gen_ref_read( 's.'+mangled_lhs, rhs, dtype_nbits, '@=', layout )
     return set_comb, blocks
 
-  def gen_port_output( s, lhs, pnames, rhs, dtype, symbols ):
+  def gen_port_output( s, lhs, pnames, rhs, dtype, symbols, layout=None ):
     lhs = lhs.format(next(pnames))
 
+    if layout is not None:
+      layout.names[ rhs[len('_ffi_m.'):] ] = lhs[len('s.'):]
+
     mangled_lhs = s._pymtl_name_mangle( lhs )
 
     if isinstance( dtype, rdt.Vector ):
-      return s.gen_port_vector_output( lhs, mangled_lhs, rhs, dtype, symbols )
+      return s.gen_port_vector_output( lhs, mangled_lhs, rhs, dtype, symbols, layout )
     elif isinstance( dtype, rdt.Struct ):
-      return s.gen_port_struct_output( lhs, mangled_lhs, rhs, dtype, symbols )
+      return s.gen_port_struct_output( lhs, mangled_lhs, rhs, dtype, symbols, layout )
     else:
       assert False, f"unrecognized data type {dtype}!"
 
-  def gen_port_array_output( s, lhs, pnames, rhs, dtype, index, n_dim, symbols ):
+  def gen_port_array_output( s, lhs, pnames, rhs, dtype, index, n_dim, symbols, layout=None ):
     if not n_dim:
-      return s.gen_port_output( lhs, pnames, rhs, dtype, symbols )
+      return s.gen_port_output( lhs, pnames, rhs, dtype, symbols, layout )
     else:
       set_comb, structs = [], []
       for idx in range( n_dim[0] ):
@@ -1130,12 +1486,12 @@ m->{name}{sub} = {deference}model->{name}{sub};
           _lhs = f"{lhs}"
           _index = index-1
         _rhs = f"{rhs}[{idx}]"
-        _set_comb, _structs = s.gen_port_array_output( _lhs, pnames, _rhs, dtype, _index, n_dim[1:], symbols )
+        _set_comb, _structs = s.gen_port_array_output( _lhs, pnames, _rhs, dtype, _index, n_dim[1:], symbols, layout )
         set_comb += _set_comb
         structs  += _structs
       return set_comb, structs
 
-  def gen_comb_output( s, packed_ports, symbols ):
+  def gen_comb_output( s, packed_ports, symbols, layout=None ):
     set_comb, structs = [], []
     for _pnames, vname, rtype, port_idx in packed_ports:
       if isinstance( rtype, rt.Array ):
@@ -1151,7 +1507,7 @@ m->{name}{sub} = {deference}model->{name}{sub};
         lhs = "s.{}"
         rhs = "_ffi_m." + s._verilator_name(vname)
         idx = port_idx
-        _set_comb, _structs = s.gen_port_array_output( lhs, pnames_iter, rhs, dtype, idx, p_n_dim, symbols )
+        _set_comb, _structs = s.gen_port_array_output( lhs, pnames_iter, rhs, dtype, idx, p_n_dim, symbols, layout )
         set_comb += _set_comb
         structs  += _structs
     return set_comb, structs
@@ -1226,6 +1582,14 @@ m->{name}{sub} = {deference}model->{name}{sub};
   def _get_c_dim( s, port ):
     return "".join( f"[{i}]" for i in s._get_c_n_dim(port) )
 
+  def _get_c_nbytes( s, nbits ):
+    # Size of the Verilator storage of an `nbits`-bit port
+    if   nbits <= 8:  return 1
+    elif nbits <= 16: return 2
+    elif nbits <= 32: return 4
+    elif nbits <= 64: return 8
+    else:             return ( nbits - 1 ) // 32 * 4 + 4
+
   def _get_c_nbits( s, port ):
     if isinstance( port, rt.Array ):
       dtype = port.get_sub_type().get_dtype()
@@ -1233,7 +1597,9 @@ m->{name}{sub} = {deference}model->{name}{sub};
       dtype = port.get_dtype()
     return dtype.get_length()
 
-  def _gen_ref_write( s, lhs, rhs, nbits, equal='=' ):
+  def _gen_ref_write( s, lhs, rhs, nbits, equal='=', layout=None ):
+    if layout is not None and layout.buffered:
+      return s._gen_buffer_write( lhs, rhs, layout )
     if nbits <= 64:
       return [ '', f"{lhs}[0] {equal} int({rhs})" ]
     else:
@@ -1246,7 +1612,9 @@ m->{name}{sub} = {deference}model->{name}{sub};
         ret.append( f"x[{idx}] {equal} int({rhs}[{l}:{r}])" )
       return ret
 
-  def _gen_ref_read( s, lhs, rhs, nbits, equal='=' ):
+  def _gen_ref_read( s, lhs, rhs, nbits, equal='=', layout=None ):
+    if layout is not None and layout.buffered:
+      return s._gen_buffer_read( lhs, rhs, layout )
     if nbits <= 64:
       return [ '', f"{lhs} {equal} {rhs}[0]" ]
     else:
@@ -1260,6 +1628,24 @@ m->{name}{sub} = {deference}model->{name}{sub};
         ret.append( f"{lhs}[{l}:{r}] @= x[{idx}]" )
       return ret
 
+  def _gen_buffer_write( s, lhs, rhs, layout ):
+    # Only copy the input into the port buffer if it has changed
+    name = lhs[len('_ffi_m.'):]
+    offset, nbytes = layout.slots[ name ]
+    k = layout.inputs[ name ]
+    return [ '', f"v = int({rhs})",
+             f"if v != _port_last[{k}]:",
+             f"  _port_last[{k}] = v",
+             f"  _port_buf[{offset}:{offset+nbytes}] = v.to_bytes( {nbytes}, 'little' )" ]
+
+  def _gen_buffer_read( s, lhs, rhs, layout ):
+    # Only read the output from the port buffer if it is dirty
+    name = rhs[len('_ffi_m.'):]
+    offset, nbytes = layout.slots[ name ]
+    dirty = layout.outputs[ name ]
+    return [ '', f"if _port_buf[{dirty}]:",
+             f"  {lhs} @= int.from_bytes( _port_buf[{offset}:{offset+nbytes}], 'little' )" ]
+
   def _gen_bits_decl( s, nbits ):
     if nbits < 256:
       return f'Bits{nbits}'
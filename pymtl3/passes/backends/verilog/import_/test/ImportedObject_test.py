@@ -61,6 +61,33 @@ def test_reg( do_test ):
   a._tv_out = tv_out
   do_test( a )
 
+def test_vl_threads( do_test ):
+  def tv_in( m, tv ):
+    m.in_ @= Bits32( tv[0] )
+  def tv_out( m, tv ):
+    if tv[1] != '*':
+      assert m.out == Bits32( tv[1] )
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.clk : "clk", s.reset : "reset",
+          s.in_ : "d",   s.out : "q",
+      } )
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VReg.v' )
+      s.set_metadata( VerilogVerilatorImportPass.vl_threads, 2 )
+  a = VReg()
+  a._tvs = [
+    [    1,    '*' ],
+    [    2,      1 ],
+    [   -1,      2 ],
+    [   42,     -1 ],
+  ]
+  a._tv_in = tv_in
+  a._tv_out = tv_out
+  do_test( a )
+
 def test_vl_uninit( do_test ):
   # Use a latch to test if verilator has correctly set up
   # the inital signal values
@@ -324,6 +351,41 @@ def test_unpacked_port_array( do_test ):
   q._tv_out = tv_out
   do_test( q )
 
+@pytest.mark.parametrize( "nbits", [ 8, 64, 100 ] )
+def test_port_buffer( do_test, nbits ):
+  BitsN = mk_bits( nbits )
+  def tv_in( m, tv ):
+    m.in_[0] @= BitsN(tv[0])
+    m.in_[1] @= BitsN(tv[1])
+  def tv_out( m, tv ):
+    assert m.out[0] == BitsN(tv[2])
+    assert m.out[1] == BitsN(tv[3])
+  class VPassThrough( Component, VerilogPlaceholder ):
+    def construct( s, nports, nbits ):
+      s.in_ = [ InPort( mk_bits(nbits) ) for _ in range(nports) ]
+      s.out = [ OutPort( mk_bits(nbits) ) for _ in range(nports) ]
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VPassThrough.v' )
+      s.set_metadata( VerilogPlaceholderPass.params, {
+          'num_ports' : nports,
+          'bitwidth'  : nbits,
+      } )
+      s.set_metadata( VerilogPlaceholderPass.has_clk, False )
+      s.set_metadata( VerilogPlaceholderPass.has_reset, False )
+      s.set_metadata( VerilogVerilatorImportPass.vl_port_buffer, True )
+
+  q = VPassThrough( 2, nbits )
+  big = ( 1 << nbits ) - 1
+  tv = [
+    [   1, big,   1, big ],
+    [   1, big,   1, big ],
+    [   0,   1,   0,   1 ],
+    [ big,   1, big,   1 ],
+  ]
+  q._tvs = tv
+  q._tv_in = tv_in
+  q._tv_out = tv_out
+  do_test( q )
+
 def test_unpacked_port_array_infer_clk_reset( do_test ):
   # Test the `params` option of placeholder configs
   def tv_in( m, tv ):
@@ -434,10 +496,90 @@ def test_non_top_portmap( do_test ):
   a._tv_out = tv_out
   do_test( a )
 
+def test_multiple_non_top_imports( do_test ):
+  def tv_in( m, tv ):
+    m.in_ @= Bits32(tv[0])
+  def tv_out( m, tv ):
+    if tv[1] != '*':
+      assert m.out == Bits32(tv[1])
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VReg.v' )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.in_ : "d", s.out : "q",
+      } )
+  class VAdder( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in0 = InPort( Bits32 )
+      s.in1 = InPort( Bits32 )
+      s.cin = InPort( Bits1 )
+      s.out = OutPort( Bits32 )
+      s.cout = OutPort( Bits1 )
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VAdder.v' )
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      # Two instances of the same module are built only once
+      s.r0 = VReg()
+      s.r1 = VReg()
+      s.add = VAdder()
+      s.r0.in_ //= s.in_
+      s.r1.in_ //= s.r0.out
+      s.add.in0 //= s.r0.out
+      s.add.in1 //= s.r1.out
+      s.add.cin //= 0
+      s.add.out //= s.out
+      s.set_metadata( VerilogVerilatorImportPass.import_jobs, 2 )
+  a = Top()
+  a._tvs = [
+    [    1,    '*' ],
+    [    2,    '*' ],
+    [    3,      3 ],
+    [    4,      5 ],
+    [    0,      7 ],
+    [    0,      4 ],
+  ]
+  a._tv_in = tv_in
+  a._tv_out = tv_out
+  do_test( a )
+
 #-------------------------------------------------------------------------
 # test cases that do not use do_test
 #-------------------------------------------------------------------------
 
+def test_run_trace():
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VReg.v' )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.in_ : "d", s.out : "q",
+      } )
+  m = VReg()
+  m.elaborate()
+  m.apply( VerilogPlaceholderPass() )
+  m = VerilogTranslationImportPass()( m )
+  m.apply( DefaultPassGroup() )
+  m.sim_reset()
+
+  try:
+    # Outputs are sampled before the clock edge of each cycle
+    ret = m.run_trace( { 'in_' : [ 1, 2, 3, -1 ] } )
+    assert ret == { 'out' : [ 0, 1, 2, 3 ] }
+
+    # The normal simulation continues from the state after the run
+    m.in_ @= 42
+    m.sim_eval_combinational()
+    assert m.out == Bits32( -1 )
+    m.sim_tick()
+    assert m.out == 42
+  finally:
+    m.finalize()
+
 def test_reg_external_trace( do_test ):
   # Test Verilog line trace
   class VRegTrace( Component, VerilogPlaceholder ):
@@ -11,6 +11,7 @@ from pymtl3.passes.rtlir import RTLIRDataType as rdt
 from pymtl3.passes.rtlir import RTLIRType as rt
 from pymtl3.passes.rtlir.util.test_utility import do_test
 
+from ...util.utility import gen_mapped_ports
 from ..VerilogVerilatorImportPass import VerilogVerilatorImportPass
 
 
@@ -234,3 +235,53 @@ def test_nested_interface_port_array( do_test ):
     "s.ifc = [ Ifc() for _ in range(2) ]"
   ]
   do_test( a )
+
+def test_port_layout():
+  class A( Component ):
+    def construct( s ):
+      s.in_ = [ InPort( Bits32 ) for _ in range(2) ]
+      s.wide = InPort( mk_bits(100) )
+      s.out = OutPort( Bits1 )
+  a = A()
+  a.elaborate()
+  ipass = VerilogVerilatorImportPass()
+  ports = gen_mapped_ports( a, {} )
+
+  # clk has no slot; every slot is 8-byte aligned and the dirty bytes of
+  # the outputs follow the slots
+  layout = ipass.gen_port_layout( ports )
+  assert layout.slots == {
+    'in_[0]' : ( 0, 4 ), 'in_[1]' : ( 8, 4 ), 'out' : ( 16, 1 ),
+    'reset'  : ( 24, 1 ), 'wide'  : ( 32, 16 ),
+  }
+  assert layout.inputs == { 'in_[0]' : 0, 'in_[1]' : 1, 'reset' : 2, 'wide' : 3 }
+  assert layout.outputs == { 'out' : 48 }
+  assert layout.nbytes == 49
+
+  # The records of run_n_cycles are packed
+  assert layout.trace == {
+    'in_[0]' : 0, 'in_[1]' : 4, 'reset' : 8, 'wide' : 9, 'out' : 0,
+  }
+  assert layout.in_nbytes == 25 and layout.out_nbytes == 1
+
+  layout.buffered = True
+  set_comb_input, _ = ipass.gen_comb_input( ports, {}, layout )
+  assert set_comb_input[-5:] == [
+    '',
+    'v = int(s.s_DOT_wide)',
+    'if v != _port_last[3]:',
+    '  _port_last[3] = v',
+    "  _port_buf[32:48] = v.to_bytes( 16, 'little' )",
+  ]
+  set_comb_output, _ = ipass.gen_comb_output( ports, {}, layout )
+  assert set_comb_output == [
+    '',
+    'if _port_buf[48]:',
+    "  s.s_DOT_out @= int.from_bytes( _port_buf[16:17], 'little' )",
+  ]
+
+  # The PyMTL port names are recorded while generating the comb blocks
+  assert ipass.gen_trace_ports_py( layout ) == (
+    [ ( 'in_[0]', 0, 4, 32 ), ( 'in_[1]', 4, 4, 32 ), ( 'reset', 8, 1, 1 ), ( 'wide', 9, 16, 100 ) ],
+    [ ( 'out', 0, 1, 1 ) ],
+  )
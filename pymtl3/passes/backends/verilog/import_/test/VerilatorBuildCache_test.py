@@ -0,0 +1,48 @@
+#=========================================================================
+# VerilatorBuildCache_test.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Test the global build cache of Verilator-imported models."""
+
+import os
+
+from .. import VerilatorBuildCache
+
+
+def test_store_fetch( tmpdir, monkeypatch ):
+  monkeypatch.setattr( VerilatorBuildCache, "cache_dir", str(tmpdir.join("cache")) )
+  lib = tmpdir.join("libA_v.so")
+  lib.write_binary( b"\x7fELF-A" )
+
+  dst = str(tmpdir.join("work").ensure(dir=True).join("libA_v.so"))
+  assert not VerilatorBuildCache.fetch( "a"*8, dst )
+  assert not VerilatorBuildCache.fetch( None, dst )
+
+  VerilatorBuildCache.store( "a"*8, str(lib) )
+  assert VerilatorBuildCache.fetch( "a"*8, dst )
+  with open( dst, 'rb' ) as fd:
+    assert fd.read() == b"\x7fELF-A"
+
+def test_lru_eviction( tmpdir, monkeypatch ):
+  cache = tmpdir.join("cache")
+  monkeypatch.setattr( VerilatorBuildCache, "cache_dir", str(cache) )
+  monkeypatch.setattr( VerilatorBuildCache, "max_nbytes", 250 )
+
+  lib = tmpdir.join("lib.so")
+  lib.write_binary( b"x"*100 )
+  dst = str(tmpdir.join("out.so"))
+
+  VerilatorBuildCache.store( "k0", str(lib) )
+  os.utime( str(cache.join("k0.so")), (1, 1) )
+  VerilatorBuildCache.store( "k1", str(lib) )
+  os.utime( str(cache.join("k1.so")), (2, 2) )
+
+  # Touch k0 so that k1 becomes the least recently used entry
+  assert VerilatorBuildCache.fetch( "k0", dst )
+  VerilatorBuildCache.store( "k2", str(lib) )
+
+  assert sorted( os.listdir( str(cache) ) ) == [ "k0.so", "k2.so" ]
+
+def test_disabled( monkeypatch ):
+  monkeypatch.setattr( VerilatorBuildCache, "cache_dir", None )
+  assert VerilatorBuildCache.get_key( "VerilogVerilatorImportPass", None, {} ) is None
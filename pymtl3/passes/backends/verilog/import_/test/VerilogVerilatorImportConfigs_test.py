@@ -0,0 +1,105 @@
+#=========================================================================
+# VerilogVerilatorImportConfigs_test.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Test the command generation of the Verilator import configs."""
+
+import ctypes
+import os
+import subprocess
+
+from pymtl3.datatypes import Bits1
+from pymtl3.dsl import Component, InPort
+from pymtl3.passes.backends.verilog import VerilogVerilatorImportPass
+
+from ..VerilogVerilatorImportConfigs import VerilogVerilatorImportConfigs
+
+class_mk = """\
+VM_CLASSES_FAST += \\
+	VFoo \\
+	VFoo__1 \\
+
+VM_CLASSES_SLOW += \\
+	VFoo__Slow \\
+
+VM_SUPPORT_FAST += \\
+
+VM_SUPPORT_SLOW += \\
+	VFoo__Syms \\
+
+VM_GLOBAL_FAST += \\
+	verilated \\
+
+VM_GLOBAL_SLOW += \\
+
+"""
+
+class A( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits1 )
+
+def _make_cfg( **opts ):
+  m = A()
+  m.elaborate()
+  for k, v in opts.items():
+    m.set_metadata( getattr( VerilogVerilatorImportPass, k ), v )
+  cfg = VerilogVerilatorImportConfigs( m )
+  cfg.translated_top_module = "Foo"
+  cfg.translated_source_file = "Foo__pickled.v"
+  cfg.vl_mk_dir = "obj_dir_Foo"
+  cfg.v_include = []
+  return cfg
+
+def _make_obj_dir( tmpdir, monkeypatch ):
+  # Pretend Verilator has generated obj_dir_Foo
+  monkeypatch.chdir( tmpdir )
+  include_dir = tmpdir.join("include").ensure( dir=True )
+  monkeypatch.setenv( "PYMTL_VERILATOR_INCLUDE_DIR", str(include_dir) )
+
+  obj_dir = tmpdir.join("obj_dir_Foo").ensure( dir=True )
+  obj_dir.join("VFoo_classes.mk").write( class_mk )
+  return include_dir, obj_dir
+
+def test_vl_output_split():
+  assert "--output-split" not in _make_cfg().create_vl_cmd()
+  cmd = _make_cfg( vl_output_split=2000 ).create_vl_cmd()
+  assert "--output-split 2000 --output-split-cfuncs 2000" in cmd
+
+def test_vl_threads( tmpdir, monkeypatch ):
+  _make_obj_dir( tmpdir, monkeypatch )
+
+  cfg = _make_cfg()
+  assert "--threads 1 " in cfg.create_vl_cmd()
+  assert "-DVL_THREADED" not in cfg.create_cc_cmd()
+
+  cfg = _make_cfg( vl_threads=4, vl_threads_dpi='pure' )
+  assert "--threads 4 --threads-dpi pure " in cfg.create_vl_cmd()
+  assert "-DVL_THREADED" in cfg.create_cc_cmd()
+
+  cfg = _make_cfg( vl_threads=4, cc_jobs=2 )
+  with open( cfg.create_cc_cmd().split()[4] ) as fd:
+    assert "-DVL_THREADED" in fd.read()
+
+def test_parallel_cc_build( tmpdir, monkeypatch ):
+  include_dir, obj_dir = _make_obj_dir( tmpdir, monkeypatch )
+
+  # One function per translation unit that the wrapper sums up
+  units = [ obj_dir.join(f"{x}.cpp") for x in [ "VFoo", "VFoo__1", "VFoo__Slow", "VFoo__Syms" ] ]
+  units.append( include_dir.join("verilated.cpp") )
+  for i, f in enumerate( units ):
+    f.write( f'extern "C" int f{i}() {{ return {1 << i}; }}\n' )
+  tmpdir.join("Foo_v.cpp").write(
+    "".join( f'extern "C" int f{i}();\n' for i in range(len(units)) ) +
+    'extern "C" int foo() { return ' + " + ".join( f"f{i}()" for i in range(len(units)) ) + '; }\n' )
+
+  cfg = _make_cfg( cc_jobs=4 )
+  cmd = cfg.create_cc_cmd()
+  assert cmd.startswith( "make -j 4 -f obj_dir_Foo/" )
+  subprocess.check_output( cmd, stderr=subprocess.STDOUT, shell=True )
+
+  # Every translation unit has its own object
+  objs = os.listdir( str(obj_dir.join("pymtl_objs")) )
+  assert len(objs) == len(units) + 1
+
+  lib = ctypes.CDLL( os.path.abspath( cfg.get_shared_lib_path() ) )
+  assert lib.foo() == (1 << len(units)) - 1
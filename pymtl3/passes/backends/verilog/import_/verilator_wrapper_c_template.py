@@ -10,6 +10,8 @@ template = \
 #include "obj_dir_{component_name}/V{vl_component_name}.h"
 #include "stdio.h"
 #include "stdint.h"
+#include "stdlib.h"
+#include "string.h"
 #include "verilated.h"
 #include "verilated_{header_file_trace_format}_c.h"
 
@@ -26,14 +28,34 @@ template = \
 // that port has a non-zero value.
 #define ON_DEMAND_VCD_ENABLE {on_demand_vcd_enable}
 
+// number of threads of the verilated model
+#define VL_THREADS {vl_threads}
+
+// set to true if the model is verilated with --savable
+#define SAVABLE {savable}
+
 // set to true when Verilog module has line tracing
 #define VLINETRACE {external_trace}
 
+// set to true to marshal ports through a contiguous buffer
+#define PORT_BUFFER {port_buffer}
+
+// size of the port buffer in bytes
+#define PORT_BUFFER_NBYTES {port_buffer_nbytes}
+
+// sizes of the per-cycle input and output records of run_n_cycles
+#define TRACE_IN_NBYTES  {trace_in_nbytes}
+#define TRACE_OUT_NBYTES {trace_out_nbytes}
+
 #if VLINETRACE
 #include "obj_dir_{component_name}/V{vl_component_name}__Syms.h"
 #include "svdpi.h"
 #endif
 
+#if SAVABLE
+#include "verilated_save.h"
+#endif
+
 //------------------------------------------------------------------------
 // CFFI Interface
 //------------------------------------------------------------------------
@@ -62,6 +84,10 @@ extern "C" {{
     void *        _cffi_tfp;
     unsigned int  _cffi_trace_time;
 
+    // Port buffer. It holds one slot per port followed by one dirty byte
+    // per output port. This field is NULL if PORT_BUFFER is 0.
+    unsigned char * _cffi_port_buf;
+
     // Verilog line trace buffer. Refer to the comments to the trace function
     // below for more details.
     char _cffi_line_trace_str[512];
@@ -75,11 +101,18 @@ extern "C" {{
   void V{component_name}_seq_eval( V{component_name}_t * );
   void V{component_name}_assert_on( V{component_name}_t *, bool );
   bool V{component_name}_has_assert_fired( V{component_name}_t * );
+  int V{component_name}_run_n_cycles( V{component_name}_t *, const unsigned char *,
+                                       unsigned char *, int );
 
   #if VLINETRACE
   void V{component_name}_line_trace( V{component_name}_t *, char * );
   #endif
 
+  #if SAVABLE
+  void V{component_name}_save_model( V{component_name}_t *, const char * );
+  void V{component_name}_restore_model( V{component_name}_t *, const char * );
+  #endif
+
 }}
 
 //------------------------------------------------------------------------
@@ -97,6 +130,14 @@ V{component_name}_t * V{component_name}_create_model( const char *vcd_filename )
   context_ptr = new VerilatedContext;
 
   context_ptr->debug(0);
+
+  // Verilator 5 keeps the thread pool of a multithreaded model in the
+  // context, so the number of threads has to be set before the model is
+  // constructed. The pool is joined when destroy_model() deletes the
+  // context. Verilator 4 keeps the pool in the model itself.
+  #if VL_THREADS > 1 && defined(VERILATOR_VERSION_INTEGER) && VERILATOR_VERSION_INTEGER >= 5000000
+  context_ptr->threads( VL_THREADS );
+  #endif
   context_ptr->randReset( {verilator_xinit_value} );
   context_ptr->randSeed( {verilator_xinit_seed} );
 
@@ -136,6 +177,12 @@ V{component_name}_t * V{component_name}_create_model( const char *vcd_filename )
   // initialize exposed model interface pointers
 {port_inits}
 
+  #if PORT_BUFFER
+  m->_cffi_port_buf = (unsigned char *) calloc( PORT_BUFFER_NBYTES + 1, 1 );
+  #else
+  m->_cffi_port_buf = NULL;
+  #endif
+
   return m;
 
 }}
@@ -168,6 +215,7 @@ void V{component_name}_destroy_model( V{component_name}_t * m ) {{
 
   delete model;
   delete context_ptr;
+  free( m->_cffi_port_buf );
   delete m;
 
 }}
@@ -181,9 +229,20 @@ void V{component_name}_comb_eval( V{component_name}_t * m ) {{
 
   V{vl_component_name} * model = (V{vl_component_name} *) m->_cffi_model;
 
+  #if PORT_BUFFER
+  // copy inputs from the port buffer into the model
+  unsigned char * buf = m->_cffi_port_buf;
+{port_buffer_copy_in}
+  #endif
+
   // evaluate one time step
   model->eval();
 
+  #if PORT_BUFFER
+  // copy changed outputs into the port buffer and mark them dirty
+{port_buffer_copy_out}
+  #endif
+
   // Shunning: calling dump multiple times leads to unsuppressable warning
   //           under verilator 4.036
   // #if DUMP_VCD
@@ -297,6 +356,74 @@ bool V{component_name}_has_assert_fired( V{component_name}_t * m ) {{
 
 }}
 
+//------------------------------------------------------------------------
+// run_n_cycles()
+//------------------------------------------------------------------------
+// Simulate ncycles cycles without returning to Python. Each cycle copies
+// one input record from in_trace into the model, evaluates the model,
+// copies the outputs into one output record of out_trace, and ticks the
+// clock. Return the number of simulated cycles, which is less than
+// ncycles if an assertion has fired.
+
+int V{component_name}_run_n_cycles( V{component_name}_t * m,
+                                     const unsigned char * in_trace,
+                                     unsigned char * out_trace, int ncycles ) {{
+
+  V{vl_component_name} * model = (V{vl_component_name} *) m->_cffi_model;
+
+  for ( int i = 0; i < ncycles; i++ ) {{
+    const unsigned char * in  = in_trace  + (size_t) i * TRACE_IN_NBYTES;
+    unsigned char *       out = out_trace + (size_t) i * TRACE_OUT_NBYTES;
+
+{trace_copy_in}
+
+    model->eval();
+
+{trace_copy_out}
+
+    V{component_name}_seq_eval( m );
+
+    if ( V{component_name}_has_assert_fired( m ) )
+      return i + 1;
+  }}
+
+  return ncycles;
+
+}}
+
+//------------------------------------------------------------------------
+// save_model()/restore_model()
+//------------------------------------------------------------------------
+// Serialize the state of the verilated model into a file with
+// Verilator's save/restore, together with the VCD trace time so that
+// the waveform of a restored simulation continues from the right time.
+
+#if SAVABLE
+void V{component_name}_save_model( V{component_name}_t * m, const char * filename ) {{
+
+  V{vl_component_name} * model = (V{vl_component_name} *) m->_cffi_model;
+
+  VerilatedSave os;
+  os.open( filename );
+  os << m->_cffi_trace_time;
+  os << *model;
+  os.close();
+
+}}
+
+void V{component_name}_restore_model( V{component_name}_t * m, const char * filename ) {{
+
+  V{vl_component_name} * model = (V{vl_component_name} *) m->_cffi_model;
+
+  VerilatedRestore os;
+  os.open( filename );
+  os >> m->_cffi_trace_time;
+  os >> *model;
+  os.close();
+
+}}
+#endif
+
 //------------------------------------------------------------------------
 // trace()
 //------------------------------------------------------------------------
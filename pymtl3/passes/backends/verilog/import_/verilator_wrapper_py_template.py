@@ -12,6 +12,7 @@ normal PyMTL model. This template is based on PyMTL v2.
 import copy
 import os
 import gc
+import tempfile
 import weakref
 
 from cffi import FFI
@@ -50,6 +51,9 @@ class {component_name}( Component ):
         void *       _cffi_tfp;
         unsigned int _cffi_trace_time;
 
+        // Port buffer
+        unsigned char * _cffi_port_buf;
+
         // Verilog line trace buffer
         char _cffi_line_trace_str[512];
 
@@ -61,7 +65,10 @@ class {component_name}( Component ):
       void V{component_name}_seq_eval( V{component_name}_t * );
       void V{component_name}_assert_on( V{component_name}_t *, bool );
       bool V{component_name}_has_assert_fired( V{component_name}_t * );
+      int V{component_name}_run_n_cycles( V{component_name}_t *, const unsigned char *,
+                                           unsigned char *, int );
       {trace_c_def}
+      {save_c_def}
 
     """)
 
@@ -147,6 +154,7 @@ class {component_name}( Component ):
     _ffi_m = s._ffi_m
     _ffi_inst_comb_eval = s._ffi_inst.V{component_name}_comb_eval
     _ffi_inst_seq_eval  = s._ffi_inst.V{component_name}_seq_eval
+{port_buffer_init}
 
     # declare the port interface
 {port_defs}
@@ -174,6 +182,99 @@ class {component_name}( Component ):
       if s._ffi_inst.V{component_name}_has_assert_fired( _ffi_m ):
         raise AssertionError("A Verilog assertion fired in the Verilator simulation!")
 
+  # ( name, offset, nbytes, nbits ) of each port in the per-cycle input
+  # and output records of run_n_cycles
+  trace_inputs     = {trace_inputs}
+  trace_outputs    = {trace_outputs}
+  trace_in_nbytes  = {trace_in_nbytes}
+  trace_out_nbytes = {trace_out_nbytes}
+
+  def run_n_cycles( s, in_trace, out_trace, ncycles ):
+    """Simulate `ncycles` cycles inside the C wrapper.
+
+    `in_trace` holds one record of `trace_in_nbytes` bytes per cycle and
+    `out_trace` receives one record of `trace_out_nbytes` bytes per cycle,
+    both laid out as described by `trace_inputs` and `trace_outputs`.
+    Values are little-endian. Each cycle applies the inputs, evaluates the
+    model, records the outputs, and ticks the clock. The PyMTL ports and
+    the simulator cycle count are not updated during the run.
+    """
+    in_view, out_view = memoryview( in_trace ), memoryview( out_trace )
+    assert in_view.nbytes >= ncycles * s.trace_in_nbytes, "input trace is too short!"
+    assert out_view.nbytes >= ncycles * s.trace_out_nbytes, "output trace is too short!"
+
+    n = s._ffi_inst.V{component_name}_run_n_cycles( s._ffi_m,
+          s.ffi.from_buffer( in_view ), s.ffi.from_buffer( out_view, require_writable=True ), ncycles )
+    if n < ncycles:
+      raise AssertionError(f"A Verilog assertion fired in the Verilator simulation "
+                           f"in cycle {{n-1}} of run_n_cycles!")
+
+  def run_trace( s, inputs ):
+    """Simulate one cycle per value of the sequences in `inputs` inside
+    the C wrapper and return the outputs of every cycle.
+
+    `inputs` maps input port names (e.g., 'in_[0]') to equally long
+    sequences of ints or Bits; inputs that are not given are driven to 0.
+    Return a dict that maps output port names to lists of ints.
+    """
+    names = {{ x[0] for x in s.trace_inputs }}
+    for name in inputs:
+      if name not in names:
+        raise ValueError(f"{{name}} is not an input port of {component_name}!")
+
+    ncycles = max( map( len, inputs.values() ), default=0 )
+    in_nbytes, out_nbytes = s.trace_in_nbytes, s.trace_out_nbytes
+
+    in_trace = bytearray( ncycles * in_nbytes )
+    for name, offset, nbytes, nbits in s.trace_inputs:
+      if name in inputs:
+        values = inputs[ name ]
+        assert len(values) == ncycles, f"{{name}} has {{len(values)}} values instead of {{ncycles}}!"
+        mask = ( 1 << nbits ) - 1
+        for i, v in enumerate( values ):
+          pos = i * in_nbytes + offset
+          in_trace[pos:pos+nbytes] = ( int(v) & mask ).to_bytes( nbytes, 'little' )
+
+    out_trace = bytearray( ncycles * out_nbytes )
+    s.run_n_cycles( in_trace, out_trace, ncycles )
+
+    view = memoryview( out_trace )
+    return {{ name: [ int.from_bytes( view[pos:pos+nbytes], 'little' )
+                     for pos in range( offset, ncycles * out_nbytes, out_nbytes ) ]
+             for name, offset, nbytes, _ in s.trace_outputs }}
+
+  savable = {savable}
+
+  def checkpoint_state( s ):
+    """Return the state of the verilated model as bytes.
+
+    This is called by sim_checkpoint. The model has to be verilated with
+    `vl_savable` enabled. The values of the ports are saved by the
+    simulator as part of the PyMTL signals.
+    """
+    if not s.savable:
+      raise NotImplementedError("{component_name} cannot be saved in a checkpoint. "
+                                "Please set the vl_savable option of VerilogVerilatorImportPass.")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+      filename = os.path.join( tmpdir, "{component_name}.vlsave" )
+      s._ffi_inst.V{component_name}_save_model( s._ffi_m, filename.encode('ascii') )
+      with open( filename, 'rb' ) as f:
+        return f.read()
+
+  def restore_state( s, state ):
+    """Restore the verilated model from the bytes returned by
+    checkpoint_state."""
+    if not s.savable:
+      raise NotImplementedError("{component_name} cannot be restored from a checkpoint. "
+                                "Please set the vl_savable option of VerilogVerilatorImportPass.")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+      filename = os.path.join( tmpdir, "{component_name}.vlsave" )
+      with open( filename, 'wb' ) as f:
+        f.write( state )
+      s._ffi_inst.V{component_name}_restore_model( s._ffi_m, filename.encode('ascii') )
+
   def assert_on( s, enable ):
     assert isinstance( enable, bool )
     s._ffi_inst.V{component_name}_assert_on( s._ffi_m, enable )
@@ -33,9 +33,9 @@ class YosysVerilatorImportPass( VerilogVerilatorImportPass ):
   # Customize assignments in the Python wrapper
   #-----------------------------------------------------------------------
 
-  def gen_port_array_input( s, lhs, rhs, pnames, dtype, index, n_dim, symbols ):
+  def gen_port_array_input( s, lhs, rhs, pnames, dtype, index, n_dim, symbols, layout=None ):
     if not n_dim:
-      return s.gen_port_input( lhs, rhs, pnames, dtype, symbols )
+      return s.gen_port_input( lhs, rhs, pnames, dtype, symbols, layout )
     else:
       set_comb, structs = [], []
       for idx in range( n_dim[0] ):
@@ -46,14 +46,14 @@ class YosysVerilatorImportPass( VerilogVerilatorImportPass ):
         else:
           _rhs = rhs
           _index = index
-        _set_comb, _structs = s.gen_port_array_input( _lhs, _rhs, pnames, dtype, _index, n_dim[1:], symbols )
+        _set_comb, _structs = s.gen_port_array_input( _lhs, _rhs, pnames, dtype, _index, n_dim[1:], symbols, layout )
         set_comb += _set_comb
         structs  += _structs
       return set_comb, structs
 
-  def gen_port_array_output( s, lhs, pnames, rhs, dtype, index, n_dim, symbols ):
+  def gen_port_array_output( s, lhs, pnames, rhs, dtype, index, n_dim, symbols, layout=None ):
     if not n_dim:
-      return s.gen_port_output( lhs, pnames, rhs, dtype, symbols )
+      return s.gen_port_output( lhs, pnames, rhs, dtype, symbols, layout )
     else:
       set_comb, structs = [], []
       for idx in range( n_dim[0] ):
@@ -64,7 +64,7 @@ class YosysVerilatorImportPass( VerilogVerilatorImportPass ):
           _lhs = lhs
           _index = index
         _rhs = f"{rhs}__{i}"
-        _set_comb, _structs = s.gen_port_array_output( _lhs, pnames, _rhs, dtype, _index, n_dim[1:], symbols )
+        _set_comb, _structs = s.gen_port_array_output( _lhs, pnames, _rhs, dtype, _index, n_dim[1:], symbols, layout )
         set_comb += _set_comb
         structs  += _structs
       return set_comb, structs
@@ -119,6 +119,7 @@ class HeuristicTopoPass( UnrollSimPass ):
 
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
+    self.create_sim_run( top )
     self.create_sim_reset( top )
 
   def schedule_intra_cycle( self, top ):
@@ -5,11 +5,23 @@
 # we don't need the old TraceBreaking pass which only supports DAG
 # anymore.
 #
+# Blocks are grouped into meta blocks bounded by branchiness_factor (the
+# total branchiness of a meta block) and branchy_block_factor (the number
+# of branchy blocks in a meta block). The defaults were tuned on a set of
+# PyPy benchmarks. With autotune=True, the pass instead simulates each
+# candidate pair for a short warm-up window after reset, keeps the one
+# with the highest cycles/sec, and restores the state of the model. The
+# choice is cached per design hash for the rest of the process.
+#
 # Author : Shunning Jiang
 # Date   : Feb 14, 2020
 
 import os
+import tempfile
+import timeit
 from collections import defaultdict, deque
+from hashlib import blake2b
+from itertools import product
 
 import py
 
@@ -21,15 +33,34 @@ from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
 
 from ..sim.DynamicSchedulePass import kosaraju_scc
-from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag
+from ..sim.SimCheckpoint import load_sim_checkpoint, save_sim_checkpoint
+from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag, get_block_label
 from .HeuristicTopoPass import CountBranchesLoops
 from .UnrollSimPass import UnrollSimPass
 
 # _DEBUG = True
 _DEBUG = False
 
+# design hash -> ( branchiness_factor, branchy_block_factor )
+_autotune_cache = {}
+
 class Mamba2020Pass( UnrollSimPass ):
 
+  # Candidate ( branchiness_factor, branchy_block_factor ) pairs
+  autotune_candidates = list( product( [ 10, 20, 40 ], [ 3, 6, 12 ] ) )
+
+  def __init__( self, print_line_trace=True, reset_active_high=True,
+                branchiness_factor=20, branchy_block_factor=6,
+                autotune=False, autotune_cycles=100 ):
+    super().__init__( print_line_trace, reset_active_high )
+
+    assert branchiness_factor > 0 and branchy_block_factor > 0
+    self.branchiness_factor   = branchiness_factor
+    self.branchy_block_factor = branchy_block_factor
+    self.autotune             = autotune
+    self.autotune_cycles      = autotune_cycles
+    self.autotuning           = False
+
   def __call__( self, top ):
     if not hasattr( top._dag, "all_constraints" ):
       raise PassOrderError( "all_constraints" )
@@ -63,23 +94,128 @@ class Mamba2020Pass( UnrollSimPass ):
       else:
         self.branchiness[ blk ], self.only_loop_at_top[ blk ] = v.enter( hostobj.get_update_block_info( blk )[-1] )
 
-    self.schedule_ff( top )
-
     # Reuse simple's flip schedule
     simple = SimpleSchedulePass()
     simple.schedule_posedge_flip( top )
 
-    self.schedule_intra_cycle( top )
-
     top._sim = PassMetadata()
     self.create_print_line_trace( top )
     self.create_sim_cycle_count( top )
     self.create_lock_unlock_simulation( top )
     top.lock_in_simulation()
 
+    if self.autotune:
+      top._sched.metablock_factors = self.autotune_factors( top )
+    else:
+      top._sched.metablock_factors = ( self.branchiness_factor, self.branchy_block_factor )
+
+    self.schedule_ff( top )
+    self.schedule_intra_cycle( top )
+
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
+    self.create_sim_run( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
+
+  #-----------------------------------------------------------------------
+  # get_design_hash
+  #-----------------------------------------------------------------------
+  # Hash the shape of the scheduling problem, i.e. the blocks with their
+  # branchiness and the constraints between them
+
+  def get_design_hash( self, top ):
+    label = lambda x: get_block_label( top, x )
+
+    ffs  = top.get_all_update_ff()
+    blks = sorted( f"{label(x)} {self.branchiness[x]} {int(self.only_loop_at_top[x])} {int(x in ffs)}"
+                   for x in self.branchiness )
+    edges = sorted( f"{label(u)} {label(v)}" for (u, v) in top._dag.all_constraints )
+
+    h = blake2b( digest_size=16 )
+    for x in [ top.__class__.__name__, self.autotune_cycles, self.autotune_candidates ] + blks + edges:
+      h.update( repr(x).encode() )
+      h.update( b'\0' )
+    return h.hexdigest()
+
+  #-----------------------------------------------------------------------
+  # autotune_factors
+  #-----------------------------------------------------------------------
+  # Simulate every candidate partition from reset and return the fastest
+  # one. The model is restored to its locked-in state afterwards.
+
+  def autotune_factors( self, top ):
+    default = ( self.branchiness_factor, self.branchy_block_factor )
+
+    key = self.get_design_hash( top )
+    if key in _autotune_cache:
+      return _autotune_cache[ key ]
+
+    candidates = list( self.autotune_candidates )
+    if default not in candidates:
+      candidates.append( default )
+
+    # Tick functions are created per candidate, so they need a cycle
+    # counter for the checkpoint
+    top._sim.simulated_cycles = 0
+
+    # The trials must not show up in line traces or waveforms
+    print_line_trace, self.print_line_trace = self.print_line_trace, False
+    self.autotuning = True
+    best, best_rate = default, 0.0
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+      ckpt = os.path.join( tmpdir, "autotune.ckpt" )
+      try:
+        save_sim_checkpoint( top, ckpt )
+      except Exception:
+        # The model has state that cannot be restored after the trials
+        self.print_line_trace = print_line_trace
+        self.autotuning = False
+        return default
+
+      try:
+        for factors in candidates:
+          top._sched.metablock_factors = factors
+          self.schedule_ff( top )
+          self.schedule_intra_cycle( top )
+          self.create_sim_tick( top )
+          self.create_sim_reset( top )
+
+          # Warm up on the first half of the window and measure the second
+          half = max( 1, self.autotune_cycles // 2 )
+          top.sim_reset()
+          for _ in range( half ):
+            top.sim_tick()
+
+          start = timeit.default_timer()
+          for _ in range( half ):
+            top.sim_tick()
+          rate = half / max( timeit.default_timer() - start, 1e-9 )
+
+          if _DEBUG: print( f"autotune {factors}: {rate:.1f} cycles/sec" )
+          if rate > best_rate:
+            best, best_rate = factors, rate
+
+          load_sim_checkpoint( top, ckpt )
+
+      except Exception:
+        # The design cannot free-run from reset, e.g. it asserts on
+        # unset inputs. Fall back to the configured factors.
+        load_sim_checkpoint( top, ckpt )
+        return default
+
+      finally:
+        self.print_line_trace = print_line_trace
+        self.autotuning = False
+
+    _autotune_cache[ key ] = best
+    return best
+
+  def collect_trace_funcs( self, top ):
+    if self.autotuning:
+      return []
+    return super().collect_trace_funcs( top )
 
   #-----------------------------------------------------------------------
   # compile_meta_block
@@ -144,12 +280,7 @@ class Mamba2020Pass( UnrollSimPass ):
 
     # Divide all blks into meta blocks
 
-    # Branchiness factor is the bound of branchiness in a meta block.
-    branchiness_factor = 20
-
-    # Block factor is the bound of the number of branchy blocks in a
-    # meta block.
-    branchy_block_factor = 6
+    branchiness_factor, branchy_block_factor = top._sched.metablock_factors
 
     cur_meta, cur_br, cur_count = [], 0, 0
 
@@ -348,9 +479,7 @@ generated_block = wrapped_SCC_{0}
         check_srcs.append( f"if { ' or '.join(sub_check_srcs)}: continue" )
 
       # Divide all blks into meta blocks
-      # Branchiness factor is the bound of branchiness in a meta block.
-      branchiness_factor = 20
-      branchy_block_factor = 6
+      branchiness_factor, branchy_block_factor = top._sched.metablock_factors
 
       num_blks = 0  # sanity check
       cur_meta, cur_br, cur_count = [], 0, 0
@@ -491,12 +620,7 @@ generated_block = wrapped_SCC_{0}
 
     schedule = []
 
-    # Branchiness factor is the bound of branchiness in a meta block.
-    branchiness_factor = 20
-
-    # Block factor is the bound of the number of branchy blocks in a
-    # meta block.
-    branchy_block_factor = 6
+    branchiness_factor, branchy_block_factor = top._sched.metablock_factors
 
     # refactored code ...
     def expand_node( u ):
@@ -38,10 +38,14 @@ class HeuTopoUnrollSim( BasePass ):
                       reset_active_high=s.reset_active_high)( top )
 
 class Mamba2020( BasePass ):
-  def __init__( s, *, waveform=None, print_line_trace=True, reset_active_high=True ):
+  def __init__( s, *, waveform=None, print_line_trace=True, reset_active_high=True,
+                branchiness_factor=20, branchy_block_factor=6, autotune=False ):
     s.waveform = waveform
     s.print_line_trace = print_line_trace
     s.reset_active_high = reset_active_high
+    s.branchiness_factor = branchiness_factor
+    s.branchy_block_factor = branchy_block_factor
+    s.autotune = autotune
 
   def __call__( s, top ):
     top.elaborate()
@@ -51,4 +55,7 @@ class Mamba2020( BasePass ):
       CLLineTracePass()( top )
       LineTraceParamPass()( top )
     Mamba2020Pass(print_line_trace=s.print_line_trace,
-                  reset_active_high=s.reset_active_high)( top )
+                  reset_active_high=s.reset_active_high,
+                  branchiness_factor=s.branchiness_factor,
+                  branchy_block_factor=s.branchy_block_factor,
+                  autotune=s.autotune)( top )
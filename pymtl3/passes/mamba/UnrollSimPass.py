@@ -15,6 +15,7 @@ from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
 from ..sim.PrepareSimPass import PrepareSimPass
+from ..sim.SimpleTickPass import SimpleTickPass
 
 
 class UnrollSimPass( PrepareSimPass ):
@@ -48,11 +49,16 @@ def compile_unroll( schedule ):
 
     if len(method_ports) == 0: # Pure RTL design, add eval_combinational
       sim_eval_combinational = self.gen_tick_function( top._sched.update_schedule )
+      sim_eval_combinational_batch = SimpleTickPass.gen_eval_batch_function( top._sched.update_schedule,
+                                                                             top._sim.check_top_level_inports )
     else:
       def sim_eval_combinational():
         raise NotImplementedError(f"top is not a pure RTL design. {'top'+repr(list(method_ports)[0])[1:]} is a method port.")
+      def sim_eval_combinational_batch( in_ports, rows, out_ports ):
+        raise NotImplementedError(f"top is not a pure RTL design. {'top'+repr(list(method_ports)[0])[1:]} is a method port.")
 
     top.sim_eval_combinational = sim_eval_combinational
+    top.sim_eval_combinational_batch = sim_eval_combinational_batch
 
   # Override
   def create_sim_tick( self, top ):
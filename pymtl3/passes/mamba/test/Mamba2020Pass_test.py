@@ -1,7 +1,9 @@
 from pymtl3.datatypes import Bits32
 from pymtl3.dsl import *
 from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.passes.tracing import VcdGenerationPass
 
+from ..Mamba2020Pass import Mamba2020Pass, _autotune_cache
 from ..PassGroups import Mamba2020
 
 
@@ -142,3 +144,87 @@ def test_update_once():
     return
 
   raise Exception("Should've thrown UpblkCyclicError")
+
+class BranchyInner( Component ):
+  def construct( s ):
+    s.in_ = InPort(Bits32)
+    s.out = OutPort(Bits32)
+
+    @update
+    def up():
+      if s.in_ > 10:
+        s.out @= s.in_ - 1
+      elif s.in_ > 5:
+        s.out @= s.in_ + 2
+      else:
+        s.out @= s.in_ + 3
+
+class BranchyTop( Component ):
+  def construct( s, N=40 ):
+    s.inners = [ BranchyInner() for i in range(N) ]
+    s.outs   = [ OutPort(Bits32) for i in range(N) ]
+
+    s.count = Wire(Bits32)
+    for i in range(N):
+      s.inners[i].in_ //= s.count
+      s.outs[i] //= s.inners[i].out
+
+    @update_ff
+    def ff():
+      if s.reset:
+        s.count <<= 0
+      else:
+        s.count <<= s.count + 1
+
+def run_branchy( A ):
+  A.sim_reset()
+  for T in range(20):
+    ref = T - 1 if T > 10 else T + 2 if T > 5 else T + 3
+    for out in A.outs:
+      assert out == ref
+    A.sim_tick()
+
+def test_metablock_factors():
+  A = BranchyTop()
+  A.apply( Mamba2020( print_line_trace=False ) )
+  assert A._sched.metablock_factors == (20, 6)
+  n_default = len(A._sched.update_schedule)
+  run_branchy( A )
+
+  B = BranchyTop()
+  B.apply( Mamba2020( print_line_trace=False, branchiness_factor=1, branchy_block_factor=1 ) )
+  assert B._sched.metablock_factors == (1, 1)
+  assert len(B._sched.update_schedule) > n_default
+  run_branchy( B )
+
+def test_autotune_metablock_factors():
+  A = BranchyTop()
+  A.apply( Mamba2020( print_line_trace=False, autotune=True ) )
+  assert A._sched.metablock_factors in Mamba2020Pass.autotune_candidates
+
+  # The trials don't leak into the simulation
+  assert A.sim_cycle_count() == 0
+  run_branchy( A )
+
+  # The choice is cached for the same design
+  key = A._sched.metablock_factors
+  _autotune_cache[ next( k for k, v in _autotune_cache.items() if v == key ) ] = (7, 3)
+  B = BranchyTop()
+  B.apply( Mamba2020( print_line_trace=False, autotune=True ) )
+  assert B._sched.metablock_factors == (7, 3)
+  run_branchy( B )
+
+def test_autotune_skips_trace_funcs():
+  _autotune_cache.clear()
+
+  A = BranchyTop()
+  dumps = []
+  def dump_vcd():
+    dumps.append( A.sim_cycle_count() )
+  A.set_metadata( VcdGenerationPass.vcd_func, dump_vcd )
+  A.apply( Mamba2020( print_line_trace=False, autotune=True ) )
+
+  # Only the real simulation is dumped
+  assert dumps == []
+  run_branchy( A )
+  assert dumps == list( range( A.sim_cycle_count() ) )
@@ -0,0 +1,333 @@
+"""
+========================================================================
+ActivitySchedulePass.py
+========================================================================
+An activity-driven schedule pass. On top of the schedule produced by
+DynamicSchedulePass, it keeps per-net dirty state and only executes the
+update blocks whose inputs have changed. This makes designs where most
+of the hardware is idle cost time in proportion to the activity instead
+of the size of the design.
+
+A net is identified by its top-level signal, and the top-level signals
+that lock_in_simulation consolidates into the same object share a net.
+The update schedule and the ff schedule are each replaced by one
+evaluator that works on a queue of dirty blocks:
+
+- After a block executes, only the nets it writes are compared against
+  the values seen last time. If one has changed, the eligible blocks
+  that read it are enqueued in their schedule order, and the update_ff
+  blocks that read it are marked for the next clock edge.
+- Nets written by update_ff blocks are compared after the posedge flip,
+  i.e., at the beginning of the next combinational evaluation.
+- Nets without a writer block (e.g., top-level input ports) are compared
+  at the beginning of every combinational evaluation, and after every
+  block that calls methods.
+
+A block is eligible to be skipped only if its behavior is fully
+determined by the signals it reads: it doesn't call methods of the
+component, doesn't access plain Python attributes of components (lists
+included), has no closure variables other than the component itself,
+only reads constant globals, is not update_once or greenlet-wrapped,
+and all its reads are Bits/bitstruct signals. Everything else
+(including SCC blocks) is executed in every evaluation.
+
+Writing an internal signal from outside the update blocks, e.g., from
+the test bench, is not tracked. Call top._sched.activity_reset() after
+doing so to mark everything dirty.
+
+The original blocks are kept in top._sched.activity_blocks, which maps
+each evaluator to the list of blocks it executes.
+
+Date   : Oct 18, 2026
+"""
+import builtins
+import dis
+import linecache
+import types
+from heapq import heappop, heappush
+
+from pymtl3.datatypes import Bits, is_bitstruct_class
+from pymtl3.dsl import Signal
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.pypy import custom_exec
+
+from .DynamicSchedulePass import DynamicSchedulePass, _get_value_expr
+
+
+def get_global_names( code ):
+  """ Return the names of the globals read by code and its nested code
+  objects (comprehensions, lambdas, etc.). """
+  names = { ins.argval for ins in dis.get_instructions( code ) if ins.opname == 'LOAD_GLOBAL' }
+  for c in code.co_consts:
+    if isinstance( c, types.CodeType ):
+      names |= get_global_names( c )
+  return names
+
+def is_constant( value ):
+  if value is None or isinstance( value, (int, float, str, bytes, Bits, type) ):
+    return True
+  if isinstance( value, tuple ):
+    return all( is_constant( x ) for x in value )
+  # Builtin functions, but not methods of builtin objects like
+  # random.random, which is bound to a Random instance
+  if isinstance( value, types.BuiltinFunctionType ):
+    return value.__self__ is None or isinstance( value.__self__, types.ModuleType )
+  # Helper functions of the datatypes like zext and concat are pure
+  return isinstance( value, types.FunctionType ) and \
+         value.__module__.startswith( 'pymtl3.datatypes' )
+
+class ActivitySchedulePass( DynamicSchedulePass ):
+
+  def __call__( self, top ):
+    super().__call__( top )
+
+    self.collect_block_reads( top )
+    self.schedule_activity( top )
+
+  def collect_block_reads( self, top ):
+    """ Collect the read set of every eligible block. Slices and fields
+    are widened to their top-level signal. Ineligible blocks don't show
+    up in block_reads. """
+
+    upblk_reads, _, upblk_calls = top.get_all_upblk_metadata()
+    onces = top.get_all_update_once()
+
+    def get_signals( reads ):
+      signals = []
+      for rd in reads:
+        if not isinstance( rd, Signal ):
+          return None
+        w = rd.get_top_level_signal()
+        if not issubclass( w._dsl.Type, Bits ) and not is_bitstruct_class( w._dsl.Type ):
+          return None
+        signals.append( w )
+      return sorted( set( signals ), key=repr )
+
+    block_reads = {}
+
+    for blk, reads in upblk_reads.items():
+      if blk in onces or upblk_calls.get( blk ) or not self.only_accesses_signals( top, blk ):
+        continue
+      signals = get_signals( reads )
+      if signals is not None:
+        block_reads[ blk ] = signals
+
+    # Net blocks only copy the writer to the readers. Net blocks without a
+    # reader-side signal (constant writer) have no entry in genblk_reads.
+    for blk in top._dag.genblks:
+      signals = get_signals( top._dag.genblk_reads.get( blk, [] ) )
+      if signals is not None:
+        block_reads[ blk ] = signals
+
+    top._sched.block_reads = block_reads
+
+  @staticmethod
+  def only_accesses_signals( top, blk ):
+    """ The read/write sets extracted at elaboration only contain
+    NamedObjects, so accessing a plain Python attribute (e.g., an int or
+    a list of ints), a closure variable, or a mutable global silently
+    disappears from them. Go back to the cached names and the bytecode
+    and reject such blocks. """
+
+    host = top.get_update_block_host_component( blk )
+    cls  = host.__class__
+    name = blk.__name__
+    self_name = host._dsl.elab_self
+
+    for obj_name, _, _ in cls._name_fc[ name ]:
+      if obj_name[0][0] == self_name:
+        return False
+
+    # Every object along s.x[i].y must be a NamedObject or a non-empty
+    # (nested) list of them. Stop at signals since everything under a
+    # signal is a slice or a field.
+    def is_named( obj, obj_name, depth ):
+      if isinstance( obj, list ):
+        return len(obj) > 0 and all( is_named( x, obj_name, depth ) for x in obj )
+      if not isinstance( obj, NamedObject ):
+        return False
+      if isinstance( obj, Signal ) or depth == len(obj_name):
+        return True
+      return is_named( getattr( obj, obj_name[depth][0], None ), obj_name, depth+1 )
+
+    for obj_name, _, _ in cls._name_rd[ name ] + cls._name_wr[ name ]:
+      if obj_name[0][0] == self_name and not is_named( host, obj_name, 1 ):
+        return False
+
+    if any( x != self_name for x in blk.__code__.co_freevars ):
+      return False
+
+    for x in get_global_names( blk.__code__ ):
+      value = blk.__globals__[ x ] if x in blk.__globals__ else getattr( builtins, x, None )
+      if not is_constant( value ):
+        return False
+
+    return True
+
+  def schedule_activity( self, top ):
+    _, upblk_writes, upblk_calls = top.get_all_upblk_metadata()
+    genblk_writes = top._dag.genblk_writes
+    block_reads   = top._sched.block_reads
+    scc_blks      = top._sched.scc_blocks
+    greenlet_blks = { y: x for x, y in getattr( top._dag, 'blk_greenlet_mapping', {} ).items() }
+
+    comb_blks = list( top._sched.update_schedule )
+    ff_blks   = list( top._sched.schedule_ff )
+
+    # Map each top-level signal to the residence of its net, the same way
+    # lock_in_simulation consolidates them. Each signal is in at most
+    # one net.
+    net_of = {}
+    for writer, signals in top.get_all_value_nets():
+      tops = [ x for x in signals if isinstance( x, Signal ) and x.is_top_level_signal() ]
+      for x in tops:
+        net_of[ x ] = tops[0]
+
+    def get_net( x ):
+      w = x.get_top_level_signal()
+      return net_of.get( w, w )
+
+    def get_writes( blk ):
+      if blk in scc_blks:
+        return set().union( *[ get_writes( x ) for x in scc_blks[ blk ] ] )
+      blk = greenlet_blks.get( blk, blk )
+      if blk in upblk_writes:
+        return { get_net( x ) for x in upblk_writes[ blk ] if isinstance( x, Signal ) }
+      # The top-level readers of a net block are consolidated with the
+      # writer, so they are not actually written by the block
+      return { get_net( x ) for x in genblk_writes.get( blk, () ) if isinstance( x, Signal ) } - \
+             { get_net( x ) for x in top._dag.genblk_reads.get( blk, () ) }
+
+    def calls_methods( blk ):
+      if blk in scc_blks:
+        return any( calls_methods( x ) for x in scc_blks[ blk ] )
+      return bool( upblk_calls.get( greenlet_blks.get( blk, blk ) ) )
+
+    # Only the nets read by eligible blocks are tracked
+
+    net_ids = {}
+    for blk in comb_blks + ff_blks:
+      for x in block_reads.get( blk, () ):
+        net_ids.setdefault( get_net( x ), len(net_ids) )
+
+    nnets = len(net_ids)
+    comb_readers = [ [] for _ in range(nnets) ]
+    ff_readers   = [ [] for _ in range(nnets) ]
+
+    for readers, blks in [ (comb_readers, comb_blks), (ff_readers, ff_blks) ]:
+      for i, blk in enumerate( blks ):
+        for k in sorted( { net_ids[ get_net( x ) ] for x in block_reads.get( blk, () ) } ):
+          readers[k].append( i )
+
+    comb_writes = [ sorted( net_ids[x] for x in get_writes( blk ) if x in net_ids ) for blk in comb_blks ]
+    ff_writes   = [ sorted( net_ids[x] for x in get_writes( blk ) if x in net_ids ) for blk in ff_blks ]
+
+    written = set()
+    for blk in top._dag.final_upblks:
+      written |= get_writes( blk )
+    external = sorted( k for x, k in net_ids.items() if x not in written )
+
+    comb_always = [ i for i, blk in enumerate( comb_blks ) if blk not in block_reads ]
+    ff_always   = [ i for i, blk in enumerate( ff_blks )   if blk not in block_reads ]
+    check_external = [ blk not in block_reads and calls_methods( blk ) for blk in comb_blks ]
+
+    # Generate one function per net that returns its value as an int, or
+    # a tuple of ints for a bitstruct
+
+    lines = []
+    for x, k in net_ids.items():
+      expr = _get_value_expr( "s" + repr(x)[1:], x._dsl.Type )
+      if is_bitstruct_class( x._dsl.Type ):
+        expr = f"( {expr}, )"
+      lines.append( f"def get_net{k}(): return {expr}" )
+
+    _globals = { 's': top }
+    custom_exec( compile( '\n'.join(lines), filename='activity_nets', mode='exec' ), _globals, _globals )
+    linecache.cache['activity_nets'] = (1, None, lines, 'activity_nets')
+    getters = [ _globals[ f"get_net{k}" ] for k in range(nnets) ]
+
+    # Dirty state
+
+    snap     = [ None ] * nnets
+    queue    = [] # heap of comb block indices
+    queued   = bytearray( len(comb_blks) )
+    deferred = [] # comb blocks that are dirty for the next evaluation
+    ff_queue = []
+    ff_dirty = bytearray( len(ff_blks) )
+    pending  = [] # nets written by update_ff blocks before the flip
+
+    # Like the other schedules, every block executes at most once in an
+    # evaluation, so a change made by block cur only enqueues the readers
+    # later in the schedule. The others (e.g., a block that reads what it
+    # writes) are executed in the next evaluation.
+    def check_net( k, cur ):
+      v = getters[k]()
+      if v != snap[k]:
+        snap[k] = v
+        for i in comb_readers[k]:
+          if not queued[i]:
+            queued[i] = 1
+            if i > cur:
+              heappush( queue, i )
+            else:
+              deferred.append( i )
+        for j in ff_readers[k]:
+          if not ff_dirty[j]:
+            ff_dirty[j] = 1
+            ff_queue.append( j )
+
+    def activity_update_schedule():
+      for i in deferred:
+        heappush( queue, i )
+      deferred.clear()
+
+      for k in pending:
+        check_net( k, -1 )
+      pending.clear()
+      for k in external:
+        check_net( k, -1 )
+
+      for i in comb_always:
+        if not queued[i]:
+          queued[i] = 1
+          heappush( queue, i )
+
+      while queue:
+        i = heappop( queue )
+        queued[i] = 0
+        comb_blks[i]()
+        for k in comb_writes[i]:
+          check_net( k, i )
+        if check_external[i]:
+          for k in external:
+            check_net( k, i )
+
+    def activity_schedule_ff():
+      for j in ff_always:
+        if not ff_dirty[j]:
+          ff_dirty[j] = 1
+          ff_queue.append( j )
+
+      ff_queue.sort()
+      for j in ff_queue:
+        ff_dirty[j] = 0
+        ff_blks[j]()
+        pending.extend( ff_writes[j] )
+      ff_queue.clear()
+
+    def activity_reset():
+      snap[:] = [ None ] * nnets
+      queue[:] = range( len(comb_blks) )
+      queued[:] = b'\x01' * len(comb_blks)
+      deferred.clear()
+      ff_queue[:] = range( len(ff_blks) )
+      ff_dirty[:] = b'\x01' * len(ff_blks)
+      pending.clear()
+
+    activity_reset()
+
+    top._sched.update_schedule = [ activity_update_schedule ]
+    top._sched.schedule_ff     = [ activity_schedule_ff ]
+    top._sched.activity_blocks = { activity_update_schedule: comb_blks,
+                                   activity_schedule_ff:     ff_blks }
+    top._sched.activity_reset  = activity_reset
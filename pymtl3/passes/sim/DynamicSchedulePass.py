@@ -12,13 +12,14 @@ from copy import deepcopy
 import py
 
 from pymtl3.datatypes import Bits, is_bitstruct_class
+from pymtl3.datatypes.PythonBits import Bits as PythonBits
+from pymtl3.dsl.Connectable import Signal
 from pymtl3.dsl.errors import UpblkCyclicError
 from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
 
 from .SimpleSchedulePass import SimpleSchedulePass, dump_dag
-from .SimpleTickPass import SimpleTickPass
 
 
 class DynamicSchedulePass( BasePass ):
@@ -93,8 +94,10 @@ class DynamicSchedulePass( BasePass ):
     constraint_objs = top._dag.constraint_objs
     onces = top.get_all_update_once()
 
-    # Put the graph schedule to _sched
+    # Put the graph schedule to _sched. scc_blocks maps each generated SCC
+    # block to the blocks it evaluates.
     top._sched.update_schedule = schedule = []
+    top._sched.scc_blocks = {}
 
     scc_id = 0
     for i in scc_schedule:
@@ -154,105 +157,146 @@ class DynamicSchedulePass( BasePass ):
               visited.add( v )
 
         scc_id += 1
-        variables = set()
-        for (u, v) in E:
-          # Collect all variables that triggers other blocks in the SCC
-          if u in scc and v in scc:
-            variables.update( constraint_objs[ (u, v) ] )
-
-        if len(variables) == 0:
-          raise UpblkCyclicError("There is a cyclic dependency without involving variables."
-                          "Probably a loop that involves blocks that should be update_once:\n{}"\
-                          .format(", ".join( [ x.__name__ for x in scc] )))
-
-        # generate a loop for scc
-        # Shunning: we just simply loop over the whole SCC block
-        # TODO performance optimizations using Mamba techniques within a SCC block
-
-        def gen_wrapped_SCCblk( s, scc, src ):
-
-          # TODO mamba?
-          scc_tick_func = SimpleTickPass.gen_tick_function( scc )
-          _globals = { 's': s, 'scc_tick_func': scc_tick_func, 'deepcopy': deepcopy,
-                       'UpblkCyclicError': UpblkCyclicError }
-          _locals  = {}
-
-          custom_exec(py.code.Source( src ).compile(), _globals, _locals)
-          return _locals[ 'generated_block' ]
-
-        template = """
-def wrapped_SCC_{0}():
+        scc_blk = gen_worklist_scc_block( top, scc_id, tmp_schedule, scc, E, constraint_objs )
+        top._sched.scc_blocks[ scc_blk ] = tmp_schedule
+        schedule.append( scc_blk )
+
+#-------------------------------------------------------------------------
+# gen_worklist_scc_block
+#-------------------------------------------------------------------------
+# Generate a block that evaluates an SCC until it converges. Each block of
+# the SCC has a dirty flag and all of them start dirty. We sweep over the
+# blocks in the given order and only execute the dirty ones. After a
+# block executes, we check the SCC variables it writes and, if one has
+# changed, mark the other blocks of the SCC that access the variable as
+# dirty. Blocks later in the sweep will pick up the change in the same
+# sweep. We stop when no block is dirty.
+#
+# Variables are grouped by their top-level signal, and the top-level
+# signals of the same net form one variable because lock_in_simulation
+# makes them share one object. Otherwise a change made by the writer of
+# a net is invisible to the net block that copies it to the readers. A
+# Bits signal is compared by its integer value and a bitstruct signal by
+# the tuple of its fields' integer values, so we don't clone/deepcopy
+# anything.
+
+def _get_value_expr( path, Type ):
+  if isinstance( Type, list ):
+    return ", ".join( _get_value_expr( f"{path}[{i}]", t ) for i, t in enumerate( Type ) )
+  if is_bitstruct_class( Type ):
+    return ", ".join( _get_value_expr( f"{path}.{name}", t )
+                      for name, t in Type.__bitstruct_fields__.items() )
+  if Bits is PythonBits:
+    return f"{path}._uint"
+  return f"int({path})"
+
+def _get_snapshot_srcs( w, tmp ):
+  """ Return the source that saves the value of top-level signal w to tmp
+  and the expression that is true if it has changed since then. """
+  path = "s" + repr(w)[1:]
+  Type = w._dsl.Type
+
+  if isinstance( Type, type ) and issubclass( Type, Bits ):
+    expr = _get_value_expr( path, Type )
+  elif is_bitstruct_class( Type ):
+    expr = f"( {_get_value_expr( path, Type )}, )"
+  else:
+    # Fall back to deepcopy for arbitrary Python objects
+    return f"{tmp} = deepcopy({path})", f"{path} != {tmp}"
+
+  return f"{tmp} = {expr}", f"{expr} != {tmp}"
+
+def gen_worklist_scc_block( top, scc_id, schedule, scc, E, constraint_objs ):
+
+  upblk_reads, upblk_writes, _ = top.get_all_upblk_metadata()
+
+  net_of = {}
+  for writer, signals in top.get_all_value_nets():
+    tops = [ x for x in signals if isinstance( x, Signal ) and x.is_top_level_signal() ]
+    for x in tops:
+      net_of[ x ] = tops[0]
+
+  def get_var( x ):
+    w = x.get_top_level_signal()
+    return net_of.get( w, w )
+
+  # Return a dict that maps each variable accessed by blk to the top-level
+  # signal it actually accesses
+  def get_signals( blk, upblk_data, genblk_data ):
+    data = upblk_data if blk in upblk_data else genblk_data
+    if blk not in data:
+      return None
+    return { get_var( x ): x.get_top_level_signal() for x in data[ blk ] if isinstance( x, Signal ) }
+
+  # Collect the variables that carry the constraints inside the SCC and
+  # the blocks that access each of them
+
+  accessors = defaultdict(set)
+  for (u, v) in E:
+    if u in scc and v in scc:
+      for x in constraint_objs[ (u, v) ]:
+        w = get_var( x )
+        accessors[ w ].add( u )
+        accessors[ w ].add( v )
+
+  if not accessors:
+    raise UpblkCyclicError("There is a cyclic dependency without involving variables."
+                    "Probably a loop that involves blocks that should be update_once:\n{}"\
+                    .format(", ".join( [ x.__name__ for x in scc] )))
+
+  variables = sorted( accessors, key=repr )
+  blk_id    = { b: i for i, b in enumerate( schedule ) }
+
+  _globals = { 's': top, 'deepcopy': deepcopy, 'UpblkCyclicError': UpblkCyclicError }
+  blk_srcs = []
+
+  for i, b in enumerate( schedule ):
+    _globals[ f"blk{i}" ] = b
+
+    reads  = get_signals( b, upblk_reads, top._dag.genblk_reads )
+    writes = get_signals( b, upblk_writes, top._dag.genblk_writes )
+
+    save_srcs, check_srcs = [], []
+    for j, w in enumerate( variables ):
+      if b not in accessors[ w ]:
+        continue
+      # Without read/write sets (e.g. greenlet-wrapped blocks), assume the
+      # block both reads and writes the variable
+      if writes is not None and w not in writes:
+        continue
+
+      dirty = { blk_id[x] for x in accessors[ w ] if x is not b }
+      if reads is None or w in reads:
+        dirty.add( i )
+
+      save, changed = _get_snapshot_srcs( w if writes is None else writes[ w ], f"t{j}" )
+      save_srcs.append( save )
+      check_srcs.append( f"if {changed}: {' = '.join( f'd{k}' for k in sorted(dirty) )} = True" )
+
+    blk_srcs.append( f"if d{i}:" )
+    blk_srcs.append( f"  d{i} = False" )
+    blk_srcs.extend( [ f"  {x}" for x in save_srcs ] )
+    blk_srcs.append( f"  blk{i}() # {b.__name__}" )
+    blk_srcs.extend( [ f"  {x}" for x in check_srcs ] )
+
+  all_dirty = [ f"d{i}" for i in range(len(schedule)) ]
+  names     = ", ".join( [ x.__name__ for x in scc ] )
+
+  src = f"""
+def wrapped_SCC_{scc_id}():
+  {' = '.join( all_dirty )} = True
   N = 0
-  while True:
+  while {' or '.join( all_dirty )}:
     N += 1
     if N > 100:
-      raise UpblkCyclicError("Combinational loop detected at runtime in {{{3}}} after 100 iters!")
-    {1}
-    scc_tick_func()
-    {2}
-    # print( "SCC block{0} is executed", num_iters, "times" )
-    break
-generated_block = wrapped_SCC_{0}
-          """
-
-        copy_srcs  = []
-        check_srcs = []
-        # print_srcs = []
-
-        # clean up non-top variables if top is there. remove slices
-
-        final_variables = set()
-
-        for x in sorted( variables, key=repr ):
-          w = x.get_top_level_signal()
-          if w is x:
-            final_variables.add( x )
-            continue
-
-          # w is not x
-          if issubclass( w._dsl.Type, Bits ):
-            if w not in final_variables:
-              final_variables.add( w )
-          elif is_bitstruct_class( w._dsl.Type ):
-            if w not in final_variables:
-              final_variables.add( x )
-          else:
-            final_variables.add( x )
-
-        # group them by host component so that we create less bytecode
-
-        final_var_host = defaultdict(list)
-        for x in final_variables:
-          final_var_host[ x.get_host_component() ].append( x )
-
-        # create a block of copy/check code for each host component. Need
-        # to allocate global var_id across different host components.
-
-        var_id = 0
-        for host, var_list in final_var_host.items():
-
-          copy_srcs .append( f"host={host!r}" )
-          check_srcs.append( f"host={host!r}" )
-
-          sub_check_srcs = []
-
-          hostlen = len(repr(host))
-          for var in var_list:
-            var_id += 1
-            subname = repr(var)[hostlen+1:]
-            if issubclass( var._dsl.Type, Bits ):     copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            elif is_bitstruct_class( var._dsl.Type ): copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            else:                                     copy_srcs.append( f"t{var_id}=deepcopy(host.{subname})" )
-
-            sub_check_srcs.append( f"host.{subname} != t{var_id}" )
-
-          check_srcs.append( f"if { ' or '.join(sub_check_srcs)}: continue" )
-
-        scc_block_src = template.format( scc_id, "; ".join( copy_srcs ), "\n    ".join( check_srcs ),
-                                         ", ".join( [ x.__name__ for x in scc] ) )
-
-        # print(scc_block_src)
-        schedule.append( gen_wrapped_SCCblk( top, tmp_schedule, scc_block_src ) )
+      raise UpblkCyclicError("Combinational loop detected at runtime in {{{names}}} after 100 iters!")
+    {(chr(10) + '    ').join( blk_srcs )}
+generated_block = wrapped_SCC_{scc_id}
+"""
+
+  _locals = {}
+  custom_exec( py.code.Source( src ).compile(), _globals, _locals )
+  return _locals[ 'generated_block' ]
 
 def kosaraju_scc( G, G_T ):
 
@@ -23,6 +23,11 @@ class GenDAGPass( BasePass ):
 
   def __call__( self, top ):
     top.check()
+
+    # Reuse the results of the last run for the unchanged part of the
+    # model if the elaborated model was mutated afterwards
+    prev_dag = getattr( top, "_dag", None )
+
     top._dag = PassMetadata()
 
     placeholders = [ x for x in top._dsl.all_named_objects
@@ -31,20 +36,29 @@ class GenDAGPass( BasePass ):
     if placeholders:
       raise LeftoverPlaceholderError( placeholders )
 
-    self._generate_net_blocks( top )
-    self._process_value_constraints( top )
+    self._generate_net_blocks( top, prev_dag )
+    self._process_value_constraints( top, prev_dag )
     self._process_methods( top )
 
-  def _generate_net_blocks( self, top ):
+  def _generate_net_blocks( self, top, prev_dag=None ):
     """ _generate_net_blocks:
     Each net is an update block. Readers are actually "written" here.
       >>> s.net_reader1 = s.net_writer
-      >>> s.net_reader2 = s.net_writer """
+      >>> s.net_reader2 = s.net_writer
+
+    A net with the same writer and members as a net of the last run
+    reuses the block generated for it. """
+
+    try:
+      prev_genblk_cache = prev_dag.genblk_cache
+    except AttributeError:
+      prev_genblk_cache = {}
 
     top._dag.genblks = set()
     top._dag.genblk_hostobj = {}
     top._dag.genblk_reads   = {}
     top._dag.genblk_writes  = {}
+    top._dag.genblk_cache   = {} # (writer, members) -> (blk, all_readers)
     # top._dag.genblk_src     = {}
 
     # Fall back to compiling one block at a time
@@ -65,6 +79,17 @@ class GenDAGPass( BasePass ):
       if len(signals) == 1:
         continue
 
+      key = ( writer, frozenset(signals) )
+      cached = prev_genblk_cache.get( key )
+      if cached is not None:
+        blk, all_readers = cached
+        top._dag.genblk_cache[ key ] = cached
+        top._dag.genblks.add( blk )
+        if writer.is_signal():
+          top._dag.genblk_reads[ blk ] = [ writer ]
+        top._dag.genblk_writes[ blk ] = all_readers
+        continue
+
       all_readers = [ x for x in signals if x is not writer ]
       all_fanout  = len( all_readers )
 
@@ -122,6 +147,7 @@ class GenDAGPass( BasePass ):
       if fanout == 0:
         blk = compile_net_blk( {}, f"""def {genblk_name}(): pass""", writer )
 
+        top._dag.genblk_cache[ key ] = ( blk, all_readers )
         top._dag.genblks.add( blk )
         if writer.is_signal():
           top._dag.genblk_reads[ blk ] = [ writer ]
@@ -188,6 +214,7 @@ def {}():
 
       blk = compile_net_blk( _globals, gen_src, writer )
 
+      top._dag.genblk_cache[ key ] = ( blk, all_readers )
       top._dag.genblks.add( blk )
       if writer.is_signal():
         top._dag.genblk_reads[ blk ] = [ writer ]
@@ -196,7 +223,7 @@ def {}():
     # Get the final list of update blocks
     top._dag.final_upblks = top.get_all_update_blocks() | top._dag.genblks
 
-  def _process_value_constraints( self, top ):
+  def _process_value_constraints( self, top, prev_dag=None ):
 
     # Query update block metadata from top
 
@@ -205,6 +232,71 @@ def {}():
     genblk_reads, genblk_writes  = top._dag.genblk_reads, top._dag.genblk_writes
     U_U, RD_U, WR_U, U_M         = top.get_all_explicit_constraints()
 
+    #---------------------------------------------------------------------
+    # Read/write index
+    #---------------------------------------------------------------------
+    # read_upblks/write_upblks map each variable to the blocks that
+    # read/write it. If GenDAGPass was applied before, e.g., before a
+    # replace_component, we update the index of the last run with only
+    # the blocks whose reads/writes changed, and re-derive the implicit
+    # constraints of only the affected variables.
+
+    try:
+      state = prev_dag.value_constraint_state
+    except AttributeError:
+      state = None
+
+    if state is None:
+      # blk -> frozenset of reads/writes in the last run
+      blk_reads, blk_writes = {}, {}
+      read_upblks, write_upblks = defaultdict(set), defaultdict(set)
+      # top level signal -> variables under it that are read or written
+      root_objs = defaultdict(set)
+      # top level signal -> { (u, v): variables that imply u < v }
+      root_constraints = {}
+      impl_objs = defaultdict(set)
+    else:
+      blk_reads, blk_writes, read_upblks, write_upblks, \
+        root_objs, root_constraints, impl_objs = state
+
+    dirty_objs = set()
+    _update_blk_index( [ upblk_reads,  genblk_reads  ], blk_reads,  read_upblks,  dirty_objs )
+    _update_blk_index( [ upblk_writes, genblk_writes ], blk_writes, write_upblks, dirty_objs )
+
+    dirty_roots = set()
+    for obj in dirty_objs:
+      root = _get_root( obj )
+      dirty_roots.add( root )
+      if obj in read_upblks or obj in write_upblks:
+        root_objs[ root ].add( obj )
+      elif root in root_objs:
+        root_objs[ root ].discard( obj )
+        if not root_objs[ root ]:
+          del root_objs[ root ]
+
+    #---------------------------------------------------------------------
+    # Implicit constraint
+    #---------------------------------------------------------------------
+    # Constraints are only derived among variables with the same top
+    # level signal, so we redo the dirty top level signals
+
+    for root in dirty_roots:
+      old = root_constraints.pop( root, None )
+      if old:
+        for pair, objs in old.items():
+          pair_objs = impl_objs[ pair ]
+          pair_objs -= objs
+          if not pair_objs:
+            del impl_objs[ pair ]
+
+      if root in root_objs:
+        new = self._collect_implicit_constraints( root_objs[ root ], read_upblks,
+                                                  write_upblks, update_ff )
+        if new:
+          root_constraints[ root ] = new
+          for pair, objs in new.items():
+            impl_objs[ pair ] |= objs
+
     #---------------------------------------------------------------------
     # Explicit constraint
     #---------------------------------------------------------------------
@@ -219,21 +311,7 @@ def {}():
     # constraint WR(x) > U1 & U2 writes x --> U1 <  WR(x) == U2
     # Doesn't work for nested data struct and slice:
 
-    read_upblks = defaultdict(set)
-    write_upblks = defaultdict(set)
-
-    constraint_objs = defaultdict(set)
-    expl_constraints = set( top._dsl.all_U_U_constraints )
-
-    for data in [ upblk_reads, genblk_reads ]:
-      for blk, reads in data.items():
-        for rd in reads:
-          read_upblks[ rd ].add( blk )
-
-    for data in [ upblk_writes, genblk_writes ]:
-      for blk, writes in data.items():
-        for wr in writes:
-          write_upblks[ wr ].add( blk )
+    expl_objs = defaultdict(set)
 
     for typ in [ 'rd', 'wr' ]: # deduplicate code
       if typ == 'rd':
@@ -249,35 +327,52 @@ def {}():
         # enumerate upblks that has a constraint with x
         for (sign, co_blk) in constrained_blks:
 
-          for eq_blk in equal_blks[ obj ]: # blocks that are U == RD(x)
+          for eq_blk in equal_blks.get( obj, () ): # blocks that are U == RD(x)
             if co_blk != eq_blk:
               if sign == 1: # RD/WR(x) < U is 1, RD/WR(x) > U is -1
                 # eq_blk == RD/WR(x) < co_blk
                 U_U.add( (eq_blk, co_blk) )
-                constraint_objs[ (eq_blk, co_blk) ].add( obj )
+                expl_objs[ (eq_blk, co_blk) ].add( obj )
               else:
                 # co_blk < RD/WR(x) == eq_blk
                 U_U.add( (co_blk, eq_blk) )
-                constraint_objs[ (co_blk, eq_blk) ].add( obj )
+                expl_objs[ (co_blk, eq_blk) ].add( obj )
 
-    #---------------------------------------------------------------------
-    # Implicit constraint
-    #---------------------------------------------------------------------
-    # Synthesize total constraints between two upblks that read/write to
-    # the "same variable" (we also handle the read/write of a recursively
-    # nested field/slice)
-    #
-    # Implicitly, WR(x) < RD(x), so when U1 writes X and U2 reads x
-    # - U1 == WR(x) & U2 == RD(x) --> U1 == WR(x) < RD(x) == U2
+    # Don't let the later passes modify the sets of the index
+    constraint_objs = defaultdict(set, impl_objs)
+    for pair, objs in expl_objs.items():
+      constraint_objs[ pair ] = constraint_objs[ pair ] | objs
 
-    impl_constraints = set()
+    top._dag.constraint_objs = constraint_objs
+    top._dag.all_constraints = { *U_U }
+    for (x, y) in impl_objs:
+      if (y, x) not in U_U: # no conflicting expl
+        top._dag.all_constraints.add( (x, y) )
+
+    top._dag.value_constraint_state = ( blk_reads, blk_writes, read_upblks, write_upblks,
+                                        root_objs, root_constraints, impl_objs )
+
+  def _collect_implicit_constraints( self, objs, read_upblks, write_upblks, update_ff ):
+    """ Synthesize total constraints between two upblks that read/write to
+    the "same variable" for the variables in objs (we also handle the
+    read/write of a recursively nested field/slice). Return a dict that
+    maps each constraint to the variables that imply it.
+
+    Implicitly, WR(x) < RD(x), so when U1 writes X and U2 reads x
+    - U1 == WR(x) & U2 == RD(x) --> U1 == WR(x) < RD(x) == U2 """
+
+    constraint_objs = defaultdict(set)
 
     # Collect all objs that write the variable whose id is "read"
     # 1) RD A.b.b     - WR A.b.b, A.b, A
     # 2) RD A.b[1:10] - WR A.b[1:10], A.b, A
     # 3) RD A.b[1:10] - WR A.b[0:5], A.b[6], A.b[8:11]
 
-    for obj, rd_blks in read_upblks.items():
+    for obj in objs:
+      rd_blks = read_upblks.get( obj )
+      if not rd_blks:
+        continue
+
       writers = []
 
       # Check parents. Cover 1) and 2)
@@ -300,8 +395,7 @@ def {}():
             for rd_blk in rd_blks:
               if wr_blk != rd_blk:
                 # if rd_blk not in update_ff:
-                impl_constraints.add( (wr_blk, rd_blk) ) # wr < rd default
-                constraint_objs[ (wr_blk, rd_blk) ].add( obj )
+                constraint_objs[ (wr_blk, rd_blk) ].add( obj ) # wr < rd default
 
     # Collect all objs that read the variable whose id is "write"
     # 1) WR A.b.b.b, A.b.b, A.b, A (detect 2-writer conflict)
@@ -310,7 +404,11 @@ def {}():
     # 4) WR A.b[1:10], A.b[0:5], A.b[6] (detect 2-writer conflict)
     # "WR A.b[1:10] - RD A.b[0:5], A.b[6], A.b[8:11]" has been discovered
 
-    for obj, wr_blks in write_upblks.items():
+    for obj in objs:
+      wr_blks = write_upblks.get( obj )
+      if not wr_blks:
+        continue
+
       readers = []
 
       # Check parents. Cover 2) and 3). 1) and 4) should be detected in elaboration
@@ -327,14 +425,9 @@ def {}():
               for rd_blk in read_upblks[ reader ]:
                 if wr_blk != rd_blk:
                   # if rd_blk not in update_ff:
-                  impl_constraints.add( (wr_blk, rd_blk) ) # wr < rd default
-                  constraint_objs[ (wr_blk, rd_blk) ].add( obj )
+                  constraint_objs[ (wr_blk, rd_blk) ].add( obj ) # wr < rd default
 
-    top._dag.constraint_objs = constraint_objs
-    top._dag.all_constraints = { *U_U }
-    for (x, y) in impl_constraints:
-      if (y, x) not in U_U: # no conflicting expl
-        top._dag.all_constraints.add( (x, y) )
+    return constraint_objs
 
   #-----------------------------------------------------------------------
   # Process methods
@@ -590,3 +683,39 @@ def {}():
     for blocking_method in blocking_ifcs:
       for blk in method_blks[ blocking_method.method.method ]:
         top._dag.greenlet_upblks.add( blk )
+
+def _get_root( obj ):
+  if isinstance( obj, Signal ):
+    return obj._dsl.top_level_signal
+  return obj
+
+def _update_blk_index( blk_dicts, snapshot, index, dirty_objs ):
+  """ Update index (variable -> blocks) from the variables of each block
+  in the last run (snapshot) to blk_dicts (block -> variables), and add
+  the variables whose blocks changed to dirty_objs. """
+
+  empty = frozenset()
+  alive = set()
+
+  for blk_dict in blk_dicts:
+    for blk, objs in blk_dict.items():
+      alive.add( blk )
+      new = frozenset( objs )
+      old = snapshot.get( blk, empty )
+      if new != old:
+        snapshot[ blk ] = new
+        for obj in old - new:
+          index[ obj ].discard( blk )
+          if not index[ obj ]:
+            del index[ obj ]
+          dirty_objs.add( obj )
+        for obj in new - old:
+          index[ obj ].add( blk )
+          dirty_objs.add( obj )
+
+  for blk in [ x for x in snapshot if x not in alive ]:
+    for obj in snapshot.pop( blk ):
+      index[ obj ].discard( blk )
+      if not index[ obj ]:
+        del index[ obj ]
+      dirty_objs.add( obj )
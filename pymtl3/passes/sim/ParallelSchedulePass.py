@@ -0,0 +1,353 @@
+"""
+========================================================================
+ParallelSchedulePass.py
+========================================================================
+Partition the update blocks of a pure RTL design into groups that only
+communicate through registers, and run the groups in separate worker
+processes.
+
+Two blocks end up in the same partition if
+- one of them combinationally reads a signal that the other writes, or
+- they write (parts of) the same top-level signal, or
+- there is an explicit U < U constraint between them.
+Hence the only values that cross partitions are outputs of update_ff
+blocks, e.g. the registered val/rdy/msg of latency-insensitive stream
+queues between tiles. These values are known at the beginning of the
+cycle, so the workers can use a conservative one-cycle-lookahead
+protocol: each worker evaluates its own blocks for one cycle, publishes
+its boundary registers to a shared-memory channel, waits at a barrier,
+and pulls the registers it reads from other partitions.
+
+The serial schedule is the same as SimpleSchedulePass, so sim_tick and
+sim_run keep working. PrepareSimPass additionally creates
+
+  top.sim_run_parallel( ncycles )
+
+that forks the workers (they inherit the elaborated model), runs ncycles
+cycles with all top-level inports held constant, and merges the final
+state of every partition back into top.
+
+Date   : Oct 18, 2026
+"""
+import multiprocessing
+import os
+from collections import defaultdict
+
+from pymtl3.datatypes import Bits, is_bitstruct_class, mk_bits
+from pymtl3.dsl import MethodPort
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.BasePass import PassMetadata
+from pymtl3.passes.errors import PassOrderError
+
+from .SimpleSchedulePass import SimpleSchedulePass
+from .SimpleTickPass import SimpleTickPass
+
+
+class ParallelSchedulePass( SimpleSchedulePass ):
+
+  def __init__( self, nworkers=None, order='random', seed=None ):
+    super().__init__( order, seed )
+    self.nworkers = nworkers or os.cpu_count() or 1
+    assert self.nworkers > 0
+
+  def __call__( self, top ):
+    if not hasattr( top._dag, "all_constraints" ):
+      raise PassOrderError( "all_constraints" )
+
+    if hasattr( top, "_sched" ):
+      raise Exception("Some schedule pass has already been applied!")
+
+    if top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) or \
+       top.get_all_update_once():
+      raise NotImplementedError( "ParallelSchedulePass only supports pure RTL designs "
+                                 "without method ports and update_once blocks." )
+
+    super().__call__( top )
+
+    self.partition_blocks( top )
+
+  #-----------------------------------------------------------------------
+  # partition_blocks
+  #-----------------------------------------------------------------------
+
+  def partition_blocks( self, top ):
+
+    update_ff = top.get_all_update_ff()
+    upblk_reads, upblk_writes, _ = top.get_all_upblk_metadata()
+
+    all_reads  = { **upblk_reads,  **top._dag.genblk_reads }
+    all_writes = { **upblk_writes, **top._dag.genblk_writes }
+
+    # Blocks that only depend on top-level inports (e.g. the net blocks
+    # that broadcast clk/reset) produce the same values in every worker
+    # since the inports are held constant. They are executed once by the
+    # parent before forking and otherwise ignored. Writers of slices are
+    # always scheduled before the readers, so one walk over the
+    # topologically sorted schedule is enough.
+
+    tl_writers = defaultdict(set)
+    for blk, writes in all_writes.items():
+      for wr in writes:
+        tl_writers[ wr.get_top_level_signal() ].add( blk )
+
+    inports = set( top.get_input_value_ports() )
+
+    top._sched.input_driven_schedule = input_driven_schedule = []
+    input_driven = set()
+    for blk in top._sched.update_schedule:
+      for rd in all_reads.get( blk, () ):
+        w = rd.get_top_level_signal()
+        if w not in inports and not (w in tl_writers and tl_writers[w] <= input_driven):
+          break
+      else:
+        input_driven.add( blk )
+        input_driven_schedule.append( blk )
+
+    # Union-find over the remaining update blocks
+
+    parent = { blk: blk for blk in top._dag.final_upblks if blk not in input_driven }
+
+    def find( x ):
+      while parent[x] is not x:
+        parent[x] = parent[ parent[x] ]
+        x = parent[x]
+      return x
+
+    def union( x, y ):
+      x, y = find(x), find(y)
+      if x is not y:
+        parent[x] = y
+
+    # Blocks that write the same top-level signal are merged, and each
+    # top-level signal gets one writer representative
+
+    writer = {}
+    for blk, writes in all_writes.items():
+      if blk in input_driven:
+        continue
+      for wr in writes:
+        w = wr.get_top_level_signal()
+        if w in writer:
+          union( blk, writer[w] )
+        else:
+          writer[w] = blk
+
+    # Combinational producer-consumer pairs are merged. Registers, i.e.
+    # signals written by update_ff blocks, are the only allowed cuts.
+
+    for blk, reads in all_reads.items():
+      if blk in input_driven:
+        continue
+      for rd in reads:
+        w = rd.get_top_level_signal()
+        if w in writer and writer[w] not in update_ff:
+          union( blk, writer[w] )
+
+    for (u, v) in top.get_all_explicit_constraints()[0]:
+      if u in parent and v in parent:
+        union( u, v )
+
+    # Group the partitions into at most nworkers bins. Greedily put the
+    # largest partition into the lightest bin.
+
+    groups = defaultdict(list)
+    for blk in parent:
+      groups[ find(blk) ].append( blk )
+
+    nbins = min( self.nworkers, len(groups) )
+    bins  = [ set() for _ in range(nbins) ]
+    for group in sorted( groups.values(), key=len, reverse=True ):
+      min( bins, key=len ).update( group )
+
+    blk_bin = {}
+    for i, blks in enumerate( bins ):
+      for blk in blks:
+        blk_bin[ blk ] = i
+
+    # Collect signals owned by each bin and the registers each bin reads
+    # from other bins
+
+    owned   = [ set() for _ in range(nbins) ]
+    foreign = [ set() for _ in range(nbins) ]
+
+    for w, blk in writer.items():
+      owned[ blk_bin[blk] ].add( w )
+
+    for blk, reads in all_reads.items():
+      if blk in input_driven:
+        continue
+      i = blk_bin[ blk ]
+      for rd in reads:
+        w = rd.get_top_level_signal()
+        if w in writer and blk_bin[ writer[w] ] != i:
+          foreign[i].add( w )
+
+    for w in set().union( *owned ):
+      if not issubclass( w._dsl.Type, Bits ) and not is_bitstruct_class( w._dsl.Type ):
+        raise NotImplementedError( f"ParallelSchedulePass only supports Bits/bitstruct "
+                                   f"signals but {w!r} is {w._dsl.Type}" )
+
+    # Reuse the serial orders so each bin executes a subsequence of the
+    # serial schedule
+
+    top._sched.partitions = partitions = []
+    for i in range(nbins):
+      p = PassMetadata()
+      p.update_schedule = [ x for x in top._sched.update_schedule if blk_bin.get(x) == i ]
+      p.schedule_ff     = [ x for x in top._sched.schedule_ff     if blk_bin[x] == i ]
+      p.owned           = sorted( owned[i],   key=repr )
+      p.foreign         = sorted( foreign[i], key=repr )
+      p.registers       = { x for x in owned[i] if writer[x] in update_ff }
+      partitions.append( p )
+
+  #-----------------------------------------------------------------------
+  # gen_parallel_run_function
+  #-----------------------------------------------------------------------
+
+  @staticmethod
+  def gen_parallel_run_function( top ):
+    """ Generate sim_run_parallel( ncycles ). Called by PrepareSimPass
+    after lock_in_simulation. """
+
+    partitions = top._sched.partitions
+    flip = SimpleTickPass.gen_tick_function( top._sched.schedule_posedge_flip )
+    input_driven = SimpleTickPass.gen_tick_function( top._sched.input_driven_schedule )
+
+    # Allocate 64-bit words in the shared channel for every boundary
+    # register. The channel is double-buffered by the cycle parity.
+
+    channel = {}
+    nwords  = 0
+    for p in partitions:
+      for x in p.foreign:
+        if x not in channel:
+          channel[x] = nwords
+          nwords += ( x._dsl.Type.nbits + 63 ) // 64
+
+    for i, p in enumerate( partitions ):
+      publish = [ x for x in p.owned if x in channel ]
+      p.publish = gen_channel_func( top, f"publish_{i}", publish, channel, True )
+      p.receive = gen_channel_func( top, f"receive_{i}", p.foreign, channel, False )
+      p.comb    = SimpleTickPass.gen_tick_function( p.update_schedule )
+      p.ff      = SimpleTickPass.gen_tick_function( p.schedule_ff )
+
+    def worker( p, ncycles, buf, barrier, conn ):
+      try:
+        comb, ff, publish, receive = p.comb, p.ff, p.publish, p.receive
+        base = 0
+        for _ in range( ncycles ):
+          comb()
+          ff()
+          flip()
+          publish( buf, base )
+          barrier.wait()
+          receive( buf, base )
+          base = nwords - base
+        comb()
+
+        conn.send( ( None, [ get_signal_state( top, x, x in p.registers )
+                             for x in p.owned ] ) )
+      except BaseException as e:
+        barrier.abort()
+        conn.send( ( repr(e), None ) )
+      finally:
+        conn.close()
+
+    def sim_run_parallel( ncycles ):
+      top._sim.check_top_level_inports()
+
+      if ncycles <= 0:
+        return 0
+
+      input_driven()
+
+      ctx = multiprocessing.get_context( "fork" )
+      buf = ctx.RawArray( 'Q', max( 2 * nwords, 1 ) )
+      barrier = ctx.Barrier( len(partitions) )
+
+      procs, conns = [], []
+      for p in partitions:
+        recv_conn, send_conn = ctx.Pipe( duplex=False )
+        proc = ctx.Process( target=worker, args=( p, ncycles, buf, barrier, send_conn ) )
+        proc.start()
+        send_conn.close()
+        procs.append( proc )
+        conns.append( recv_conn )
+
+      results = [ conn.recv() for conn in conns ]
+      for proc in procs:
+        proc.join()
+
+      errors = [ err for err, _ in results if err is not None ]
+      if errors:
+        raise RuntimeError( "Worker process failed in sim_run_parallel:\n - " + "\n - ".join( errors ) )
+
+      # Signals shared by several partitions after net consolidation
+      # agree on _uint, and only the writer of a register sends _next
+      for p, (_, states) in zip( partitions, results ):
+        for x, state in zip( p.owned, states ):
+          set_signal_state( top, x, state )
+
+      top._sim.simulated_cycles += ncycles
+      return ncycles
+
+    return sim_run_parallel
+
+#-------------------------------------------------------------------------
+# Helper functions
+#-------------------------------------------------------------------------
+
+def gen_channel_func( top, name, signals, channel, is_publish ):
+  """ Generate a function that either copies the values of signals into
+  the shared buffer (publish) or pulls them out of the buffer (receive).
+  Values wider than 64 bits are split into multiple words. """
+
+  _globals = { 's': top }
+  srcs = []
+
+  for x in signals:
+    nbits = x._dsl.Type.nbits
+    base  = channel[x]
+    n     = ( nbits + 63 ) // 64
+    if is_publish:
+      if is_bitstruct_class( x._dsl.Type ):
+        srcs.append( f"v = int({x!r}.to_bits())" )
+      else:
+        srcs.append( f"v = int({x!r})" )
+      for k in range(n):
+        srcs.append( f"buf[base+{base+k}] = (v >> {64*k}) & 0xffffffffffffffff" )
+    else:
+      _globals[ f"Bits{nbits}" ] = mk_bits( nbits )
+      words = " | ".join( [ f"(buf[base+{base+k}] << {64*k})" for k in range(n) ] )
+      srcs.append( f"{x!r} @= Bits{nbits}( {words} )" )
+
+  if not srcs:
+    srcs = [ "pass" ]
+
+  src = f"def {name}( buf, base ):\n  " + "\n  ".join( srcs )
+  _locals = {}
+  custom_exec( compile( src, filename=name, mode="exec" ), _globals, _locals )
+  return _locals[ name ]
+
+def _leaf_bits( obj ):
+  if isinstance( obj, Bits ):
+    yield obj
+  elif isinstance( obj, list ):
+    for x in obj:
+      yield from _leaf_bits( x )
+  else:
+    for name in obj.__bitstruct_fields__:
+      yield from _leaf_bits( getattr( obj, name ) )
+
+def get_signal_state( top, x, is_register ):
+  obj = top._sim.signal_object_mapping[x][-1]
+  if is_register:
+    return [ (b._uint, getattr( b, '_next', None )) for b in _leaf_bits( obj ) ]
+  return [ (b._uint, None) for b in _leaf_bits( obj ) ]
+
+def set_signal_state( top, x, state ):
+  obj = top._sim.signal_object_mapping[x][-1]
+  for b, (uint, nxt) in zip( _leaf_bits( obj ), state ):
+    b._uint = uint
+    if nxt is not None:
+      b._next = nxt
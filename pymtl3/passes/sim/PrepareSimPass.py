@@ -7,9 +7,13 @@ Author : Shunning Jiang
 Date   : Jan 26, 2020
 """
 
+import linecache
+
 import py
 
 from pymtl3.datatypes import Bits, b1
+from pymtl3.datatypes.bitstructs import is_bitstruct_inst
+from pymtl3.datatypes.PythonBits import Bits as PythonBits
 from pymtl3.dsl.Component import Component
 from pymtl3.dsl.Connectable import Const, Interface, MethodPort, Signal
 from pymtl3.dsl.NamedObject import NamedObject
@@ -22,19 +26,25 @@ from pymtl3.passes.tracing.LineTraceParamPass import LineTraceParamPass
 from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
 from pymtl3.passes.tracing.VcdGenerationPass import VcdGenerationPass
 
+from .ParallelSchedulePass import ParallelSchedulePass
+from .SimCheckpoint import load_sim_checkpoint, save_sim_checkpoint
 from .SimpleTickPass import SimpleTickPass
+from .SpecializeUpblkPass import SpecializeUpblkPass
 
 
 class PrepareSimPass( BasePass ):
-  def __init__( self, print_line_trace=True, reset_active_high=True ):
+  def __init__( self, print_line_trace=True, reset_active_high=True, packed_ff=False ):
     assert reset_active_high in [ True, False ]
 
     self.print_line_trace  = print_line_trace
     self.reset_active_high = reset_active_high
+    self.packed_ff         = packed_ff
 
   def __call__( self, top ):
     if hasattr(top, "sim_reset"):
       raise AttributeError( "Please rename the attribute top.sim_reset")
+    if hasattr(top, "sim_run"):
+      raise AttributeError( "Please rename the attribute top.sim_run")
     if hasattr(top, "print_line_trace"):
       raise AttributeError( "Please modify the attribute top.print_line_trace")
     if not hasattr( top, "_sched" ):
@@ -54,21 +64,44 @@ class PrepareSimPass( BasePass ):
 
     top.lock_in_simulation()
 
+    if self.packed_ff:
+      self.pack_double_buffers( top )
+
+    if top.has_metadata( SpecializeUpblkPass.specialized_upblks ):
+      self.swap_specialized_upblks( top )
+
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
+    self.create_sim_run( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
+
+    if hasattr( top._sched, "partitions" ):
+      self.create_sim_run_parallel( top )
 
 
   def create_sim_eval_comb( self, top ):
+    method_ports = top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) )
+
     # Pure RTL design, add eval_combinational
-    if len( top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) ) == 0 and \
-       len( top.get_all_update_once() ) == 0:
+    if len( method_ports ) == 0 and len( top.get_all_update_once() ) == 0:
       sim_eval_combinational = SimpleTickPass.gen_tick_function( [top._sim.check_top_level_inports] + top._sched.update_schedule )
+      # Evaluate many input vectors in one call without going through the
+      # testbench for each of them
+      sim_eval_combinational_batch = SimpleTickPass.gen_eval_batch_function( top._sched.update_schedule,
+                                                                             top._sim.check_top_level_inports )
     else:
+      if method_ports:
+        msg = f"top is not a pure RTL design. {'top'+repr(list(method_ports)[0])[1:]} is a method port."
+      else:
+        msg = "top is not a pure RTL design. It has update_once blocks."
       def sim_eval_combinational():
-        raise NotImplementedError(f"top is not a pure RTL design. {'top'+repr(list(method_ports)[0])[1:]} is a method port.")
+        raise NotImplementedError( msg )
+      def sim_eval_combinational_batch( in_ports, rows, out_ports ):
+        raise NotImplementedError( msg )
 
     top.sim_eval_combinational = sim_eval_combinational
+    top.sim_eval_combinational_batch = sim_eval_combinational_batch
 
   def create_sim_tick( self, top ):
     final_schedule = []
@@ -85,10 +118,37 @@ class PrepareSimPass( BasePass ):
     final_schedule.append( top._sim.check_top_level_inports )
     top.sim_tick = SimpleTickPass.gen_tick_function( final_schedule )
 
-  def collect_ff_funcs( self, top ):
-    # ff_funcs summarizes the execution at the clock edge
+  def create_sim_run( self, top ):
+    # Same per-cycle schedule as sim_tick, but the top-level inport check
+    # is hoisted out of the loop since the testbench cannot touch the
+    # inports in the middle of sim_run anyway.
+    final_schedule = []
+
+    if len( top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) ) == 0 and \
+       len( top.get_all_update_once() ) == 0:
+      final_schedule = top._sched.update_schedule[::]
+
+    if self.print_line_trace and hasattr( top, 'line_trace' ):
+      final_schedule.append( top.print_line_trace )
+    final_schedule += self.collect_ff_funcs( top )
+    final_schedule += top._sched.update_schedule
+    top.sim_run = SimpleTickPass.gen_run_function( final_schedule, top._sim.check_top_level_inports )
+
+  def create_sim_run_parallel( self, top ):
+    # Tracing hooks only exist in the parent process
+    if top.has_metadata( VcdGenerationPass.vcd_func ) or \
+       top.has_metadata( PrintTextWavePass.textwave_func ) or \
+       top.has_metadata( VerilogTBGenPass.vtbgen_hooks ):
+      def sim_run_parallel( ncycles ):
+        raise NotImplementedError("sim_run_parallel doesn't support waveform/testbench generation.")
+    else:
+      sim_run_parallel = ParallelSchedulePass.gen_parallel_run_function( top )
+
+    top.sim_run_parallel = sim_run_parallel
+
+  def collect_trace_funcs( self, top ):
+    # tracing related work at the clock edge
     ret = []
-    # append tracing related work
     if top.has_metadata( VcdGenerationPass.vcd_func ):
       ret.append( top.get_metadata( VcdGenerationPass.vcd_func ) )
 
@@ -98,6 +158,11 @@ class PrepareSimPass( BasePass ):
     if top.has_metadata( VerilogTBGenPass.vtbgen_hooks ):
       ret.extend( top.get_metadata( VerilogTBGenPass.vtbgen_hooks ) )
 
+    return ret
+
+  def collect_ff_funcs( self, top ):
+    # ff_funcs summarizes the execution at the clock edge
+    ret = self.collect_trace_funcs( top )
     ret.extend( top._sched.schedule_ff )
     ret.extend( top._sched.schedule_posedge_flip )
     ret.append( self.create_advance_sim_cycle( top ) )
@@ -155,12 +220,94 @@ class PrepareSimPass( BasePass ):
       top._sim.simulated_cycles += 1
     return advance_sim_cycle
 
+  @staticmethod
+  def create_sim_checkpoint( top ):
+    def sim_checkpoint( path ):
+      save_sim_checkpoint( top, path )
+    def sim_restore( path ):
+      load_sim_checkpoint( top, path )
+      # The restored values didn't go through the update blocks
+      if hasattr( top._sched, "activity_reset" ):
+        top._sched.activity_reset()
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+
   @staticmethod
   def create_sim_cycle_count( top ):
     def sim_cycle_count():
       return top._sim.simulated_cycles
     top.sim_cycle_count = sim_cycle_count
 
+  @staticmethod
+  def pack_double_buffers( top ):
+    """ Replace schedule_posedge_flip with one function that flips every
+    double-buffered Bits object directly.
+
+    The default flip function is generated before lock_in_simulation, so
+    it has to walk the attribute path of every signal and call _flip()
+    on it. After the lock, the Bits objects of all registers (including
+    the fields of bitstruct registers) are final, so we collect them in
+    a flat list, bind each one to a global of the generated function,
+    and emit straight-line "_uint = _next" assignments. The Bits
+    classes are left untouched, so reads and writes of registers cost
+    exactly the same as before. """
+
+    def leaf_bits( obj ):
+      if isinstance( obj, Bits ):
+        yield obj
+      elif isinstance( obj, list ):
+        for x in obj:
+          yield from leaf_bits( x )
+      elif is_bitstruct_inst( obj ):
+        for name in obj.__bitstruct_fields__:
+          yield from leaf_bits( getattr( obj, name ) )
+      else:
+        raise TypeError( f"packed_ff only supports Bits/bitstruct registers, not {type(obj)}" )
+
+    if Bits is not PythonBits:
+      raise NotImplementedError( "packed_ff requires the pure-Python Bits implementation." )
+
+    packed = []
+    visited = set()
+    for x in top._dsl.all_signals:
+      if not x._dsl.needs_double_buffer:
+        continue
+      for b in leaf_bits( top._sim.signal_object_mapping[x][-1] ):
+        if id(b) not in visited:
+          visited.add( id(b) )
+          packed.append( b )
+
+    lines = [ 'def packed_posedge_flip():' ] + \
+            [ f'  b{i}._uint = b{i}._next' for i in range(len(packed)) ] + \
+            [ '  pass' ]
+
+    _globals = { f'b{i}': b for i, b in enumerate(packed) }
+    custom_exec( compile( '\n'.join(lines), filename='packed_ff_flips', mode='exec' ), _globals, _globals )
+    linecache.cache['packed_ff_flips'] = (1, None, lines, 'packed_ff_flips')
+
+    top._sim.packed_ff = packed
+    top._sched.schedule_posedge_flip = [ _globals['packed_posedge_flip'] ]
+
+  @staticmethod
+  def swap_specialized_upblks( top ):
+    """ Replace the update blocks compiled by SpecializeUpblkPass with the
+    int versions bound to the signal values. This has to happen after
+    lock_in_simulation because the generated code accesses the Bits
+    objects directly. """
+
+    swapped = {}
+    for blk, bind in top.get_metadata( SpecializeUpblkPass.specialized_upblks ).items():
+      new_blk = bind()
+      if new_blk is not None:
+        swapped[ blk ] = new_blk
+
+    top._sched.update_schedule = [ swapped.get( x, x ) for x in top._sched.update_schedule ]
+    top._sched.schedule_ff     = [ swapped.get( x, x ) for x in top._sched.schedule_ff ]
+
+    # The evaluators of ActivitySchedulePass index into these lists
+    for blks in getattr( top._sched, "activity_blocks", {} ).values():
+      blks[:] = [ swapped.get( x, x ) for x in blks ]
+
   @staticmethod
   def create_lock_unlock_simulation( top ):
 
@@ -0,0 +1,254 @@
+"""
+========================================================================
+SimCheckpoint.py
+========================================================================
+Save and restore the full state of a simulated model so that a long
+simulation can be resumed from a point of interest instead of from
+reset. PrepareSimPass exposes these as top.sim_checkpoint( path ) and
+top.sim_restore( path ).
+
+A checkpoint contains
+- the current (and next, for registers) value of every signal after
+  lock_in_simulation,
+- the Python-level state of every component, e.g. StreamSourceFL.idx or
+  BehavioralMemory.mem,
+- the number of simulated cycles.
+
+The Python-level state of a component is the set of its public
+attributes that are not part of the model hierarchy (components,
+signals, interfaces) and not callable. A component can take over by
+defining checkpoint_state( s ), which returns a picklable object, and
+restore_state( s, state ). Imported Verilator models use this to save
+the verilated model with Verilator's save/restore. State that lives
+only in the closure of an update block cannot be saved.
+
+The model has to be elaborated and simulated with the same passes before
+a checkpoint can be restored, either in the same process or in a new
+one.
+
+Date   : Oct 18, 2026
+"""
+import io
+import mmap
+import pickle
+import zlib
+from collections import deque
+
+from pymtl3.datatypes import Bits, mk_bits
+from pymtl3.datatypes.bitstructs import is_bitstruct_class, is_bitstruct_inst
+from pymtl3.dsl.Component import Component
+from pymtl3.dsl.NamedObject import NamedObject
+
+from .ParallelSchedulePass import _leaf_bits
+
+MAGIC = b"PYMTLCKPT1\n"
+
+#-------------------------------------------------------------------------
+# Signals
+#-------------------------------------------------------------------------
+
+def _get_signal_values( top ):
+  # Signals in the same net share one value object after
+  # lock_in_simulation. Keep the first signal of each.
+  signals, values, visited = [], [], set()
+  for x, (_, _, _, value) in top._sim.signal_object_mapping.items():
+    if id(value) not in visited:
+      visited.add( id(value) )
+      signals.append( x )
+      values.append( value )
+  return signals, values
+
+def _get_fingerprint( top, signals ):
+  return ( top.__class__.__name__,
+           zlib.crc32( "\n".join( [ repr(x) for x in signals ] ).encode() ) )
+
+#-------------------------------------------------------------------------
+# Python-level component state
+#-------------------------------------------------------------------------
+
+def _is_model_object( obj, signal_value_ids ):
+  if isinstance( obj, NamedObject ) or id(obj) in signal_value_ids:
+    return True
+  if isinstance( obj, dict ):
+    obj = list( obj.values() )
+  if isinstance( obj, (list, tuple, set, deque) ):
+    return any( _is_model_object( x, signal_value_ids ) for x in obj )
+  return False
+
+def _get_component_state( c, signal_value_ids ):
+  if hasattr( c, 'checkpoint_state' ):
+    return c.checkpoint_state()
+
+  state = {}
+  for name, obj in c.__dict__.items():
+    # Slices of signals use tuple keys
+    if not isinstance( name, str ) or name[0] == '_':
+      continue
+    if callable( obj ) or _is_model_object( obj, signal_value_ids ):
+      continue
+    state[ name ] = obj
+  return state
+
+def _restore_attr( c, name, value ):
+  # Update mutable containers in place because update blocks may hold
+  # references to them
+  current = c.__dict__.get( name )
+  if isinstance( current, (list, bytearray) ) or \
+     ( isinstance( current, mmap.mmap ) and len(current) == len(value) ):
+    current[:] = value
+  elif isinstance( current, dict ) and isinstance( value, dict ):
+    current.clear()
+    current.update( value )
+  elif isinstance( current, set ) and isinstance( value, set ):
+    current.clear()
+    current.update( value )
+  elif isinstance( current, deque ) and isinstance( value, deque ):
+    current.clear()
+    current.extend( value )
+  else:
+    setattr( c, name, value )
+
+def _restore_component_state( c, state ):
+  if hasattr( c, 'restore_state' ):
+    c.restore_state( state )
+  else:
+    for name, value in state.items():
+      _restore_attr( c, name, value )
+
+#-------------------------------------------------------------------------
+# Pickling Bits and bitstructs
+#-------------------------------------------------------------------------
+# Bitstruct classes are often created inside functions (e.g., mk_mem_msg)
+# and cannot be pickled by reference. They are stored by value and looked
+# up among the bitstruct types of the model when the checkpoint is loaded.
+
+def _bitstruct_key( cls ):
+  def field_key( t ):
+    if isinstance( t, list ):
+      return tuple( field_key( x ) for x in t )
+    if is_bitstruct_class( t ):
+      return _bitstruct_key( t )
+    return t.__name__
+  return ( cls.__qualname__,
+           tuple( (name, field_key(t)) for name, t in cls.__bitstruct_fields__.items() ) )
+
+def _get_bitstruct_classes( top ):
+  classes = {}
+  def add( t ):
+    if isinstance( t, list ):
+      for x in t:
+        add( x )
+    elif is_bitstruct_class( t ):
+      classes[ _bitstruct_key( t ) ] = t
+      for x in t.__bitstruct_fields__.values():
+        add( x )
+  for x in top._dsl.all_signals:
+    add( x._dsl.Type )
+  return classes
+
+class _StatePickler( pickle.Pickler ):
+  def __init__( s, f, classes ):
+    super().__init__( f, protocol=pickle.HIGHEST_PROTOCOL )
+    s.classes = classes
+
+  def persistent_id( s, obj ):
+    if isinstance( obj, Bits ):
+      return ( 'bits', obj.nbits, int(obj) )
+    if is_bitstruct_inst( obj ):
+      key = _bitstruct_key( obj.__class__ )
+      if key in s.classes:
+        return ( 'bitstruct', key, int(obj.to_bits()) )
+    if isinstance( obj, mmap.mmap ):
+      return ( 'bytes', bytes(obj) )
+    return None
+
+class _StateUnpickler( pickle.Unpickler ):
+  def __init__( s, f, classes ):
+    super().__init__( f )
+    s.classes = classes
+
+  def persistent_load( s, pid ):
+    kind = pid[0]
+    if kind == 'bits':
+      return mk_bits( pid[1] )( pid[2] )
+    if kind == 'bitstruct':
+      cls = s.classes.get( pid[1] )
+      if cls is None:
+        raise pickle.UnpicklingError( f"The model has no bitstruct {pid[1][0]} "
+                                      f"to restore the checkpoint" )
+      return cls.from_bits( mk_bits( cls.nbits )( pid[2] ) )
+    if kind == 'bytes':
+      return pid[1]
+    raise pickle.UnpicklingError( f"Unknown persistent id {kind}" )
+
+#-------------------------------------------------------------------------
+# save_sim_checkpoint/load_sim_checkpoint
+#-------------------------------------------------------------------------
+
+def save_sim_checkpoint( top, path ):
+  signals, values = _get_signal_values( top )
+  signal_value_ids = { id(x) for x in values }
+
+  uints, nexts = [], []
+  for value in values:
+    for b in _leaf_bits( value ):
+      uints.append( b._uint )
+      nexts.append( getattr( b, '_next', None ) )
+
+  classes = _get_bitstruct_classes( top )
+
+  components = {}
+  for c in top.get_all_object_filter( lambda x: isinstance( x, Component ) ):
+    state = _get_component_state( c, signal_value_ids )
+    if not state and not hasattr( c, 'checkpoint_state' ):
+      continue
+
+    f = io.BytesIO()
+    try:
+      _StatePickler( f, classes ).dump( state )
+    except Exception as e:
+      raise TypeError( f"Cannot save the Python-level state of {c!r}: {e}. Please "
+                       f"define checkpoint_state/restore_state for {c.__class__.__name__}." ) from e
+    components[ repr(c) ] = f.getvalue()
+
+  payload = pickle.dumps( {
+    'fingerprint': _get_fingerprint( top, signals ),
+    'cycles'     : top._sim.simulated_cycles,
+    'uints'      : uints,
+    'nexts'      : nexts,
+    'components' : components,
+  }, protocol=pickle.HIGHEST_PROTOCOL )
+
+  with open( path, 'wb' ) as out:
+    out.write( MAGIC )
+    out.write( zlib.compress( payload, 1 ) )
+
+def load_sim_checkpoint( top, path ):
+  with open( path, 'rb' ) as f:
+    if f.read( len(MAGIC) ) != MAGIC:
+      raise ValueError( f"{path} is not a PyMTL simulation checkpoint" )
+    ckpt = pickle.loads( zlib.decompress( f.read() ) )
+
+  signals, values = _get_signal_values( top )
+  if ckpt['fingerprint'] != _get_fingerprint( top, signals ):
+    raise ValueError( f"Checkpoint {path} was saved from a different model than "
+                      f"{top.__class__.__name__}" )
+
+  uints, nexts = ckpt['uints'], ckpt['nexts']
+  i = 0
+  for value in values:
+    for b in _leaf_bits( value ):
+      b._uint = uints[i]
+      if nexts[i] is not None:
+        b._next = nexts[i]
+      i += 1
+
+  classes = _get_bitstruct_classes( top )
+  components = ckpt['components']
+  for c in top.get_all_object_filter( lambda x: isinstance( x, Component ) ):
+    name = repr(c)
+    if name in components:
+      state = _StateUnpickler( io.BytesIO( components[ name ] ), classes ).load()
+      _restore_component_state( c, state )
+
+  top._sim.simulated_cycles = ckpt['cycles']
@@ -5,12 +5,26 @@ SimpleSchedulePass.py
 Generate a simple schedule (no Mamba techniques here) based on the
 DAG generated by some previous pass.
 
+The order among blocks that are ready at the same time is chosen by
+- order='random' (default): pick a random ready block at every step. With
+  a seed, the blocks are first sorted by a name that is stable across
+  runs and picked with random.Random( seed ), so the same design always
+  gets the same schedule.
+- order='locality': prefer the ready blocks that read a signal written by
+  the previously scheduled block, then the ones in the same component,
+  then the first one by name. This keeps related blocks next to each
+  other in the generated tick function.
+
 Author : Shunning Jiang
 Date   : Dec 26, 2018
 """
 import linecache
+import random
 from collections import defaultdict
+from heapq import heappop, heappush
 
+from pymtl3.dsl import CalleePort
+from pymtl3.dsl.Connectable import Signal
 from pymtl3.dsl.errors import UpblkCyclicError
 from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass, PassMetadata
@@ -18,11 +32,17 @@ from pymtl3.passes.errors import PassOrderError
 
 
 class SimpleSchedulePass( BasePass ):
+  def __init__( self, order='random', seed=None ):
+    assert order in [ 'random', 'locality' ]
+    self.order = order
+    self.seed  = seed
+
   def __call__( self, top ):
     if not hasattr( top._dag, "all_constraints" ):
       raise PassOrderError( "all_constraints" )
 
     top._sched = PassMetadata()
+    top._sched.schedule_order = ( self.order, self.seed )
 
     self.schedule_intra_cycle( top )
     self.schedule_ff( top )
@@ -52,21 +72,121 @@ class SimpleSchedulePass( BasePass ):
 
     # Perform topological sort for a serial schedule.
 
-    top._sched.update_schedule = update_schedule = []
+    if self.order == 'locality':
+      update_schedule = self.locality_topo_sort( top, V, Es, InD )
+
+    else:
+      update_schedule = []
+
+      if self.seed is None:
+        rng = random
+        Q = [ v for v in V if not InD[v] ]
+      else:
+        # Fix the order of everything the shuffles depend on
+        rng  = random.Random( self.seed )
+        rank = { v: i for i, v in enumerate( sorted( V, key=lambda x: get_block_label( top, x ) ) ) }
+        for u in Es:
+          Es[u].sort( key=rank.get )
+        Q = sorted( [ v for v in V if not InD[v] ], key=rank.get )
+
+      # Pick a random ready block. This is what shuffling the whole
+      # queue before every pop did, without the quadratic cost.
+      while Q:
+        i = rng.randrange( len(Q) )
+        Q[i], Q[-1] = Q[-1], Q[i]
+        u = Q.pop()
+        update_schedule.append( u )
+        for v in Es[u]:
+          InD[v] -= 1
+          if not InD[v]:
+            Q.append( v )
+
+    top._sched.update_schedule = update_schedule
+
+    check_schedule( top, update_schedule, V, E, InD )
 
-    Q = [ v for v in V if not InD[v] ]
+  def locality_topo_sort( self, top, V, Es, InD ):
+
+    # Collect the top-level signals each block reads and writes
+
+    upblk_reads, upblk_writes, _ = top.get_all_upblk_metadata()
+
+    def get_signals( blk, upblk_data, genblk_data ):
+      data = upblk_data if blk in upblk_data else genblk_data
+      return { x.get_top_level_signal() for x in data.get( blk, () ) if isinstance( x, Signal ) }
+
+    reads, writes, hosts = {}, {}, {}
+    readers = defaultdict(set)
+
+    for v in V:
+      reads [v] = get_signals( v, upblk_reads,  top._dag.genblk_reads  )
+      writes[v] = get_signals( v, upblk_writes, top._dag.genblk_writes )
+      for x in reads[v]:
+        readers[x].add( v )
+
+      if isinstance( v, CalleePort ):
+        hosts[v] = v.get_host_component()
+      elif v in top._dsl.all_upblk_hostobj:
+        hosts[v] = top._dsl.all_upblk_hostobj[v]
+      elif reads[v]:
+        # A net block belongs to the component of the writer
+        hosts[v] = next( iter( reads[v] ) ).get_host_component()
+      else:
+        hosts[v] = top
 
-    import random
-    while Q:
-      random.shuffle(Q)
-      u = Q.pop()
+    # Break ties by a name that is stable across runs
+
+    order = sorted( V, key=lambda x: get_block_label( top, x ) )
+    rank  = { v: i for i, v in enumerate( order ) }
+
+    # Ready blocks are kept in one heap of ranks per component and one for
+    # the whole design. Scheduled blocks are removed from the heaps lazily.
+
+    ready   = set()
+    heap    = []
+    by_host = defaultdict(list)
+
+    def push( v ):
+      ready.add( v )
+      heappush( heap, rank[v] )
+      heappush( by_host[ hosts[v] ], rank[v] )
+
+    def first_ready( h ):
+      while h and order[ h[0] ] not in ready:
+        heappop( h )
+      return order[ h[0] ] if h else None
+
+    for v in order:
+      if not InD[v]:
+        push( v )
+
+    update_schedule = []
+    last = None
+
+    while ready:
+      u = None
+      if last is not None:
+        # Blocks that read what the last block just wrote, preferably in
+        # the same component, and then the rest of the same component
+        cands = { v for x in writes[last] for v in readers[x] if v in ready }
+        if cands:
+          u = min( cands, key=lambda v: ( hosts[v] is not hosts[last], rank[v] ) )
+        else:
+          u = first_ready( by_host[ hosts[last] ] )
+
+      if u is None:
+        u = first_ready( heap )
+
+      ready.remove( u )
       update_schedule.append( u )
+      last = u
+
       for v in Es[u]:
         InD[v] -= 1
         if not InD[v]:
-          Q.append( v )
+          push( v )
 
-    check_schedule( top, update_schedule, V, E, InD )
+    return update_schedule
 
   def schedule_ff( self, top ):
 
@@ -146,10 +266,15 @@ class SimpleSchedulePass( BasePass ):
       linecache.cache['ff_flips'] = (1, None, lines, 'ff_flips')
       top._sched.schedule_posedge_flip = [ l['compile_double_buffer']( top ) ]
 
+def get_block_label( top, blk ):
+  """ Return a name of blk that doesn't change across runs. """
+  if isinstance( blk, CalleePort ):
+    return repr(blk)
+  return f"{top._dsl.all_upblk_hostobj.get( blk )!r}.{blk.__name__}"
+
 def dump_dag( top, V, E ):
   from graphviz import Digraph
 
-  from pymtl3.dsl import CalleePort
   dot = Digraph()
   dot.graph_attr["rank"] = "same"
   dot.graph_attr["ratio"] = "compress"
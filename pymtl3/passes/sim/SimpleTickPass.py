@@ -7,8 +7,11 @@ Generate a simple tick function (no Mamba techniques here)
 Author : Shunning Jiang
 Date   : Dec 26, 2018
 """
+import linecache
+
 from pymtl3.dsl import MethodPort
 from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
@@ -27,3 +30,81 @@ class SimpleTickPass( BasePass ):
       for blk in schedule:
         blk()
     return iterative
+
+  @staticmethod
+  def gen_run_function( schedule, check_func ):
+    """ Generate sim_run( ncycles, stop_when=None, check_every=1 ) that
+    executes the per-cycle schedule ncycles times inside one generated
+    loop. check_func is called once before and once after the loop.
+    stop_when is only evaluated every check_every cycles. Returns the
+    number of cycles that were actually executed. """
+
+    body = [ f"      _{i}()" for i in range(len(schedule)) ]
+    if not body:
+      body = [ "      pass" ]
+
+    lines = [
+      'def compile_run( schedule, check_func ):',
+      '  ' + '; '.join( [ f"_{i} = schedule[{i}]" for i in range(len(schedule)) ] + [ 'pass' ] ),
+      '  def sim_run( ncycles, stop_when=None, check_every=1 ):',
+      '    check_func()',
+      '    if stop_when is None:',
+      '      for _ in range( ncycles ):',
+      *[ '  '+x for x in body ],
+      '      check_func()',
+      '      return ncycles',
+      '    if check_every < 1:',
+      '      raise ValueError( f"check_every must be positive, not {check_every}" )',
+      '    cycles = 0',
+      '    while cycles < ncycles:',
+      '      n = min( check_every, ncycles - cycles )',
+      '      for _ in range( n ):',
+      *[ '  '+x for x in body ],
+      '      cycles += n',
+      '      if stop_when():',
+      '        break',
+      '    check_func()',
+      '    return cycles',
+      '  return sim_run',
+    ]
+
+    # Same as schedule_posedge_flip, use compile + linecache instead of
+    # py.code.Source since the body can be huge for large designs.
+    l = {}
+    custom_exec( compile( '\n'.join(lines), filename='sim_run', mode='exec' ), {}, l )
+    linecache.cache['sim_run'] = (1, None, lines, 'sim_run')
+    return l['compile_run']( schedule, check_func )
+
+  @staticmethod
+  def gen_eval_batch_function( schedule, check_func ):
+    """ Generate sim_eval_combinational_batch( in_ports, rows, out_ports )
+    that, for each row of input values, assigns the values to in_ports,
+    executes the combinational schedule once, and records a copy of the
+    values of out_ports. Returns the list of output tuples. check_func is
+    called once before and once after the loop. """
+
+    body = [ f"      _{i}()" for i in range(len(schedule)) ]
+
+    lines = [
+      'def compile_eval_batch( schedule, check_func ):',
+      '  ' + '; '.join( [ f"_{i} = schedule[{i}]" for i in range(len(schedule)) ] + [ 'pass' ] ),
+      '  def sim_eval_combinational_batch( in_ports, rows, out_ports ):',
+      '    check_func()',
+      '    in_ports  = tuple( in_ports )',
+      '    out_ports = tuple( out_ports )',
+      '    results = []',
+      '    append  = results.append',
+      '    for row in rows:',
+      '      for port, value in zip( in_ports, row ):',
+      '        port @= value',
+      *body,
+      '      append( tuple( [ port.clone() for port in out_ports ] ) )',
+      '    check_func()',
+      '    return results',
+      '  return sim_eval_combinational_batch',
+    ]
+
+    l = {}
+    custom_exec( compile( '\n'.join(lines), filename='sim_eval_combinational_batch', mode='exec' ), {}, l )
+    linecache.cache['sim_eval_combinational_batch'] = (1, None, lines, 'sim_eval_combinational_batch')
+    return l['compile_eval_batch']( schedule, check_func )
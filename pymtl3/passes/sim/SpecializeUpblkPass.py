@@ -0,0 +1,562 @@
+"""
+========================================================================
+SpecializeUpblkPass.py
+========================================================================
+Regenerate translatable update blocks as straight-line Python code over
+plain ints.
+
+The original update blocks operate on Bits objects, so every
+s.x @= s.y + s.z goes through Bits.__add__, the width checks and
+Bits.__imatmul__. This pass generates the behavioral RTLIR of each
+scheduled update block, type checks it, and emits an equivalent function
+that reads and writes the _uint/_next fields of the signal values
+directly and masks the results with precomputed constants:
+
+  def up_add():
+    _o0._uint = (_o1._uint + _o2._uint) & 0xff
+
+The Bits objects only exist after lock_in_simulation, so the pass only
+compiles the functions. PrepareSimPass binds them to the signal values
+and swaps them into update_schedule and schedule_ff after locking in the
+simulation. Blocks that are not translatable (e.g., blocks that call
+methods or use bitstructs as a whole) are left untouched; the reason is
+recorded in unspecialized_upblks.
+
+Temporary variables follow the translation semantics, i.e., they hold a
+copy of the value instead of an alias to the signal.
+
+Date   : Oct 18, 2026
+"""
+import ast
+import sys
+from linecache import cache as line_cache
+
+from pymtl3.datatypes import Bits
+from pymtl3.datatypes.PythonBits import Bits as PythonBits
+from pymtl3.dsl import MetadataKey
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.BasePass import BasePass
+from pymtl3.passes.errors import PassOrderError
+from pymtl3.passes.rtlir import BehavioralRTLIR as bir
+from pymtl3.passes.rtlir import RTLIRDataType as rdt
+from pymtl3.passes.rtlir import RTLIRType as rt
+from pymtl3.passes.rtlir.behavioral.BehavioralRTLIRGenL5Pass import (
+    BehavioralRTLIRGeneratorL5,
+)
+from pymtl3.passes.rtlir.behavioral.BehavioralRTLIRTypeCheckL5Pass import (
+    BehavioralRTLIRTypeCheckVisitorL5,
+)
+
+
+class SpecializeUpblkPass( BasePass ):
+
+  #: A dictionary that maps update blocks to functions that return the
+  #: specialized block bound to the signal values, or None if the values
+  #: are not what the generated code expects. Only valid after
+  #: lock_in_simulation.
+  #:
+  #: Type: ``dict``; output
+  specialized_upblks = MetadataKey()
+
+  #: A dictionary that maps the update blocks that are not specialized to
+  #: the reason.
+  #:
+  #: Type: ``dict``; output
+  unspecialized_upblks = MetadataKey()
+
+  def __call__( self, top ):
+    if not hasattr( top, "_sched" ):
+      raise PassOrderError( "_sched" )
+    if not hasattr( top._sched, "update_schedule" ):
+      raise PassOrderError( "update_schedule" )
+    if not hasattr( top._sched, "schedule_ff" ):
+      raise PassOrderError( "schedule_ff" )
+    if hasattr( top, "_sim" ) and getattr( top._sim, "locked_simulation", False ):
+      raise Exception( "SpecializeUpblkPass has to be applied before PrepareSimPass!" )
+
+    if Bits is not PythonBits:
+      raise NotImplementedError( "SpecializeUpblkPass requires the pure-Python Bits implementation." )
+
+    rtlir_getter = rt.RTLIRGetter( cache=True )
+    upblks = top.get_all_update_blocks()
+    upblk_ffs = top.get_all_update_ff()
+
+    specialized, unspecialized = {}, {}
+
+    # ActivitySchedulePass keeps the scheduled blocks behind its evaluators
+    activity_blocks = getattr( top._sched, "activity_blocks", {} )
+    scheduled = []
+    for blk in top._sched.update_schedule + top._sched.schedule_ff:
+      scheduled.extend( activity_blocks.get( blk, [ blk ] ) )
+
+    for blk in scheduled:
+      # Skip net blocks, greenlet wrappers and SCC blocks
+      if blk not in upblks or blk in specialized or blk in unspecialized:
+        continue
+
+      m = top.get_update_block_host_component( blk )
+      upblk_type = bir.SeqUpblk if blk in upblk_ffs else bir.CombUpblk
+      try:
+        specialized[ blk ] = self.specialize_upblk( m, blk, upblk_type, rtlir_getter )
+      except Exception as e:
+        unspecialized[ blk ] = f"{type(e).__name__}: {e}"
+
+    top.set_metadata( SpecializeUpblkPass.specialized_upblks, specialized )
+    top.set_metadata( SpecializeUpblkPass.unspecialized_upblks, unspecialized )
+
+  @staticmethod
+  def specialize_upblk( m, blk, upblk_type, rtlir_getter ):
+    # Generate and type check the behavioral RTLIR of one block
+    visitor = UpblkRTLIRGenerator( m )
+    visitor._upblk_type = upblk_type
+    rtlir = visitor.enter( blk, m.get_update_block_info( blk )[-1] )
+
+    type_checker = BehavioralRTLIRTypeCheckVisitorL5( m, {}, set(), {}, rtlir_getter )
+    type_checker.enter( blk, rtlir )
+
+    src, paths, leaves, objs = UpblkIntCodeGen( m, visitor.const_extractor ).enter( rtlir )
+
+    fname = f"Specialized {blk.__name__} of {m!r}"
+    code  = compile( src, filename=fname, mode="exec" )
+    line_cache[ fname ] = (len(src), None, src.splitlines(), fname )
+
+    def bind():
+      _globals = dict( objs )
+      for name, path in paths.items():
+        obj = m
+        for is_attr, x in path:
+          obj = getattr( obj, x ) if is_attr else obj[x]
+        if name in leaves and not isinstance( obj, Bits ):
+          return None
+        _globals[ name ] = obj
+
+      _locals = {}
+      custom_exec( code, _globals, _locals )
+      return _locals[ rtlir.name ]
+
+    bind.src = src
+    return bind
+
+#-------------------------------------------------------------------------
+# UpblkRTLIRGenerator
+#-------------------------------------------------------------------------
+
+class UpblkRTLIRGenerator( BehavioralRTLIRGeneratorL5 ):
+  """ The RTLIR generator folds attributes and subscripts that evaluate to
+  ints or Bits into numbers. Keep their Python expressions so that the
+  generated code can read them at runtime. """
+
+  def handle_constant( s, node, obj ):
+    ret = super().handle_constant( node, obj )
+    if ret is not None:
+      ret._py_expr = node
+    return ret
+
+#-------------------------------------------------------------------------
+# UpblkIntCodeGen
+#-------------------------------------------------------------------------
+
+class SpecializationError( Exception ):
+  """ Raise when an update block cannot be expressed as int arithmetic """
+
+def _mask( nbits ):
+  return (1 << nbits) - 1
+
+def _literal( v ):
+  if v < 0:
+    return f"({v})"
+  return str(v) if v < 256 else hex(v)
+
+class UpblkIntCodeGen( bir.BehavioralRTLIRNodeVisitor ):
+  """ Generate the int version of one type-checked update block.
+
+  An expression is either translated into an int expression (val) or, if
+  it refers to a signal, list, interface or component, into an expression
+  that evaluates to that object after lock_in_simulation (obj). Objects
+  reachable from the host component through constant attributes and
+  indices are bound to globals. Python attributes of components and
+  elements of Python lists can change during the simulation, so they are
+  read through their component every time instead of being folded like
+  numbers and closure variables. The value of an expression whose type
+  is explicit (a signal or Bits) is always in [0, 2**nbits); an implicit
+  expression (ints and loop variables) follows Python int semantics
+  until it is mixed with an explicit one. """
+
+  def __init__( s, component, const_extractor ):
+    s.component = component
+    s.const_extractor = const_extractor
+    s.paths  = {}
+    s.names  = {}
+    s.leaves = set()
+    s.objs   = {}
+    s.py_names = {}
+
+  def enter( s, rtlir ):
+    s.is_seq = isinstance( rtlir, bir.SeqUpblk )
+    body = []
+    for stmt in rtlir.body:
+      body.extend( s.visit( stmt ) )
+    if not body:
+      body = [ "pass" ]
+    src = "\n".join( [ f"def {rtlir.name}():" ] + [ "  "+x for x in body ] ) + "\n"
+    return src, s.paths, s.leaves, s.objs
+
+  def generic_visit( s, node, *args ):
+    raise SpecializationError( f"{node.__class__.__name__} is not supported" )
+
+  #-----------------------------------------------------------------------
+  # Statements
+  #-----------------------------------------------------------------------
+
+  def visit_Assign( s, node ):
+    ret = []
+    if len( node.targets ) > 1:
+      ret.append( f"_rhs = {s.val( node.value )}" )
+      value = "_rhs"
+    else:
+      value = None
+
+    for target in node.targets:
+      if isinstance( target, bir.TmpVar ):
+        ret.append( f"tmp_{target.name} = {value or s.val( node.value )}" )
+        continue
+
+      nbits = s.nbits( target )
+      rhs = value or s.val_as( node.value, nbits )
+
+      if isinstance( target, (bir.Index, bir.Slice) ) and s.is_bit_select( target ):
+        if not node.blocking:
+          raise SpecializationError( "partial non-blocking assignment is not supported" )
+        base  = s.obj( target.value )
+        full  = _mask( s.nbits( target.value ) )
+        lower = s.lower( target )
+        if isinstance( lower, int ):
+          keep = full ^ ( _mask( nbits ) << lower )
+          shifted = rhs if lower == 0 else f"({rhs} << {lower})"
+          ret.append( f"{base}._uint = ({base}._uint & {_literal(keep)}) | {shifted}" )
+        else:
+          ret.append( f"{base}._uint = (({base}._uint & ~({_literal(_mask(nbits))} << {lower})) | "
+                      f"({rhs} << {lower})) & {_literal(full)}" )
+      else:
+        field = "_uint" if node.blocking else "_next"
+        ret.append( f"{s.obj( target, leaf=True )}.{field} = {rhs}" )
+
+    return ret
+
+  def visit_If( s, node ):
+    ret = [ f"if {s.cond( node.cond )}:" ]
+    ret.extend( s.block( node.body ) )
+    orelse = node.orelse
+    while len( orelse ) == 1 and isinstance( orelse[0], bir.If ):
+      ret.append( f"elif {s.cond( orelse[0].cond )}:" )
+      ret.extend( s.block( orelse[0].body ) )
+      orelse = orelse[0].orelse
+    if orelse:
+      ret.append( "else:" )
+      ret.extend( s.block( orelse ) )
+    return ret
+
+  def visit_For( s, node ):
+    var = node.var.name
+    ret = [ f"for lv_{var} in range( {s.val( node.start )}, {s.val( node.end )}, {s.val( node.step )} ):" ]
+    ret.extend( s.block( node.body ) )
+    return ret
+
+  def block( s, stmts ):
+    body = []
+    for stmt in stmts:
+      body.extend( s.visit( stmt ) )
+    return [ "  "+x for x in body ] or [ "  pass" ]
+
+  #-----------------------------------------------------------------------
+  # Helpers
+  #-----------------------------------------------------------------------
+
+  def nbits( s, node ):
+    dtype = node.Type.get_dtype()
+    if not isinstance( dtype, (rdt.Vector, rdt.Bool) ):
+      raise SpecializationError( f"{dtype} values are not supported" )
+    return dtype.get_length()
+
+  def is_bit_select( s, node ):
+    # Index/Slice on a vector instead of an array
+    if isinstance( node, bir.Slice ):
+      return True
+    Type = node.value.Type
+    return isinstance( Type, rt.Signal ) and not Type.is_packed_indexable()
+
+  def lower( s, node ):
+    # The lowest bit of a bit selection/slice, int if it is constant
+    if isinstance( node, bir.Index ):
+      idx = node.idx
+    elif node.base is not None and node.size:
+      idx = node.base
+    else:
+      idx = node.lower
+    if s.is_folded( idx ):
+      return int( idx._value )
+    return s.val( idx )
+
+  def path( s, node ):
+    # Constant path of attributes/indices from the host component
+    if isinstance( node, bir.Base ):
+      if node.base is not s.component:
+        raise SpecializationError( f"{node.base} is not the host component" )
+      return ()
+    if isinstance( node, bir.Attribute ):
+      p = s.path( node.value )
+      return None if p is None else p + ( (True, node.attr), )
+    if isinstance( node, bir.Index ) and not s.is_bit_select( node ):
+      p = s.path( node.value )
+      if p is None or not s.is_folded( node.idx ):
+        return None
+      return p + ( (False, int( node.idx._value )), )
+    raise SpecializationError( f"{node.__class__.__name__} does not refer to an object" )
+
+  def obj( s, node, leaf=False ):
+    p = s.path( node )
+    if p is not None:
+      if p not in s.names:
+        s.names[p] = name = f"_o{len(s.names)}"
+        s.paths[ name ] = p
+      name = s.names[p]
+      if leaf:
+        s.leaves.add( name )
+      return name
+
+    if isinstance( node, bir.Attribute ):
+      return f"{s.obj( node.value )}.{node.attr}"
+    # Dynamic index into an array
+    return f"{s.obj( node.value )}[{s.val( node.idx )}]"
+
+  def is_python_value( s, node ):
+    # Python attribute of a component or element of a Python list
+    if hasattr( node, '_py_expr' ):
+      return True
+    Type = node.Type
+    if isinstance( Type, rt.Array ):
+      Type = Type.get_sub_type()
+    return isinstance( node, (bir.Attribute, bir.Index) ) and isinstance( Type, rt.Const )
+
+  def is_folded( s, node ):
+    # The type checker computes _value from the elaboration-time values,
+    # which is only valid if no Python value is involved
+    if not hasattr( node, '_value' ):
+      return False
+
+    def is_const( node ):
+      if s.is_python_value( node ):
+        return False
+      for x in vars( node ).values():
+        for child in ( x if isinstance( x, list ) else [ x ] ):
+          if isinstance( child, bir.BaseBehavioralRTLIR ) and not is_const( child ):
+            return False
+      return True
+
+    return is_const( node )
+
+  def python_value( s, node ):
+    # Read the Python value through the component every time
+    if hasattr( node, '_py_expr' ):
+      return s.py_expr( node._py_expr )
+    if s.is_python_value( node.value ):
+      base = s.python_value( node.value )
+    else:
+      base = s.obj( node.value )
+    if isinstance( node, bir.Attribute ):
+      return f"{base}.{node.attr}"
+    return f"{base}[{s.val( node.idx )}]"
+
+  def py_expr( s, node ):
+    # Python expression that is folded by the RTLIR generator
+    if isinstance( node, ast.Name ):
+      if node.id not in s.py_names:
+        s.py_names[ node.id ] = name = f"_p{len(s.py_names)}"
+        s.objs[ name ] = s.const_extractor.visit( node )
+      return s.py_names[ node.id ]
+    if isinstance( node, ast.Attribute ):
+      return f"{s.py_expr( node.value )}.{node.attr}"
+    if isinstance( node, ast.Subscript ):
+      idx = node.slice.value if sys.version_info < (3, 9) else node.slice
+      if isinstance( idx, (ast.Attribute, ast.Subscript) ):
+        return f"{s.py_expr( node.value )}[{s.py_expr( idx )}]"
+      value = s.const_extractor.visit( idx )
+      if not isinstance( value, int ):
+        raise SpecializationError( "Python values with non-constant indices are not supported" )
+      return f"{s.py_expr( node.value )}[{value}]"
+    raise SpecializationError( f"{node.__class__.__name__} in a Python value is not supported" )
+
+  def val_as( s, node, nbits ):
+    # Value that is assigned to an nbits-wide signal. Python ints are
+    # truncated by @= and <<=.
+    if s.is_folded( node ):
+      return _literal( int( node._value ) & _mask( nbits ) )
+    value = s.val( node )
+    if node._is_explicit:
+      return value
+    return f"({value} & {_literal(_mask(nbits))})"
+
+  def cond( s, node ):
+    if isinstance( node, bir.Compare ) and not s.is_folded( node ):
+      return s.compare( node )
+    return s.val( node )
+
+  #-----------------------------------------------------------------------
+  # Expressions
+  #-----------------------------------------------------------------------
+  # val returns an int expression in a string.
+
+  def val( s, node ):
+    if hasattr( node, '_py_expr' ):
+      return s.val_signal( node )
+    if s.is_folded( node ):
+      value = int( node._value )
+      if node._is_explicit:
+        value &= _mask( s.nbits( node ) )
+      return _literal( value )
+
+    method = getattr( s, 'val_' + node.__class__.__name__, None )
+    if method is None:
+      raise SpecializationError( f"{node.__class__.__name__} is not supported" )
+    return method( node )
+
+  def val_signal( s, node ):
+    if s.is_python_value( node ):
+      # Keep the Python semantics of implicit values (e.g., floats)
+      if node._is_explicit:
+        return f"(int({s.python_value( node )}) & {_literal(_mask(s.nbits( node )))})"
+      return s.python_value( node )
+    return f"{s.obj( node, leaf=True )}._uint"
+
+  val_Attribute = val_signal
+
+  def val_Index( s, node ):
+    if not s.is_bit_select( node ):
+      return s.val_signal( node )
+    value = s.val( node.value )
+    lower = s.lower( node )
+    if lower == 0:
+      return f"({value} & 1)"
+    return f"(({value} >> {lower}) & 1)"
+
+  def val_Slice( s, node ):
+    nbits = s.nbits( node )
+    value = s.val( node.value )
+    lower = s.lower( node )
+    if lower == 0:
+      if nbits == s.nbits( node.value ):
+        return value
+      return f"({value} & {_literal(_mask(nbits))})"
+    return f"(({value} >> {lower}) & {_literal(_mask(nbits))})"
+
+  def val_TmpVar( s, node ):
+    return f"tmp_{node.name}"
+
+  def val_LoopVar( s, node ):
+    return f"lv_{node.name}"
+
+  def val_Concat( s, node ):
+    terms, offset = [], 0
+    for child in reversed( node.values ):
+      value = s.val_as( child, s.nbits( child ) )
+      terms.append( value if offset == 0 else f"({value} << {offset})" )
+      offset += s.nbits( child )
+    return f"({' | '.join( reversed( terms ) )})"
+
+  def val_ZeroExt( s, node ):
+    return s.val_as( node.value, s.nbits( node.value ) )
+
+  def val_SignExt( s, node ):
+    nbits, old_nbits = node.nbits, s.nbits( node.value )
+    value = s.val_as( node.value, old_nbits )
+    if nbits == old_nbits:
+      return value
+    sign = 1 << (old_nbits - 1)
+    return f"((({value} ^ {_literal(sign)}) - {_literal(sign)}) & {_literal(_mask(nbits))})"
+
+  def val_Truncate( s, node ):
+    value = s.val( node.value )
+    if node.value._is_explicit and node.nbits == s.nbits( node.value ):
+      return value
+    return f"({value} & {_literal(_mask(node.nbits))})"
+
+  def val_SizeCast( s, node ):
+    # Bits16( x ) rejects Bits of other widths but casts ints
+    value = s.val( node.value )
+    if node.value._is_explicit:
+      if node.nbits != s.nbits( node.value ):
+        raise SpecializationError( "size casting Bits to a different width is not supported" )
+      return value
+    return f"({value} & {_literal(_mask(node.nbits))})"
+
+  def val_Reduce( s, node ):
+    nbits = s.nbits( node.value )
+    value = s.val_as( node.value, nbits )
+    if isinstance( node.op, bir.BitAnd ):
+      return f"(1 if {value} == {_literal(_mask(nbits))} else 0)"
+    if isinstance( node.op, bir.BitOr ):
+      return f"(1 if {value} else 0)"
+    if isinstance( node.op, bir.BitXor ):
+      return f"(bin({value}).count('1') & 1)"
+    raise SpecializationError( f"reduce {node.op.__class__.__name__} is not supported" )
+
+  def val_IfExp( s, node ):
+    return f"({s.val( node.body )} if {s.cond( node.cond )} else {s.val( node.orelse )})"
+
+  def val_UnaryOp( s, node ):
+    value = s.val( node.operand )
+    if not node._is_explicit:
+      op = { bir.Invert: '~', bir.UAdd: '+', bir.USub: '-' }[ type(node.op) ]
+      return f"({op}{value})"
+    # Bits only implements ~
+    if not isinstance( node.op, bir.Invert ):
+      raise SpecializationError( f"{node.op.__class__.__name__} on Bits is not supported" )
+    return f"({value} ^ {_literal(_mask(s.nbits(node)))})"
+
+  _binops = {
+    bir.Add : '+',  bir.Sub : '-',  bir.Mult : '*', bir.Mod : '%',
+    bir.ShiftLeft : '<<', bir.ShiftRightLogic : '>>',
+    bir.BitAnd : '&', bir.BitOr : '|', bir.BitXor : '^',
+  }
+  # Operations that cannot overflow if both operands are in range
+  _binops_in_range = ( bir.Mod, bir.ShiftRightLogic, bir.BitAnd, bir.BitOr, bir.BitXor )
+
+  def val_BinOp( s, node ):
+    op_t  = type( node.op )
+    left  = s.val( node.left )
+    right = s.val( node.right )
+    if not node._is_explicit:
+      if op_t is bir.Pow:
+        return f"({left} ** {right})"
+      if op_t is bir.Div:
+        return f"({left} / {right})"
+
+    # Bits doesn't implement true division and power
+    if op_t not in s._binops:
+      raise SpecializationError( f"{op_t.__name__} is not supported" )
+
+    op = s._binops[ op_t ]
+    if not node._is_explicit:
+      return f"({left} {op} {right})"
+
+    nbits = s.nbits( node )
+    mask  = _literal( _mask( nbits ) )
+    if op_t in s._binops_in_range and node.left._is_explicit and \
+       ( node.right._is_explicit or op_t is bir.ShiftRightLogic ):
+      return f"({left} {op} {right})"
+
+    # Avoid huge ints when shifting left by a large variable amount
+    if op_t is bir.ShiftLeft and not hasattr( node.right, '_value' ):
+      return f"((({left} << {right}) & {mask}) if {right} < {nbits} else 0)"
+
+    return f"(({left} {op} {right}) & {mask})"
+
+  _cmpops = {
+    bir.Eq : '==', bir.NotEq : '!=', bir.Lt : '<', bir.LtE : '<=', bir.Gt : '>', bir.GtE : '>=',
+  }
+
+  def compare( s, node ):
+    return f"{s.val( node.left )} {s._cmpops[ type(node.op) ]} {s.val( node.right )}"
+
+  def val_Compare( s, node ):
+    return f"(1 if {s.compare( node )} else 0)"
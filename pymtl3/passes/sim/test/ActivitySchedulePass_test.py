@@ -0,0 +1,267 @@
+#=========================================================================
+# ActivitySchedulePass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+from collections import Counter
+
+import pytest
+
+from pymtl3.datatypes import Bits1, Bits8, Bits32, bitstruct
+from pymtl3.dsl import *
+
+from ..ActivitySchedulePass import ActivitySchedulePass
+from ..DynamicSchedulePass import DynamicSchedulePass
+from ..GenDAGPass import GenDAGPass
+from ..PrepareSimPass import PrepareSimPass
+
+
+def _test_model( cls, sched_pass ):
+  A = cls()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( sched_pass )
+  A.apply( PrepareSimPass(print_line_trace=False) )
+  A.sim_reset()
+  return A
+
+def _count_executions( A ):
+  """ Wrap the blocks behind the activity evaluators to count how many
+  times each of them is executed. """
+  counts = Counter()
+  for blks in A._sched.activity_blocks.values():
+    for i, blk in enumerate( blks ):
+      def wrapper( blk=blk ):
+        counts[ blk ] += 1
+        blk()
+      blks[i] = wrapper
+  return counts
+
+class Tile( Component ):
+  def construct( s ):
+    s.en  = InPort()
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    s.acc = Wire( Bits32 )
+
+    @update
+    def up_out():
+      s.out @= s.acc + s.in_
+
+    @update_ff
+    def up_acc():
+      if s.reset:
+        s.acc <<= 0
+      elif s.en:
+        s.acc <<= s.acc + s.in_
+
+class Mesh( Component ):
+  def construct( s, N=8 ):
+    s.en   = InPort( N )
+    s.in_  = InPort( Bits32 )
+    s.out  = [ OutPort( Bits32 ) for _ in range(N) ]
+    s.tiles = [ Tile() for _ in range(N) ]
+    for i in range(N):
+      s.tiles[i].en  //= s.en[i]
+      s.tiles[i].in_ //= s.in_
+      s.tiles[i].out //= s.out[i]
+
+def test_activity_matches_dynamic():
+
+  A = _test_model( Mesh, DynamicSchedulePass() )
+  B = _test_model( Mesh, ActivitySchedulePass() )
+
+  for i in range(40):
+    for x in [ A, B ]:
+      x.en  @= (i * 37) & 0xff
+      x.in_ @= i * 3
+      x.sim_tick()
+    assert all( A.out[j] == B.out[j] for j in range(8) )
+
+def test_activity_skips_idle_blocks():
+
+  A = _test_model( Mesh, ActivitySchedulePass() )
+  counts = _count_executions( A )
+  up_outs = [ t.get_update_block( 'up_out' ) for t in A.tiles ]
+  up_accs = [ t.get_update_block( 'up_acc' ) for t in A.tiles ]
+
+  A.en  @= 0
+  A.in_ @= 0
+  A.sim_tick()
+  A.sim_tick()
+
+  counts.clear()
+  for i in range(10):
+    A.sim_tick()
+  assert sum( counts.values() ) == 0
+
+  # Only tile 2 becomes active, so only tile 2's blocks keep executing.
+  # The other tiles see the change of in_ once.
+  A.en  @= 0b100
+  A.in_ @= 1
+  for i in range(10):
+    A.sim_tick()
+
+  assert counts[ up_outs[2] ] >= 10
+  assert counts[ up_accs[2] ] >= 10
+  assert all( counts[ up_outs[j] ] <= 1 and counts[ up_accs[j] ] <= 1 for j in range(8) if j != 2 )
+  assert A.out[2] == 10 + 1
+  assert A.out[0] == 1
+
+def test_activity_method_blocks_always_execute():
+
+  class Top( Component ):
+    def construct( s ):
+      s.out = OutPort( Bits32 )
+      s.count = 0
+
+      @update
+      def up():
+        s.out @= s.get_count()
+
+    def get_count( s ):
+      s.count += 1
+      return s.count
+
+  A = _test_model( Top, ActivitySchedulePass() )
+  for i in range(5):
+    A.sim_tick()
+  assert A.out == A.count
+
+# The state read by these blocks is invisible to the read sets extracted
+# at elaboration, so they must execute in every cycle
+
+GLOBAL_TABLE = [ 0 ]
+
+class AttrState( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    s.table = [ 0 ] * 4
+
+    @update
+    def up():
+      s.out @= s.in_ + s.table[0]
+
+  def bump( s ):
+    s.table[0] += 1
+
+class ClosureState( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    s.table = table = [ 0 ]
+
+    @update
+    def up():
+      s.out @= s.in_ + table[0]
+
+  def bump( s ):
+    s.table[0] += 1
+
+class GlobalState( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+
+    @update
+    def up():
+      s.out @= s.in_ + GLOBAL_TABLE[0]
+
+  def bump( s ):
+    GLOBAL_TABLE[0] += 1
+
+@pytest.mark.parametrize( "cls", [ AttrState, ClosureState, GlobalState ] )
+def test_activity_python_state( cls ):
+
+  def simulate( sched_pass ):
+    GLOBAL_TABLE[0] = 0
+    A = _test_model( cls, sched_pass )
+    A.in_ @= 2
+    A.sim_tick()
+    ret = []
+    for i in range(3):
+      A.bump()
+      A.sim_tick()
+      ret.append( int(A.out) )
+    return A, ret
+
+  _, ref = simulate( DynamicSchedulePass() )
+  A, out = simulate( ActivitySchedulePass() )
+  assert ref == [ 3, 4, 5 ]
+  assert out == ref
+  assert A.get_update_block( 'up' ) not in A._sched.block_reads
+
+def test_activity_struct_fields():
+
+  @bitstruct
+  class Pair:
+    x: Bits8
+    y: Bits8
+
+  class Inner( Component ):
+    def construct( s ):
+      s.in_ = InPort( Pair )
+      s.out = OutPort( Bits8 )
+
+      @update
+      def up_sum():
+        s.out @= s.in_.x + s.in_.y
+
+  class Top( Component ):
+    def construct( s ):
+      s.a   = InPort( Bits8 )
+      s.b   = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.inner = Inner()
+      s.inner.in_.x //= s.a
+      s.inner.in_.y //= s.b
+      s.out //= s.inner.out
+
+  A = _test_model( Top, ActivitySchedulePass() )
+  counts = _count_executions( A )
+  up_sum = A.inner.get_update_block( 'up_sum' )
+
+  A.a @= 1
+  A.b @= 2
+  A.sim_eval_combinational()
+  assert A.out == 3
+  assert counts[ up_sum ] == 1
+
+  A.sim_eval_combinational()
+  assert counts[ up_sum ] == 1
+
+  A.b @= 5
+  A.sim_eval_combinational()
+  assert A.out == 6
+  assert counts[ up_sum ] == 2
+
+def test_activity_self_loop():
+
+  # A block that reads what it writes still executes at most once in an
+  # evaluation, like in the other schedules
+  class Top( Component ):
+    def construct( s ):
+      s.in_   = InPort( Bits8 )
+      s.out   = OutPort( Bits8 )
+      s.state = Wire( Bits8 )
+
+      @update
+      def up_state():
+        s.state @= s.state + s.in_
+
+      @update
+      def up_out():
+        s.out @= s.state
+
+  def simulate( sched_pass ):
+    A = _test_model( Top, sched_pass )
+    ret = []
+    for i in range(6):
+      A.in_ @= i % 3
+      A.sim_tick()
+      ret.append( int(A.out) )
+    return ret
+
+  assert simulate( ActivitySchedulePass() ) == simulate( DynamicSchedulePass() )
@@ -0,0 +1,106 @@
+#=========================================================================
+# ParallelSchedulePass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import pytest
+
+from pymtl3.datatypes import Bits1, Bits32, bitstruct
+from pymtl3.dsl import *
+
+from ..GenDAGPass import GenDAGPass
+from ..ParallelSchedulePass import ParallelSchedulePass
+from ..PrepareSimPass import PrepareSimPass
+from ..SimpleSchedulePass import SimpleSchedulePass
+
+
+def _test_model( cls, sched_pass, *args ):
+  A = cls( *args )
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( sched_pass )
+  A.apply( PrepareSimPass(print_line_trace=False) )
+  A.sim_reset()
+  return A
+
+@bitstruct
+class Msg:
+  val  : Bits1
+  data : Bits32
+
+class Stage( Component ):
+  def construct( s, k ):
+    s.in_ = InPort( Msg )
+    s.out = OutPort( Msg )
+    s.acc = Wire( Bits32 )
+    s.nxt = Wire( Msg )
+
+    @update
+    def up_comb():
+      s.nxt.val  @= s.in_.val
+      s.nxt.data @= s.in_.data * k + s.acc
+
+    @update_ff
+    def up_ff():
+      if s.reset:
+        s.out <<= Msg()
+        s.acc <<= 0
+      else:
+        s.out <<= s.nxt
+        if s.in_.val:
+          s.acc <<= s.acc + 1
+
+class Ring( Component ):
+  def construct( s, N=4 ):
+    s.seed = InPort( Bits32 )
+    s.out  = OutPort( Msg )
+    s.stages = [ Stage( i+1 ) for i in range(N) ]
+    for i in range(N-1):
+      s.stages[i].out //= s.stages[i+1].in_
+
+    @update
+    def up_feedback():
+      s.stages[0].in_.val  @= 1
+      s.stages[0].in_.data @= s.stages[N-1].out.data + s.seed
+
+    s.out //= s.stages[N-1].out
+
+def test_partitions_cut_at_registers():
+  A = _test_model( Ring, ParallelSchedulePass( nworkers=4 ), 4 )
+  parts = A._sched.partitions
+  assert len(parts) == 4
+  assert sum( len(p.schedule_ff) for p in parts ) == 4
+  # Only registered stage outputs cross partitions
+  for p in parts:
+    for x in p.foreign:
+      assert repr(x).endswith( ".out" )
+
+def test_parallel_matches_serial():
+  A = _test_model( Ring, SimpleSchedulePass(), 4 )
+  B = _test_model( Ring, ParallelSchedulePass( nworkers=3 ), 4 )
+
+  for x in [ A, B ]:
+    x.seed @= 7
+
+  A.sim_run( 50 )
+  assert B.sim_run_parallel( 50 ) == 50
+
+  assert A.out == B.out
+  assert A.sim_cycle_count() == B.sim_cycle_count()
+  for i in range(4):
+    assert A.stages[i].acc == B.stages[i].acc
+
+  # The merged state must be good enough to continue serially
+  A.sim_run( 10 )
+  B.sim_run( 10 )
+  assert A.out == B.out
+
+def test_parallel_rejects_method_ports():
+
+  class Top( Component ):
+    def construct( s ):
+      s.recv = CalleePort()
+
+  with pytest.raises( NotImplementedError ):
+    _test_model( Top, ParallelSchedulePass() )
@@ -0,0 +1,153 @@
+#=========================================================================
+# SimCheckpoint_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import pytest
+
+from pymtl3.datatypes import Bits8, Bits16, Bits32, bitstruct, zext
+from pymtl3.dsl import *
+
+from ..GenDAGPass import GenDAGPass
+from ..PrepareSimPass import PrepareSimPass
+from ..SimpleSchedulePass import SimpleSchedulePass
+
+
+def mk_point():
+  # Local bitstruct class that cannot be pickled by reference. Bitstruct
+  # classes with the same name and fields share one class, so the name
+  # must be unique.
+  @bitstruct
+  class CkptPoint:
+    x: Bits8
+    y: Bits8
+  return CkptPoint
+
+CkptPoint = mk_point()
+
+class Lfsr( Component ):
+  def construct( s ):
+    s.out = OutPort( Bits16 )
+    s.acc = Wire( CkptPoint )
+
+    # Python-level state
+    s.history = []
+    s.last    = None
+
+    @update_ff
+    def up_lfsr():
+      if s.reset:
+        s.out <<= 0xace1
+        s.acc <<= CkptPoint( 0, 0 )
+      else:
+        bit = s.out[0] ^ s.out[2] ^ s.out[3] ^ s.out[5]
+        s.out <<= ( s.out >> 1 ) | ( zext( bit, 16 ) << 15 )
+        s.acc <<= CkptPoint( s.acc.x + s.out[0:8], s.acc.y ^ s.out[8:16] )
+        s.last = CkptPoint( s.out[0:8], s.out[8:16] )
+        s.history.append( int(s.out) & 0xf )
+
+class Counter( Component ):
+  def construct( s ):
+    s.out = OutPort( Bits32 )
+    # State in a closure needs the explicit hooks
+    state = [ 0 ]
+    s._state = state
+
+    @update_ff
+    def up_count():
+      state[0] += 1
+      s.out <<= state[0]
+
+  def checkpoint_state( s ):
+    return s._state[0]
+
+  def restore_state( s, state ):
+    s._state[0] = state
+
+class Top( Component ):
+  def construct( s ):
+    s.lfsrs = [ Lfsr() for _ in range(3) ]
+    s.count = Counter()
+    s.sum   = OutPort( Bits16 )
+
+    @update
+    def up_sum():
+      s.sum @= s.lfsrs[0].out + s.lfsrs[1].out + s.lfsrs[2].out + s.count.out[0:16]
+
+  def line_trace( s ):
+    return f"{s.sum} {s.lfsrs[0].acc} {s.lfsrs[2].last} {s.count.out}"
+
+def _mk_top( packed_ff=False ):
+  top = Top()
+  top.elaborate()
+  top.apply( GenDAGPass() )
+  top.apply( SimpleSchedulePass() )
+  top.apply( PrepareSimPass( print_line_trace=False, packed_ff=packed_ff ) )
+  top.sim_reset()
+  return top
+
+def _run( top, ncycles ):
+  traces = []
+  for _ in range( ncycles ):
+    top.sim_tick()
+    traces.append( top.line_trace() )
+  return traces
+
+@pytest.mark.parametrize( "packed_ff", [ False, True ] )
+def test_checkpoint_restore( tmp_path, packed_ff ):
+  path = str( tmp_path / "top.ckpt" )
+
+  top = _mk_top( packed_ff )
+  _run( top, 37 )
+  top.sim_checkpoint( path )
+  ref = _run( top, 50 )
+  ref_history = list( top.lfsrs[1].history )
+
+  # Restore into the same model
+  top.sim_restore( path )
+  assert top.sim_cycle_count() == 37 + 3 # with reset
+  assert len( top.lfsrs[1].history ) == 37
+  assert _run( top, 50 ) == ref
+
+  # Restore into a new model
+  top = _mk_top( packed_ff )
+  _run( top, 5 )
+  top.sim_restore( path )
+  assert top.sim_cycle_count() == 37 + 3
+  assert _run( top, 50 ) == ref
+  assert top.lfsrs[1].history == ref_history
+  # The struct is pickled by value
+  assert '<locals>' in CkptPoint.__qualname__
+  assert top.lfsrs[2].last.__class__ is CkptPoint
+
+def test_restore_different_model( tmp_path ):
+  path = str( tmp_path / "top.ckpt" )
+  top = _mk_top()
+  top.sim_checkpoint( path )
+
+  other = Counter()
+  other.elaborate()
+  other.apply( GenDAGPass() )
+  other.apply( SimpleSchedulePass() )
+  other.apply( PrepareSimPass( print_line_trace=False ) )
+  with pytest.raises( ValueError, match="different model" ):
+    other.sim_restore( path )
+
+def test_unpicklable_state( tmp_path ):
+  class Bad( Component ):
+    def construct( s ):
+      s.out = OutPort( Bits8 )
+      s.fd  = open( str( tmp_path / "fd" ), 'w' )
+      @update_ff
+      def up():
+        s.out <<= s.out + 1
+
+  top = Bad()
+  top.elaborate()
+  top.apply( GenDAGPass() )
+  top.apply( SimpleSchedulePass() )
+  top.apply( PrepareSimPass( print_line_trace=False ) )
+  with pytest.raises( TypeError, match="checkpoint_state" ):
+    top.sim_checkpoint( str( tmp_path / "top.ckpt" ) )
+  top.fd.close()
@@ -5,13 +5,15 @@
 # Author : Shunning Jiang
 # Date   : Apr 19, 2019
 
-from pymtl3.datatypes import Bits8, Bits32, bitstruct
+import pytest
+
+from pymtl3.datatypes import Bits8, Bits32, bitstruct, zext
 from pymtl3.dsl import *
 from pymtl3.dsl.errors import UpblkCyclicError
 
 from ..GenDAGPass import GenDAGPass
 from ..PrepareSimPass import PrepareSimPass
-from ..SimpleSchedulePass import SimpleSchedulePass
+from ..SimpleSchedulePass import SimpleSchedulePass, get_block_label
 
 
 def _test_model( cls ):
@@ -261,3 +263,226 @@ def test_equal_top_level():
     print(e)
     assert str(e).startswith("Please use @= to assign top level InPort")
     return
+
+def test_sim_run_matches_sim_tick():
+
+  class Top(Component):
+
+    def construct( s ):
+      s.b = Wire( Bits32 )
+      s.c = Wire( Bits32 )
+
+      @update
+      def up1():
+        s.b @= s.c + 1
+
+      @update_ff
+      def up2():
+        if s.reset:
+          s.c <<= 0
+        else:
+          s.c <<= s.b + 1
+
+  A = _test_model( Top )
+  B = _test_model( Top )
+
+  for i in range(100):
+    A.sim_tick()
+
+  assert B.sim_run( 100 ) == 100
+  assert A.c == B.c
+  assert A.sim_cycle_count() == B.sim_cycle_count()
+
+def test_sim_run_stop_when():
+
+  class Top(Component):
+
+    def construct( s ):
+      s.c = Wire( Bits32 )
+
+      @update_ff
+      def up():
+        if s.reset:
+          s.c <<= 0
+        else:
+          s.c <<= s.c + 1
+
+  A = _test_model( Top )
+  start = int(A.c)
+
+  # With check_every=1 we stop exactly when the predicate becomes true
+  ncycles = A.sim_run( 1000, stop_when=lambda: A.c == start + 10 )
+  assert ncycles == 10
+  assert A.c == start + 10
+
+  # With check_every=8 we only overshoot to the next multiple of 8
+  ncycles = A.sim_run( 1000, stop_when=lambda: A.c >= start + 20, check_every=8 )
+  assert ncycles == 16
+  assert A.c == start + 26
+
+  # Never exceed ncycles
+  assert A.sim_run( 5, stop_when=lambda: False, check_every=8 ) == 5
+  assert A.c == start + 31
+
+def test_sim_eval_combinational_batch():
+
+  class Top(Component):
+
+    def construct( s ):
+      s.in_ = [ InPort( Bits8 ) for _ in range(2) ]
+      s.sum = OutPort( Bits8 )
+      s.max = OutPort( Bits8 )
+
+      @update
+      def up():
+        s.sum @= s.in_[0] + s.in_[1]
+        s.max @= s.in_[0] if s.in_[0] > s.in_[1] else s.in_[1]
+
+  A = _test_model( Top )
+  rows = [ (x, y) for x in range(0, 256, 17) for y in range(0, 256, 29) ]
+  results = A.sim_eval_combinational_batch( A.in_, rows, [ A.sum, A.max ] )
+
+  assert len(results) == len(rows)
+  for (x, y), (s, m) in zip( rows, results ):
+    assert s == (x + y) & 0xff
+    assert m == max( x, y )
+
+  # The outputs are copies and the ports hold the last row
+  assert A.in_[0] == rows[-1][0] and A.in_[1] == rows[-1][1]
+  assert A.sum == results[-1][0] and A.sum is not results[-1][0]
+
+def test_sim_eval_combinational_not_rtl():
+
+  class Top(Component):
+
+    @method_port
+    def put( s, v ):
+      pass
+
+    def construct( s ):
+      s.out = OutPort( Bits8 )
+
+      @update
+      def up():
+        s.out @= 1
+
+  A = Top()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( SimpleSchedulePass() )
+  A.apply( PrepareSimPass() )
+
+  with pytest.raises( NotImplementedError, match="top.put is a method port" ):
+    A.sim_eval_combinational()
+  with pytest.raises( NotImplementedError, match="top.put is a method port" ):
+    A.sim_eval_combinational_batch( [], [], [] )
+
+def test_packed_ff_matches_unpacked():
+
+  @bitstruct
+  class Pair:
+    a: Bits8
+    b: Bits32
+
+  class Top(Component):
+
+    def construct( s ):
+      s.in_  = InPort( Bits8 )
+      s.out  = OutPort( Bits32 )
+      s.cnt  = Wire( Bits32 )
+      s.pair = Wire( Pair )
+      s.wide = Wire( 100 )
+
+      @update_ff
+      def up_ff():
+        if s.reset:
+          s.cnt  <<= 0
+          s.pair <<= Pair()
+          s.wide <<= 1
+        else:
+          s.cnt  <<= s.cnt + 1
+          s.pair <<= Pair( s.in_, s.pair.b + s.cnt )
+          s.wide <<= s.wide << 1
+
+      @update
+      def up_out():
+        s.out @= s.pair.b + zext( s.pair.a, 32 ) + s.wide[68:100]
+
+  A = Top()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( SimpleSchedulePass() )
+  A.apply( PrepareSimPass(print_line_trace=False) )
+
+  B = Top()
+  B.elaborate()
+  B.apply( GenDAGPass() )
+  B.apply( SimpleSchedulePass() )
+  B.apply( PrepareSimPass(print_line_trace=False, packed_ff=True) )
+
+  # cnt, pair.a, pair.b, wide
+  assert len( B._sim.packed_ff ) == 4
+
+  for x in [ A, B ]:
+    x.sim_reset()
+
+  for i in range(120):
+    for x in [ A, B ]:
+      x.in_ @= i
+      x.sim_tick()
+    assert A.out == B.out
+    assert A.pair == B.pair
+    assert A.wide == B.wide
+
+class TwoStage( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.tmp = Wire( Bits8 )
+
+    @update
+    def stage1():
+      s.tmp @= s.in_ + 1
+
+    @update
+    def stage2():
+      s.out @= s.tmp + 2
+
+class ManyTwoStages( Component ):
+  def construct( s, N=16 ):
+    s.in_  = InPort( Bits8 )
+    s.outs = [ OutPort( Bits8 ) for _ in range(N) ]
+    s.subs = [ TwoStage() for _ in range(N) ]
+    for i in range(N):
+      s.subs[i].in_ //= s.in_
+      s.outs[i] //= s.subs[i].out
+
+def _get_labels( order, seed ):
+  A = ManyTwoStages()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( SimpleSchedulePass( order=order, seed=seed ) )
+  A.apply( PrepareSimPass( print_line_trace=False ) )
+
+  A.sim_reset()
+  A.in_ @= 7
+  A.sim_eval_combinational()
+  for x in A.outs:
+    assert x == 10
+
+  return [ get_block_label( A, x ) for x in A._sched.update_schedule ]
+
+def test_seeded_schedule_is_reproducible():
+  schedule = _get_labels( 'random', 42 )
+  assert _get_labels( 'random', 42 ) == schedule
+  assert any( _get_labels( 'random', seed ) != schedule for seed in range(5) )
+
+def test_locality_schedule():
+  schedule = _get_labels( 'locality', None )
+  assert _get_labels( 'locality', None ) == schedule
+
+  # Both stages of a component are scheduled back to back
+  stages = [ x for x in schedule if 'stage' in x ]
+  for i in range( 0, len(stages), 2 ):
+    assert stages[i].endswith( '.stage1' )
+    assert stages[i+1] == stages[i][:-1] + '2'
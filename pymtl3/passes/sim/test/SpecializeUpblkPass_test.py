@@ -0,0 +1,232 @@
+#=========================================================================
+# SpecializeUpblkPass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import random
+
+import pytest
+
+from pymtl3.datatypes import *
+from pymtl3.dsl import *
+
+from ..ActivitySchedulePass import ActivitySchedulePass
+from ..GenDAGPass import GenDAGPass
+from ..PrepareSimPass import PrepareSimPass
+from ..SimpleSchedulePass import SimpleSchedulePass
+from ..SpecializeUpblkPass import SpecializeUpblkPass
+
+
+@bitstruct
+class Point:
+  x: Bits8
+  y: Bits8
+  z: [ Bits4, Bits4 ]
+
+class Ops( Component ):
+  def construct( s ):
+    s.a   = InPort( Bits32 )
+    s.b   = InPort( Bits32 )
+    s.sel = InPort( Bits3 )
+    s.p   = InPort( Point )
+    s.arr = [ InPort( Bits8 ) for _ in range(4) ]
+
+    s.o1  = OutPort( Bits32 )
+    s.o2  = OutPort( Bits32 )
+    s.o3  = OutPort( Bits8 )
+    s.o4  = OutPort( Bits64 )
+    s.o5  = OutPort( Bits1 )
+    s.o6  = OutPort( Bits8 )
+    s.o7  = OutPort( Bits16 )
+    s.q   = OutPort( Point )
+    s.r   = OutPort( Bits32 )
+    s.cnt = Wire( Bits8 )
+    s.K   = 5
+
+    @update
+    def up_ops():
+      s.o1 @= 0
+      for i in range(4):
+        s.o1[i*8:i*8+8] @= s.a[(3-i)*8:(3-i)*8+8] + s.b[i*8:i*8+8]
+      s.o1[zext(s.sel, 5)] @= s.a[zext(s.sel, 5)] ^ 1
+      tmp = s.a - s.b
+      s.o2 @= (tmp >> 3) if s.a < s.b else ~tmp
+      s.o3 @= s.arr[s.sel[0:2]] + s.p.x - s.p.y * zext( s.p.z[1], 8 )
+      s.o4 @= concat( s.a[0:16], sext( s.b[0:8], 16 ), zext( s.sel, 32 ) )
+      s.o5 @= reduce_xor( s.a ) | reduce_and( s.b[0:3] ) | reduce_or( s.a[8:16] )
+      s.o6 @= trunc( s.a, 8 ) << zext( s.sel, 8 )
+      s.o7 @= Bits16( s.K ) + s.a[0:16] % ( s.b[0:16] | 1 ) + ~s.b[16:32] + 2**3
+
+    @update
+    def up_fields():
+      s.q.x    @= s.p.y
+      s.q.y    @= s.p.x + 1
+      s.q.z[0] @= s.p.z[1]
+      s.q.z[1] @= s.p.z[0] if s.sel == 2 else s.cnt[0:4]
+
+    @update_ff
+    def up_regs():
+      if s.reset:
+        s.r   <<= 0
+        s.cnt <<= 0
+      elif s.sel == 1:
+        s.r   <<= s.a
+        s.cnt <<= s.cnt + 1
+      elif s.sel > 5:
+        s.r   <<= s.r - 1
+      else:
+        s.r   <<= s.r + s.o1
+
+class Triple( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.out //= lambda: s.in_ * 3
+
+class Hier( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.idx = InPort( Bits2 )
+    s.out = OutPort( Bits8 )
+    s.all = OutPort( Bits32 )
+    s.acc = Wire( Bits32 )
+    s.subs = [ Triple() for _ in range(4) ]
+    s.all //= s.acc
+
+    @update
+    def up_in():
+      for i in range(4):
+        s.subs[i].in_ @= s.in_ + i
+
+    @update
+    def up_out():
+      s.out @= s.subs[s.idx].out
+      s.acc @= 0
+      for i in range(4):
+        s.acc[i*8:i*8+8] @= s.subs[i].out
+
+class Swap( Component ):
+  def construct( s ):
+    s.in_ = InPort( Point )
+    s.out = OutPort( Point )
+    s.cnt = OutPort( Bits8 )
+
+    @update
+    def up_swap():
+      # Whole-struct assignment is not specialized
+      s.out @= s.in_
+      s.out.x @= s.in_.y
+
+    @update_ff
+    def up_cnt():
+      s.cnt <<= s.cnt + s.in_.x
+
+class PyState( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.odd = OutPort( Bits1 )
+
+    # Python values that change during the simulation
+    s.v     = 0
+    s.ptr   = 0
+    s.table = [ 0, 0 ]
+    s.bias  = Bits8( 0 )
+
+    @update_ff
+    def up_state():
+      s.v     = s.v ^ 1
+      s.ptr   = 1 - s.ptr
+      s.table[1] = ( s.table[1] + 1 ) % 16
+      s.bias  = s.bias + 3
+
+    @update
+    def up_out():
+      s.out @= s.in_ + s.bias + s.table[s.ptr]
+      s.odd @= s.v > 0
+
+def _simulate( cls, specialize, packed_ff=False, ncycles=200, sched_pass=None ):
+  m = cls()
+  m.elaborate()
+
+  # Collect the ports before lock_in_simulation replaces the signals
+  inports  = sorted( [ x for x in m.get_input_value_ports()
+                       if x.get_host_component() is m and x is not m.clk and x is not m.reset ], key=repr )
+  outports = sorted( [ x for x in m.get_output_value_ports() if x.get_host_component() is m ], key=repr )
+
+  m.apply( GenDAGPass() )
+  m.apply( sched_pass or SimpleSchedulePass() )
+  if specialize:
+    m.apply( SpecializeUpblkPass() )
+  m.apply( PrepareSimPass( print_line_trace=False, packed_ff=packed_ff ) )
+  m.sim_reset()
+
+  get = lambda x: eval( 'm' + repr(x)[1:], { 'm': m } )
+
+  rng = random.Random( 0xdeadbeef )
+  trace = []
+  for _ in range( ncycles ):
+    for x in inports:
+      v = get( x )
+      bits = Bits( v.nbits, rng.getrandbits( v.nbits ) )
+      v @= bits if isinstance( v, Bits ) else type(v).from_bits( bits )
+    m.sim_eval_combinational()
+    trace.append( [ get( x ).clone() for x in outports ] )
+    m.sim_tick()
+  return m, trace
+
+@pytest.mark.parametrize( "cls", [ Ops, Hier ] )
+def test_specialize_matches_bits( cls ):
+  _, ref = _simulate( cls, False )
+  m, trace = _simulate( cls, True )
+
+  assert m.get_metadata( SpecializeUpblkPass.unspecialized_upblks ) == {}
+  specialized = m.get_metadata( SpecializeUpblkPass.specialized_upblks )
+  assert len( specialized ) == len( m.get_all_update_blocks() )
+  # The generated blocks are in the schedule instead of the original ones
+  assert not set( specialized ) & set( m._sched.update_schedule + m._sched.schedule_ff )
+  assert trace == ref
+
+def test_specialize_packed_ff():
+  _, ref = _simulate( Ops, False )
+  _, trace = _simulate( Ops, True, packed_ff=True )
+  assert trace == ref
+
+@pytest.mark.parametrize( "cls", [ Ops, Hier ] )
+def test_specialize_activity_schedule( cls ):
+  _, ref = _simulate( cls, False )
+  m, trace = _simulate( cls, True, sched_pass=ActivitySchedulePass() )
+
+  specialized = m.get_metadata( SpecializeUpblkPass.specialized_upblks )
+  assert len( specialized ) == len( m.get_all_update_blocks() )
+  # The generated blocks replace the original ones behind the evaluators
+  blks = [ x for v in m._sched.activity_blocks.values() for x in v ]
+  assert not set( specialized ) & set( blks )
+  assert trace == ref
+
+def test_specialize_fallback():
+  _, ref = _simulate( Swap, False )
+  m, trace = _simulate( Swap, True )
+
+  unspecialized = m.get_metadata( SpecializeUpblkPass.unspecialized_upblks )
+  assert [ x.__name__ for x in unspecialized ] == [ 'up_swap' ]
+  assert [ x.__name__ for x in m.get_metadata( SpecializeUpblkPass.specialized_upblks ) ] == [ 'up_cnt' ]
+  assert trace == ref
+
+def test_specialize_python_values():
+  _, ref = _simulate( PyState, False, ncycles=20 )
+  m, trace = _simulate( PyState, True, ncycles=20 )
+
+  specialized = m.get_metadata( SpecializeUpblkPass.specialized_upblks )
+  assert [ x.__name__ for x in specialized ] == [ 'up_out' ]
+  assert trace == ref
+
+def test_specialize_after_prepare_sim():
+  m = Ops()
+  m.elaborate()
+  m.apply( GenDAGPass() )
+  m.apply( SimpleSchedulePass() )
+  m.apply( PrepareSimPass( print_line_trace=False ) )
+  with pytest.raises( Exception, match="before PrepareSimPass" ):
+    m.apply( SpecializeUpblkPass() )
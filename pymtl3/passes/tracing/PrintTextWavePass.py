@@ -22,6 +22,8 @@ from pymtl3.dsl import Const, MetadataKey
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
+from .SignalFilter import make_signal_filter
+
 
 class PrintTextWavePass( BasePass ):
 
@@ -41,6 +43,31 @@ class PrintTextWavePass( BasePass ):
   #: Default value: False
   enable = MetadataKey(bool)
 
+  #: Only record the signals that match one of the patterns. A pattern
+  #: is a glob string or a compiled regex matched against the signal name
+  #: relative to the top component (e.g. "dpath.alu.*") or any of its
+  #: parent scopes (e.g. "dpath").
+  #:
+  #: Type: ``str``, ``re.Pattern``, or a list of them; input
+  #:
+  #: Default value: None
+  include = MetadataKey()
+
+  #: Don't record the signals that match one of the patterns.
+  #:
+  #: Type: ``str``, ``re.Pattern``, or a list of them; input
+  #:
+  #: Default value: None
+  exclude = MetadataKey()
+
+  #: Only record the signals of components at most this deep in the
+  #: hierarchy. The top component has depth 0.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: None
+  max_depth = MetadataKey(int)
+
   textwave_func = MetadataKey()
   textwave_dict = MetadataKey()
 
@@ -220,11 +247,17 @@ class PrintTextWavePass( BasePass ):
     wav_srcs = []
     text_sigs = {}
 
+    # Unselected signals are never sampled. reset is always recorded
+    # because print_wave uses it to count cycles.
+    get = lambda key: top.get_metadata( key ) if top.has_metadata( key ) else None
+    selected = make_signal_filter( get( self.include ), get( self.exclude ), get( self.max_depth ) )
+
     # Now we create per-cycle signal value collect functions
     signal_names = []
     for x in top._dsl.all_signals:
       if x.is_top_level_signal() and x.get_field_name() != "clk" and x.get_field_name() != "reset":
-        signal_names.append( (x._dsl.level, repr(x)) )
+        if selected is None or selected( x ):
+          signal_names.append( (x._dsl.level, repr(x)) )
 
     for _, x in [(0, 's.reset')] + sorted(signal_names):
       text_sigs[x] = []
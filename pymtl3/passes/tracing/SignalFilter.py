@@ -0,0 +1,56 @@
+"""
+========================================================================
+SignalFilter.py
+========================================================================
+Shared signal selection of the tracing passes.
+
+A signal is identified by its hierarchical name relative to the top
+component, e.g. "dpath.alu.out" or "enq.msg". A pattern is either a glob
+string (fnmatch syntax, "*" also matches dots) or a compiled regular
+expression. A pattern selects a signal if it matches the full name or
+any of its parent scopes, so "dpath" selects everything inside dpath.
+
+The depth of a signal is the depth of its host component, i.e. the
+signals of the top component have depth 0.
+
+Date   : Oct 18, 2026
+"""
+import re
+from fnmatch import fnmatchcase
+
+
+def _match( pattern, names ):
+  if isinstance( pattern, re.Pattern ):
+    return any( pattern.fullmatch( x ) for x in names )
+  if isinstance( pattern, str ):
+    return any( fnmatchcase( x, pattern ) for x in names )
+  raise TypeError( f"signal filter pattern should be a glob string or a compiled "
+                   f"regular expression, not {pattern!r}" )
+
+def _scopes( name ):
+  """ "a.b[0].c" -> [ "a", "a.b[0]", "a.b[0].c" ] """
+  fields = name.split('.')
+  return [ '.'.join( fields[:i+1] ) for i in range(len(fields)) ]
+
+def make_signal_filter( include=None, exclude=None, max_depth=None ):
+  """ Return a predicate that takes a signal and returns True if it is
+  selected, or None if the filter selects everything. """
+
+  if isinstance( include, (str, re.Pattern) ): include = [ include ]
+  if isinstance( exclude, (str, re.Pattern) ): exclude = [ exclude ]
+
+  if not include and not exclude and max_depth is None:
+    return None
+
+  def selected( signal ):
+    if max_depth is not None and signal.get_host_component()._dsl.level > max_depth:
+      return False
+
+    names = _scopes( repr(signal)[2:] )
+    if include and not any( _match( p, names ) for p in include ):
+      return False
+    if exclude and any( _match( p, names ) for p in exclude ):
+      return False
+    return True
+
+  return selected
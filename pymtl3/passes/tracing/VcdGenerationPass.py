@@ -7,14 +7,20 @@ Author : Shunning Jiang, Yanghui Ou, Peitian Pan
 Date   : Sep 8, 2019
 """
 
+import gzip
+import linecache
 import time
+import weakref
 from collections import defaultdict
 
 from pymtl3.datatypes import Bits, concat
 from pymtl3.dsl import Const, MetadataKey
+from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
+from .SignalFilter import make_signal_filter
+
 
 class VcdGenerationPass( BasePass ):
 
@@ -27,8 +33,70 @@ class VcdGenerationPass( BasePass ):
   #: Default value: ""
   vcd_file_name = MetadataKey(str)
 
+  #: Write a gzip-compressed vcd.gz file instead of a plain vcd file
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  vcd_compress = MetadataKey(bool)
+
+  #: Only keep the values of the last N cycles in a ring buffer and
+  #: write them to the vcd file when the trigger fires or the window is
+  #: dumped explicitly. 0 means dumping every cycle.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 0
+  vcd_window = MetadataKey(int)
+
+  #: The trigger of the windowed capture. Either a cycle number, or a
+  #: callable that takes the top component and returns True to dump the
+  #: captured window. It is checked at the end of every cycle.
+  #:
+  #: Type: ``int`` or callable; input
+  #:
+  #: Default value: None
+  vcd_trigger = MetadataKey()
+
+  #: Only dump the signals that match one of the patterns. A pattern is
+  #: a glob string or a compiled regex matched against the signal name
+  #: relative to the top component (e.g. "dpath.alu.*") or any of its
+  #: parent scopes (e.g. "dpath").
+  #:
+  #: Type: ``str``, ``re.Pattern``, or a list of them; input
+  #:
+  #: Default value: None
+  vcd_include = MetadataKey()
+
+  #: Don't dump the signals that match one of the patterns. Same syntax
+  #: as vcd_include.
+  #:
+  #: Type: ``str``, ``re.Pattern``, or a list of them; input
+  #:
+  #: Default value: None
+  vcd_exclude = MetadataKey()
+
+  #: Only dump the signals of components at most this deep in the
+  #: hierarchy. The top component has depth 0.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: None
+  vcd_max_depth = MetadataKey(int)
+
   vcd_func = MetadataKey()
 
+  #: Flush the buffered vcd file, e.g. at the end of a test
+  #:
+  #: Type: callable; output
+  vcd_flush_func = MetadataKey()
+
+  #: Write the cycles captured in the ring buffer to the vcd file, e.g.
+  #: when a test fails. Only available with vcd_window.
+  #:
+  #: Type: callable; output
+  vcd_dump_window_func = MetadataKey()
+
   def __call__( self, top ):
     if top.has_metadata( self.vcd_file_name ):
       vcd_file_name = top.get_metadata( self.vcd_file_name )
@@ -44,7 +112,12 @@ class VcdGenerationPass( BasePass ):
     else:
       vcd_file_name = str(top.__class__.__name__) + ".vcd"
 
-    vcd_file = open( vcd_file_name, "w" )
+    compress = top.has_metadata( self.vcd_compress ) and top.get_metadata( self.vcd_compress )
+
+    if compress:
+      vcd_file = gzip.open( vcd_file_name + ".gz", "wt", compresslevel=6 )
+    else:
+      vcd_file = open( vcd_file_name, "w", buffering=1<<20 )
 
     # Get vcd timescale
 
@@ -86,10 +159,20 @@ class VcdGenerationPass( BasePass ):
 
     all_components = set()
 
+    # Unselected signals are never declared or sampled. The clock is
+    # always kept because it drives the time axis of the waveform.
+    get = lambda key: top.get_metadata( key ) if top.has_metadata( key ) else None
+    max_depth = get( self.vcd_max_depth )
+    selected  = make_signal_filter( get( self.vcd_include ), get( self.vcd_exclude ), max_depth )
+    if selected is None:
+      is_traced = lambda x: True
+    else:
+      is_traced = lambda x: selected( x ) or repr(x) == "s.clk"
+
     # We only collect top level signals, and squash bitstruct into a long
     # bits object
     for x in top._dsl.all_signals:
-      if x.is_top_level_signal():
+      if x.is_top_level_signal() and is_traced( x ):
         host = x.get_host_component()
         component_signals[ host ].add( x )
 
@@ -103,7 +186,7 @@ class VcdGenerationPass( BasePass ):
     for writer, net in top.get_all_value_nets():
       new_net = []
       for x in net:
-        if not isinstance(x, Const) and x.is_top_level_signal():
+        if not isinstance(x, Const) and x.is_top_level_signal() and is_traced( x ):
           new_net.append( x )
           if repr(x) == "s.clk":
             # Hardcode clock net because it needs to go up and down
@@ -183,7 +266,8 @@ class VcdGenerationPass( BasePass ):
 
       # Recursively visit all submodels.
       for child in m.get_child_components():
-        recurse_models( child, spaces+'  ' )
+        if max_depth is None or child._dsl.level <= max_depth:
+          recurse_models( child, spaces+'  ' )
 
       print( f"{spaces}$upscope $end", file=vcd_file )
 
@@ -195,20 +279,6 @@ class VcdGenerationPass( BasePass ):
     # nets in the design.
     print( "$enddefinitions $end\n", file=vcd_file )
 
-    # last_values is an array of values from the previous cycle
-
-    last_values = [0 for _ in range(len(trimmed_value_nets))]
-
-    for i, net in enumerate(trimmed_value_nets):
-      # Convert everything to Bits to get around lack of bit struct support.
-      # The first cycle VCD contains the default value
-      bin_str = net[0]._dsl.Type().to_bits().bin()
-
-      print( f"b{bin_str} {net_symbol_mapping[i]}", file=vcd_file )
-
-      # Set this to be the last cycle value str
-      last_values[i] = bin_str
-
     # Now we create per-cycle signal value collect functions
 
     vcd_sim_ncycles = 0
@@ -220,49 +290,168 @@ class VcdGenerationPass( BasePass ):
                     for i in range(len(trimmed_value_nets))
                       if i != vcd_clock_net_idx ]
 
-    # Flip clock for the first cycle
-    print( '\n#0\nb0b1 {}\n'.format( clock_symbol ), file=vcd_file, flush=True )
+    # Calling eval(repr(signal)) and comparing bin() strings for every
+    # net every cycle costs way more than the simulation itself. Instead
+    # we generate straight-line code that reads each net through its
+    # attribute path as a plain int.
 
-    # Returns a dump_vcd function that is ready to be appended to _sched.
-    # TODO: type check?
+    net_reads = []
+    for signal, _ in net_details:
+      if issubclass( signal._dsl.Type, Bits ): net_reads.append( f"int({signal!r})" )
+      else:                                    net_reads.append( f"int({signal!r}.to_bits())" )
 
-    # Adding this 's' argument is for eval to correctly evaluate 's.x'...
-    # Python 3 destroys a lot of our hacks .. sigh
+    bad_net_type = self._make_bad_net_type( top, net_details, net_reads )
 
-    def dump_vcd_inner( s ):
-      nonlocal vcd_sim_ncycles
+    # Make sure the tail of the buffer is written out at the end
+    weakref.finalize( top, vcd_file.close )
+    top.set_metadata( VcdGenerationPass.vcd_flush_func, vcd_file.flush )
 
-      for i, (signal, symbol) in enumerate( net_details ):
+    window = top.get_metadata( self.vcd_window ) if top.has_metadata( self.vcd_window ) else 0
+    if window:
+      trigger = top.get_metadata( self.vcd_trigger ) if top.has_metadata( self.vcd_trigger ) else None
+      return self._make_window_func( top, vcd_file, vcd_file_name, net_details, net_reads,
+                                     bad_net_type, clock_symbol, window, trigger )
 
-        # If we encounter a BitStruct then dump it as a concatenation of
-        # all fields.
-        # TODO: treat each field in a BitStruct as a separate signal?
+    # The first cycle VCD contains the default value. We keep the last
+    # dumped value of each net as a plain int.
+    # Convert everything to Bits to get around lack of bit struct support.
 
+    print( f"b0 {clock_symbol}", file=vcd_file )
+
+    last_values = []
+    for signal, symbol in net_details:
+      v = int( signal._dsl.Type().to_bits() )
+      last_values.append( v )
+      print( f"b{v:0{signal._dsl.Type.nbits}b} {symbol}", file=vcd_file )
+
+    # Flip clock for the first cycle
+    print( f'\n#0\nb1 {clock_symbol}\n', file=vcd_file )
+    vcd_file.flush()
+
+    # Compare against the last values and only format the values that
+    # changed. Everything is written with one write() per cycle to a
+    # large buffered file without flushing.
+
+    srcs = []
+    for i, (signal, symbol) in enumerate( net_details ):
+      srcs.append( f"v = {net_reads[i]}" )
+      srcs.append( f"if v != last[{i}]: last[{i}] = v; out.append( 'b' + format( v, '0{signal._dsl.Type.nbits}b' ) + {' '+symbol!r} )" )
+
+    lines = [
+      'def compile_dump_vcd( s, last, write, clock_symbol, bad_net_type ):',
+      '  ncycles = 0',
+      '  def dump_vcd():',
+      '    nonlocal ncycles',
+      '    out = []',
+      '    try:',
+      *[ '      ' + x for x in srcs ],
+      '    except Exception as e:',
+      '      raise bad_net_type( e )',
+      '    # Flop clock at the end of cycle and flip clock of the next cycle',
+      '    next_neg_edge = 100 * ncycles + 50',
+      "    out.append( f'\\n#{next_neg_edge}\\nb0 {clock_symbol}\\n#{next_neg_edge+50}\\nb1 {clock_symbol}\\n\\n' )",
+      "    write( '\\n'.join( out ) )",
+      '    ncycles += 1',
+      '  return dump_vcd',
+    ]
+
+    filename = f"dump_vcd ({vcd_file_name})"
+    l = {}
+    custom_exec( compile( '\n'.join(lines), filename=filename, mode='exec' ), {}, l )
+    linecache.cache[ filename ] = (1, None, lines, filename)
+
+    return l['compile_dump_vcd']( top, last_values, vcd_file.write, clock_symbol, bad_net_type )
+
+  def _make_bad_net_type( self, top, net_details, net_reads ):
+    """ The generated code reads all nets in one go, so when one of the
+    reads fails we don't know which signal it was. The returned function
+    re-runs the reads one by one and reports the offending signal. """
+
+    def bad_net_type( e ):
+      for (signal, _), read in zip( net_details, net_reads ):
         try:
-          net_bits_bin = eval(repr(signal)).to_bits()
-        except Exception as e:
-          raise TypeError(f'{e}\n - {signal} becomes another type. Please check your code.')
-
-        net_bits_bin_str = net_bits_bin.bin()
-        # `last_value` is the string form of a Bits object in binary
-        # e.g. '0b000' == Bits3(0).bin()
-        # We store strings instead of values ...
-        if last_values[i] != net_bits_bin_str:
-          last_values[i] = net_bits_bin_str
-          print( f'b{net_bits_bin_str} {symbol}', file=vcd_file )
-
-      # Flop clock at the end of cycle
-      next_neg_edge = 100 * vcd_sim_ncycles + 50
-      print( f'\n#{next_neg_edge}\nb0b0 {clock_symbol}', file=vcd_file )
-
-      # Flip clock of the next cycle
-      next_pos_edge = next_neg_edge + 50
-      print( f'#{next_pos_edge}\nb0b1 {clock_symbol}\n', file=vcd_file, flush=True )
-      vcd_sim_ncycles += 1
-
-    def gen_dump_vcd( s ):
-      def dump_vcd():
-        dump_vcd_inner( s )
-      return dump_vcd
-
-    return gen_dump_vcd( top )
+          eval( read, { 's': top } )
+        except Exception as err:
+          return TypeError(f'{err}\n - {signal} becomes another type. Please check your code.')
+      return e
+
+    return bad_net_type
+
+  def _make_window_func( self, top, vcd_file, vcd_file_name, net_details, net_reads,
+                         bad_net_type, clock_symbol, window, trigger ):
+    """ Windowed capture. Every cycle we only store a tuple of all net
+    values into a preallocated ring buffer of the last `window` cycles.
+    Nothing is formatted or written until the trigger fires or the window
+    is dumped explicitly. Each dump writes the captured cycles that have
+    not been written before, so a long run with several triggers produces
+    several windows in the same vcd file. """
+
+    assert window > 0, "vcd_window must be a positive number of cycles"
+
+    ring   = [ None ] * window
+    nbits  = [ signal._dsl.Type.nbits for signal, _ in net_details ]
+    symbols = [ symbol for _, symbol in net_details ]
+    last    = None
+    written = 0
+
+    vcd_file.flush()
+
+    def dump_window( ncycles ):
+      nonlocal last, written
+
+      start = max( written, ncycles - window )
+      # There is a gap between the previous window and this one, so we
+      # have to dump every value again
+      if start != written:
+        last = None
+
+      out = []
+      for c in range( start, ncycles ):
+        values = ring[ c % window ]
+        out.append( f'#{100*c}\nb1 {clock_symbol}' )
+        for i, v in enumerate( values ):
+          if last is None or v != last[i]:
+            out.append( f'b{v:0{nbits[i]}b} {symbols[i]}' )
+        out.append( f'#{100*c+50}\nb0 {clock_symbol}\n' )
+        last = values
+
+      written = ncycles
+      if out:
+        vcd_file.write( '\n'.join( out ) + '\n' )
+        vcd_file.flush()
+
+    if trigger is None:
+      check = []
+    elif isinstance( trigger, int ):
+      check = [ f'if ncycles == {trigger+1}: dump_window( ncycles )' ]
+    elif callable( trigger ):
+      check = [ 'if trigger( s ): dump_window( ncycles )' ]
+    else:
+      raise TypeError( f"vcd_trigger should be a cycle number or a callable, not {trigger!r}" )
+
+    tuple_src = ", ".join( net_reads ) + ( "," if len(net_reads) == 1 else "" )
+
+    lines = [
+      'def compile_sample_vcd( s, ring, trigger, dump_window, bad_net_type ):',
+      '  ncycles = 0',
+      '  def sample_vcd():',
+      '    nonlocal ncycles',
+      '    try:',
+      f'      ring[ ncycles % {window} ] = ( {tuple_src} )',
+      '    except Exception as e:',
+      '      raise bad_net_type( e )',
+      '    ncycles += 1',
+      *[ '    ' + x for x in check ],
+      '  def dump():',
+      '    dump_window( ncycles )',
+      '  return sample_vcd, dump',
+    ]
+
+    filename = f"sample_vcd ({vcd_file_name})"
+    l = {}
+    custom_exec( compile( '\n'.join(lines), filename=filename, mode='exec' ), {}, l )
+    linecache.cache[ filename ] = (1, None, lines, filename)
+
+    sample_vcd, dump = l['compile_sample_vcd']( top, ring, trigger, dump_window, bad_net_type )
+    top.set_metadata( VcdGenerationPass.vcd_dump_window_func, dump )
+    return sample_vcd
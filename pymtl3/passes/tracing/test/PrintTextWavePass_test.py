@@ -306,3 +306,40 @@ def test_bitstruct():
     sliced = i[dot+1:]
     if sliced != "reset" and sliced != "clk":
       assert i[dot+1:] in out
+
+def test_signal_filter():
+  import re
+
+  class Inner( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits16 )
+      s.out = OutPort( Bits16 )
+      s.tmp = Wire( Bits16 )
+      s.tmp //= s.in_
+      s.out //= s.tmp
+
+  class Outer( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits16 )
+      s.out = OutPort( Bits16 )
+      s.u0 = Inner()
+      s.u1 = Inner()
+      s.u0.in_ //= s.in_
+      s.u1.in_ //= s.u0.out
+      s.out //= s.u1.out
+
+  def collect( **kwargs ):
+    dut = Outer()
+    dut.elaborate()
+    dut.set_metadata( PrintTextWavePass.enable, True )
+    for k, v in kwargs.items():
+      dut.set_metadata( getattr( PrintTextWavePass, k ), v )
+    dut.apply( DefaultPassGroup() )
+    dut.sim_reset()
+    return set( dut.get_metadata( PrintTextWavePass.textwave_dict ) )
+
+  assert collect( max_depth=0 ) == { "s.reset", "s.in_", "s.out" }
+  assert collect( include="u0" ) == { "s.reset", "s.u0.in_", "s.u0.out", "s.u0.tmp" }
+  assert collect( include=re.compile( r"u\d\.tmp" ) ) == { "s.reset", "s.u0.tmp", "s.u1.tmp" }
+  assert collect( include=[ "u1", "out" ], exclude="*.tmp" ) == \
+         { "s.reset", "s.out", "s.u1.in_", "s.u1.out" }
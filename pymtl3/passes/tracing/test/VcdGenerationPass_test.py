@@ -11,6 +11,8 @@
 # Author: Peitian Pan
 # Date:   Nov 1, 2019
 
+import pytest
+
 from pymtl3.datatypes import *
 from pymtl3.dsl import *
 from pymtl3.passes.PassGroups import DefaultPassGroup
@@ -89,3 +91,166 @@ def test_bitstruct_signals():
     [  bs(0, -1), b32(0), b32(-1), ],
     [  bs(0, 42), b32(42), b32(84), ],
   ], tv_in, tv_out )
+
+def _get_changes( lines, name ):
+  symbol = [ x.split()[3] for x in lines
+             if x.startswith('$var') and x.split()[4] == name ][0]
+  return [ x.split()[0] for x in lines if x.endswith(' '+symbol) and x.startswith('b') ]
+
+def test_value_changes_only():
+  class A3( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update
+      def upblk():
+        s.out @= s.in_ + 1
+
+  dut = A3()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "A3_changes" )
+  dut.apply( DefaultPassGroup() )
+  for v in [ 3, 3, 3, 7, 7, 255 ]:
+    dut.in_ @= v
+    dut.sim_tick()
+  dut.get_metadata( VcdGenerationPass.vcd_flush_func )()
+
+  with open("A3_changes.vcd") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  # Initial value followed by one line per change
+  assert _get_changes( lines, "out" ) == [ 'b00000000', 'b00000100', 'b00001000', 'b00000000' ]
+  assert _get_changes( lines, "in_" ) == [ 'b00000000', 'b00000011', 'b00000111', 'b11111111' ]
+
+def test_compressed_vcd():
+  import gc
+  import gzip
+
+  class A4( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update
+      def upblk():
+        s.out @= s.in_ + 1
+
+  dut = A4()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "A4_compressed" )
+  dut.set_metadata( VcdGenerationPass.vcd_compress, True )
+  dut.apply( DefaultPassGroup() )
+  for v in [ 1, 2, 2, 5 ]:
+    dut.in_ @= v
+    dut.sim_tick()
+
+  # The gzip trailer is only written when the file is closed, which
+  # happens when the model is garbage collected
+  del dut
+  gc.collect()
+
+  with gzip.open("A4_compressed.vcd.gz", "rt") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  assert _get_changes( lines, "out" ) == [ 'b00000000', 'b00000010', 'b00000011', 'b00000110' ]
+
+class Counter( Component ):
+  def construct( s ):
+    s.out = OutPort( Bits8 )
+
+    @update_ff
+    def up_count():
+      s.out <<= s.out + 1
+
+def test_window_cycle_trigger():
+  dut = Counter()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "Counter_window" )
+  dut.set_metadata( VcdGenerationPass.vcd_window, 3 )
+  dut.set_metadata( VcdGenerationPass.vcd_trigger, 10 )
+  dut.apply( DefaultPassGroup() )
+  for i in range(20):
+    dut.sim_tick()
+
+  with open("Counter_window.vcd") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  # Only cycles 8, 9 and 10 are written
+  assert [ x for x in lines if x.startswith('#') ] == \
+         [ '#800', '#850', '#900', '#950', '#1000', '#1050' ]
+  assert _get_changes( lines, "out" ) == [ 'b00001000', 'b00001001', 'b00001010' ]
+
+@pytest.mark.parametrize( "window", [ 0, 3 ] )
+def test_signal_becomes_another_type( window ):
+  dut = Counter()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "Counter_bad_type" )
+  dut.set_metadata( VcdGenerationPass.vcd_window, window )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_tick()
+
+  dut.out = None
+  with pytest.raises( TypeError, match=r"s\.out becomes another type" ):
+    dut.sim_tick()
+
+def test_window_predicate_and_explicit_dump():
+  dut = Counter()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "Counter_window_pred" )
+  dut.set_metadata( VcdGenerationPass.vcd_window, 2 )
+  dut.set_metadata( VcdGenerationPass.vcd_trigger, lambda s: s.out == 5 )
+  dut.apply( DefaultPassGroup() )
+  for i in range(10):
+    dut.sim_tick()
+  dut.get_metadata( VcdGenerationPass.vcd_dump_window_func )()
+
+  with open("Counter_window_pred.vcd") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  # The second window doesn't overlap with the first one so all values
+  # are dumped again
+  assert [ x for x in lines if x.startswith('#') and not x.endswith('50') ] == \
+         [ '#400', '#500', '#800', '#900' ]
+  assert _get_changes( lines, "out" ) == [ 'b00000100', 'b00000101', 'b00001000', 'b00001001' ]
+
+def test_signal_filter():
+  class Inner( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.out //= s.in_
+
+  class Outer( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.u0 = Inner()
+      s.u1 = Inner()
+      s.u0.in_ //= s.in_
+      s.u1.in_ //= s.u0.out
+      @update
+      def upblk():
+        s.out @= s.u1.out + 1
+
+  dut = Outer()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "Outer_filter" )
+  dut.set_metadata( VcdGenerationPass.vcd_include, [ "u1", "out" ] )
+  dut.set_metadata( VcdGenerationPass.vcd_exclude, [ "u1.in_", "*.clk", "*.reset" ] )
+  dut.apply( DefaultPassGroup() )
+  for v in [ 1, 2, 3 ]:
+    dut.in_ @= v
+    dut.sim_tick()
+  dut.get_metadata( VcdGenerationPass.vcd_flush_func )()
+
+  with open("Outer_filter.vcd") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  declared = [ x.split()[4] for x in lines if x.startswith('$var') ]
+  assert sorted( declared ) == [ "clk", "out", "out" ]
+  # Only the two nets of s.out and s.u1.out are sampled besides clk
+  assert len({ x.split()[1] for x in lines if x.startswith('b') }) == 3
+  assert _get_changes( lines, "out" ) == [ 'b00000000', 'b00000010', 'b00000011', 'b00000100' ]
+
+  dut = Outer()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, "Outer_depth" )
+  dut.set_metadata( VcdGenerationPass.vcd_max_depth, 0 )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_tick()
+  dut.get_metadata( VcdGenerationPass.vcd_flush_func )()
+
+  with open("Outer_depth.vcd") as fd:
+    lines = [ x.strip() for x in fd.readlines() ]
+  assert not any( x.startswith('$scope module u') for x in lines )
+  assert sorted( x.split()[4] for x in lines if x.startswith('$var') ) == \
+         [ "clk", "in_", "out", "reset" ]
@@ -1,3 +1,7 @@
+import mmap
+import os
+import weakref
+
 from pymtl3 import *
 from pymtl3.extra.pypy.fast_bytearray_funcs import (
     read_bytearray_bits,
@@ -17,10 +21,122 @@ AMO_FUNS = { MemMsgType.AMO_ADD  : lambda m,a : m+a,
              MemMsgType.AMO_XOR  : lambda m,a : m^a,
            }
 
+#-------------------------------------------------------------------------
+# PagedByteArray
+#-------------------------------------------------------------------------
+# A sparse bytearray-like storage. The address space is split into pages
+# that are only allocated when they are written for the first time, and
+# reading an untouched page returns zeros. This makes multi-GB address
+# spaces cheap as long as the workload only touches a small part of it.
+
+class PagedByteArray:
+
+  def __init__( s, nbytes, page_nbytes=4096 ):
+    assert page_nbytes > 0 and (page_nbytes & (page_nbytes - 1)) == 0, \
+        f"page size {page_nbytes} must be a power of two"
+    s.nbytes      = nbytes
+    s.page_nbytes = page_nbytes
+    s.page_shift  = page_nbytes.bit_length() - 1
+    s.page_mask   = page_nbytes - 1
+    s.pages       = {}
+
+  def __len__( s ):
+    return s.nbytes
+
+  def _range( s, idx ):
+    start, stop, step = idx.indices( s.nbytes )
+    assert step == 1, "PagedByteArray doesn't support slices with step"
+    return start, max( start, stop )
+
+  def __getitem__( s, idx ):
+    if not isinstance( idx, slice ):
+      idx = int(idx)
+      page = s.pages.get( idx >> s.page_shift )
+      return 0 if page is None else page[ idx & s.page_mask ]
+
+    start, stop = s._range( idx )
+    ret = bytearray( stop - start )
+    addr = start
+    while addr < stop:
+      offset = addr & s.page_mask
+      n = min( s.page_nbytes - offset, stop - addr )
+      page = s.pages.get( addr >> s.page_shift )
+      if page is not None:
+        ret[ addr - start : addr - start + n ] = page[ offset : offset + n ]
+      addr += n
+    return ret
+
+  def _get_page( s, pageidx ):
+    page = s.pages.get( pageidx )
+    if page is None:
+      page = s.pages[ pageidx ] = bytearray( s.page_nbytes )
+    return page
+
+  def __setitem__( s, idx, data ):
+    if not isinstance( idx, slice ):
+      idx = int(idx)
+      s._get_page( idx >> s.page_shift )[ idx & s.page_mask ] = data
+      return
+
+    start, stop = s._range( idx )
+    assert stop - start == len(data), "PagedByteArray doesn't support resizing"
+    addr = start
+    while addr < stop:
+      offset = addr & s.page_mask
+      n = min( s.page_nbytes - offset, stop - addr )
+      s._get_page( addr >> s.page_shift )[ offset : offset + n ] = data[ addr - start : addr - start + n ]
+      addr += n
+
+# Slice-based accessors that work on both PagedByteArray and mmap. They
+# only touch each page once instead of indexing byte by byte.
+
+def read_paged_bits( arr, addr, nbytes ):
+  addr = int(addr)
+  return Bits( nbytes << 3, int.from_bytes( arr[ addr : addr + nbytes ], 'little' ) )
+
+def write_paged_bits( arr, addr, nbytes, data ):
+  addr = int(addr)
+  arr[ addr : addr + nbytes ] = ( int(data) & ((1 << (nbytes << 3)) - 1) ).to_bytes( nbytes, 'little' )
+
+def close_mmap( mem ):
+  if not mem.closed:
+    mem.flush()
+    mem.close()
+
+#-------------------------------------------------------------------------
+# BehavioralMemory
+#-------------------------------------------------------------------------
+# By default the memory is a dense bytearray. Set sparse=True to use a
+# PagedByteArray, or mmap_file to back the memory with a file mapped
+# into the address space, in which case the OS only allocates the pages
+# that are touched and the content persists in the file. The mapping is
+# flushed and closed by close(), or when the memory is garbage collected.
+
 class BehavioralMemory( Component ):
 
-  def construct( s, mem_nbytes=1<<20 ):
-    s.mem = bytearray( mem_nbytes )
+  def construct( s, mem_nbytes=1<<20, sparse=False, page_nbytes=4096, mmap_file=None ):
+    assert not (sparse and mmap_file), "sparse and mmap_file cannot be used together"
+
+    if mmap_file:
+      fd = os.open( mmap_file, os.O_RDWR | os.O_CREAT )
+      try:
+        if os.fstat( fd ).st_size < mem_nbytes:
+          os.ftruncate( fd, mem_nbytes )
+        s.mem = mmap.mmap( fd, mem_nbytes )
+      finally:
+        os.close( fd )
+      s._mem_finalizer = weakref.finalize( s, close_mmap, s.mem )
+    elif sparse:
+      s.mem = PagedByteArray( mem_nbytes, page_nbytes )
+    else:
+      s.mem = bytearray( mem_nbytes )
+
+    if isinstance( s.mem, bytearray ):
+      s._read_bits  = read_bytearray_bits
+      s._write_bits = write_bytearray_bits
+    else:
+      s._read_bits  = read_paged_bits
+      s._write_bits = write_paged_bits
 
     s.trace = "     "
     @update_once
@@ -31,7 +147,7 @@ class BehavioralMemory( Component ):
     assert len(s.mem) > (int(addr) + int(nbytes)), \
         f"Out-of-bound memory read of {int(nbytes)} bytes @ 0x{int(addr):#08x} detected at behavioral memory {s}!"
     s.trace = "[rd ]"
-    return read_bytearray_bits( s.mem, addr, nbytes )
+    return s._read_bits( s.mem, addr, nbytes )
 
   def write( s, addr, nbytes, data ):
     assert isinstance(data, Bits), \
@@ -39,7 +155,7 @@ class BehavioralMemory( Component ):
     assert len(s.mem) > (int(addr) + data.nbits // 8), \
         f"Out-of-bound memory write of {data.nbits//8} bytes @ 0x{int(addr):#08x} detected at behavioral memory {s}!"
     s.trace = "[wr ]"
-    write_bytearray_bits( s.mem, addr, nbytes, data )
+    s._write_bits( s.mem, addr, nbytes, data )
 
     # addr = int(addr)
     # end  = addr + nbytes
@@ -66,7 +182,17 @@ class BehavioralMemory( Component ):
         f"Write operand {data} needs to be bytes, bytearray, or list of bytes!"
     assert len(s.mem) > (int(addr) + len(data)), \
         f"Out-of-bound memory write of {len(data)} bytes @ 0x{int(addr):#08x} detected at behavioral memory {s}!"
-    s.mem[ addr : addr + len(data) ] = data
+    s.mem[ addr : addr + len(data) ] = bytes(data) if isinstance( data, list ) else data
+
+  def load_sparse_memory_image( s, mem_image ):
+    # Only write the sections so a sparse memory only allocates the
+    # pages that the image actually covers
+    for section in mem_image.get_sections():
+      s.write_mem( section.addr, section.data )
+
+  def close( s ):
+    if hasattr( s, '_mem_finalizer' ):
+      s._mem_finalizer()
 
   def line_trace( s ):
     return s.trace
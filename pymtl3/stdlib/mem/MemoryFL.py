@@ -56,14 +56,16 @@ class RandomStall( Component ):
 
     s.istream.msg //= s.ostream.msg
 
-    stall_rgen = Random( stall_seed )
+    # Keep the generator on the component so that it is part of
+    # simulation checkpoints
+    s.stall_rgen = Random( stall_seed )
 
     s.rand_value = 0
     s.stall_prob = stall_prob
 
     @update_ff
     def up_rand():
-      s.rand_value = stall_rgen.random()
+      s.rand_value = s.stall_rgen.random()
 
     @update
     def up_stall_rdy():
@@ -127,9 +129,16 @@ class MemoryFL( Component ):
   def write_mem( s, addr, data ):
     return s.mem.write_mem( addr, data )
 
+  def load_sparse_memory_image( s, mem_image ):
+    return s.mem.load_sparse_memory_image( mem_image )
+
+  def close( s ):
+    s.mem.close()
+
   # Actual stuff
   def construct( s, nports=1, mem_ifc_dtypes=[mk_mem_msg(8,32,32)],
-                    stall_prob=0, extra_latency=0, mem_nbytes=2**20 ):
+                    stall_prob=0, extra_latency=0, mem_nbytes=2**20,
+                    mem_sparse=False, mem_page_nbytes=4096, mem_mmap_file=None ):
 
     # Local constants
 
@@ -137,7 +146,8 @@ class MemoryFL( Component ):
     req_classes  = [ x for (x,y) in mem_ifc_dtypes ]
     resp_classes = [ y for (x,y) in mem_ifc_dtypes ]
 
-    s.mem = BehavioralMemory( mem_nbytes )
+    s.mem = BehavioralMemory( mem_nbytes, sparse=mem_sparse, page_nbytes=mem_page_nbytes,
+                              mmap_file=mem_mmap_file )
 
     # Interface
 
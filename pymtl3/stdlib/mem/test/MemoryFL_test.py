@@ -2,6 +2,7 @@
 # TestMemory_test.py
 #=========================================================================
 
+import functools
 import random
 import struct
 
@@ -329,3 +330,109 @@ def test_read_write_mem( cmdline_opts ):
   # Compare result to original data
 
   assert result == data
+
+#-------------------------------------------------------------------------
+# Test cases for sparse and mmap-backed memory
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test_2port_sparse_4GB( test_params, cmdline_opts ):
+  msgs0 = test_params.msg_func(0x1000)
+  msgs1 = test_params.msg_func(0xfff00000)
+  mem_cls = functools.partial( MemoryFL, mem_nbytes=1<<32, mem_sparse=True )
+  th = TestHarness( mem_cls, 2, [(req_cls, resp_cls)]*2,
+                    [ msgs0[::2],  msgs1[::2]  ],
+                    [ msgs0[1::2], msgs1[1::2] ],
+                    test_params.stall, test_params.lat,
+                    test_params.src_init, test_params.src_intv,
+                    test_params.sink_init, test_params.sink_intv )
+  run_sim( th )
+  # Only the touched pages are allocated
+  assert len(th.mem.mem.mem.pages) <= 4
+
+def test_mmap_mem( tmp_path, cmdline_opts ):
+  msgs = stream_msgs(0x1000)
+  mem_cls = functools.partial( MemoryFL, mem_nbytes=1<<24,
+                               mem_mmap_file=str(tmp_path / "mem.bin") )
+  th = TestHarness( mem_cls, 1, [(req_cls, resp_cls)], [ msgs[::2] ], [ msgs[1::2] ],
+                    0, 1, 0, 0, 0, 0 )
+  th.elaborate()
+  th.mem.write_mem( 0xfffff0, [ 0x12, 0x34 ] )
+  run_sim( th )
+  assert th.mem.read_mem( 0xfffff0, 2 ) == b'\x12\x34'
+
+  # Closing flushes the content to the file
+  th.mem.close()
+  assert th.mem.mem.mem.closed
+  with open( tmp_path / "mem.bin", 'rb' ) as f:
+    f.seek( 0xfffff0 )
+    assert f.read( 2 ) == b'\x12\x34'
+  th.mem.close()
+
+def test_sparse_page_nbytes( cmdline_opts ):
+  mem = MemoryFL( 1, mem_nbytes=1<<32, mem_sparse=True, mem_page_nbytes=1<<16 )
+  mem.elaborate()
+  assert mem.mem.mem.page_nbytes == 1<<16
+  mem.write_mem( 0x1fffe, [ 1, 2, 3, 4 ] )
+  assert sorted( mem.mem.mem.pages ) == [ 1, 2 ]
+  assert mem.read_mem( 0x1fffe, 4 ) == b'\x01\x02\x03\x04'
+
+def test_load_sparse_memory_image( cmdline_opts ):
+  from pymtl3.stdlib.proc import SparseMemoryImage
+
+  mem_image = SparseMemoryImage()
+  mem_image.add_section( ".text", 0x00001ffe, bytearray( b'\x01\x02\x03\x04' ) )
+  mem_image.add_section( ".data", 0xc0000000, bytearray( range(256) ) )
+
+  mem = MemoryFL( 1, mem_nbytes=1<<32, mem_sparse=True )
+  mem.elaborate()
+  mem.load_sparse_memory_image( mem_image )
+
+  # .text straddles two pages
+  assert len(mem.mem.mem.pages) == 3
+  assert mem.read_mem( 0x00001ffc, 8 ) == b'\x00\x00\x01\x02\x03\x04\x00\x00'
+  assert mem.read_mem( 0xc0000000, 256 ) == bytearray( range(256) )
+  assert mem.mem.read( 0x00001ffe, 4 ) == b32(0x04030201)
+  mem.mem.write( 0x00001fff, 2, b16(0xbeef) )
+  assert mem.read_mem( 0x00001ffe, 4 ) == b'\x01\xef\xbe\x04'
+  assert mem.mem.amo( MemMsgType.AMO_ADD, 0x00001ffe, 4, b32(1) ) == b32(0x04beef01)
+  assert mem.mem.read( 0x00001ffe, 4 ) == b32(0x04beef02)
+
+def test_sim_checkpoint_restore( tmp_path ):
+  msgs = random_msgs( 0x1000 )
+
+  def mk_harness():
+    th = TestHarness( MemoryFL, 1, [(req_cls, resp_cls)], [ msgs[::2] ], [ msgs[1::2] ],
+                      0.5, 4, 5, 14, 7, 14 )
+    th.elaborate()
+    th.apply( DefaultPassGroup( linetrace=False ) )
+    th.sim_reset()
+    return th
+
+  def run_to_end( th ):
+    traces = []
+    while not th.done():
+      th.sim_tick()
+      traces.append( th.line_trace() )
+    return traces
+
+  th = mk_harness()
+  for _ in range( 200 ):
+    th.sim_tick()
+  path = str( tmp_path / "mem.ckpt" )
+  th.sim_checkpoint( path )
+  ncycles = th.sim_cycle_count()
+  ref = run_to_end( th )
+  assert len(ref) > 10
+
+  # Restore into the same model
+  th.sim_restore( path )
+  assert th.sim_cycle_count() == ncycles
+  assert run_to_end( th ) == ref
+
+  # Restore into a newly constructed model
+  th = mk_harness()
+  th.sim_restore( path )
+  assert th.srcs[0].idx > 0
+  assert th.mem.read_mem( 0x1000, 4 ) != b'\x00\x00\x00\x00'
+  assert run_to_end( th ) == ref
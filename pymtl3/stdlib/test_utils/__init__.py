@@ -5,4 +5,5 @@ from .test_helpers import (
     mk_test_case_table,
     run_sim,
     run_test_vector_sim,
+    run_test_vector_sim_sharded,
 )
@@ -0,0 +1,95 @@
+#=========================================================================
+# run_test_vector_sim_sharded_test
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import RunTestVectorSimError, run_test_vector_sim_sharded
+
+#-------------------------------------------------------------------------
+# Test components
+#-------------------------------------------------------------------------
+
+class TestAdder( Component ):
+  def construct( s ):
+    s.in_ = [ InPort(8) for _ in range(2) ]
+    s.out = OutPort(8)
+
+    @update
+    def up():
+      s.out @= s.in_[0] + s.in_[1]
+
+class TestBuggyAdder( Component ):
+  def construct( s ):
+    s.in_ = [ InPort(8) for _ in range(2) ]
+    s.out = OutPort(8)
+
+    @update
+    def up():
+      # Wrong when both inputs are 7
+      if ( s.in_[0] == 7 ) & ( s.in_[1] == 7 ):
+        s.out @= 0
+      else:
+        s.out @= s.in_[0] + s.in_[1]
+
+class TestCounter( Component ):
+  def construct( s ):
+    s.in_ = InPort(8)
+    s.out = OutPort(8)
+
+    @update_ff
+    def up():
+      s.out <<= s.out + s.in_
+
+def adder_vectors():
+  return [ ('in_[0] in_[1] out*') ] + \
+         [ [ x, y, (x + y) & 0xff ] for x in range(64) for y in range(64) ]
+
+@pytest.mark.parametrize( "num_workers, batch_size", [ (1, 4096), (4, 256) ] )
+def test_sharded_pass( num_workers, batch_size ):
+  run_test_vector_sim_sharded( TestAdder(), adder_vectors(),
+                               num_workers=num_workers, batch_size=batch_size )
+
+def test_sharded_dontcare():
+  run_test_vector_sim_sharded( TestAdder(), [
+    ('in_[0] in_[1] out*'),
+    [ 0,     1,     1     ],
+    [ 1,     2,     '?'   ],
+  ] )
+
+@pytest.mark.parametrize( "num_workers", [ 1, 4 ] )
+def test_sharded_collect_failures( num_workers ):
+  vectors = adder_vectors()
+  # Also corrupt two of the reference values
+  vectors[1][2]   = 99
+  vectors[-1][2]  = 0
+
+  with pytest.raises( RunTestVectorSimError ) as e:
+    run_test_vector_sim_sharded( TestBuggyAdder(), vectors,
+                                 num_workers=num_workers, batch_size=256 )
+
+  # Row numbers count from the first row after the port names
+  failures = e.value.failures
+  assert [ x[0] for x in failures ] == [ 1, 7*64+7+1, 64*64 ]
+  assert failures[1] == ( 7*64+7+1, "out", 14, str(Bits8(0)) )
+  assert "3 incorrect values" in str(e.value)
+
+@pytest.mark.parametrize( "test_verilog", [ False, 'zeros' ] )
+def test_sharded_reject_stateful( test_verilog ):
+  # The Python model is checked before it would be imported
+  cmdline_opts = { 'test_verilog' : test_verilog }
+  with pytest.raises( RunTestVectorSimError, match="stateless" ):
+    run_test_vector_sim_sharded( TestCounter(), [
+      ('in_ out*'),
+      [ 1,   1    ],
+    ], cmdline_opts )
+
+def test_sharded_invalid_input():
+  with pytest.raises( RunTestVectorSimError ):
+    run_test_vector_sim_sharded( TestAdder(), [
+      ('in_[0] in_[1] out*'),
+      [ '?',   1,     1     ],
+    ] )
@@ -9,6 +9,8 @@ Author : Shunning Jiang
 """
 
 import collections
+import multiprocessing
+import os
 import re
 
 from pymtl3 import *
@@ -50,6 +52,14 @@ def finalize_verilator( model ):
   if hasattr( model, 'finalize' ):
     model.finalize()
 
+def flush_vcd( model ):
+  if model.has_metadata( VcdGenerationPass.vcd_flush_func ):
+    model.get_metadata( VcdGenerationPass.vcd_flush_func )()
+
+def dump_vcd_window( model ):
+  if model.has_metadata( VcdGenerationPass.vcd_dump_window_func ):
+    model.get_metadata( VcdGenerationPass.vcd_dump_window_func )()
+
 def _recursive_set_vl_trace( m, dump_vcd ):
   if ( m.has_metadata( VerilogTranslationImportPass.enable ) and \
        m.get_metadata( VerilogTranslationImportPass.enable ) ) or \
@@ -85,6 +95,7 @@ def config_model_with_cmdline_opts( top, cmdline_opts, duts ):
   dump_textwave      = cmdline_opts['dump_textwave'] if 'dump_textwave' in cmdline_opts else False
   dump_vcd           = cmdline_opts['dump_vcd'] if 'dump_vcd' in cmdline_opts else False
   dump_vtb           = cmdline_opts['dump_vtb'] if 'dump_vtb' in cmdline_opts else False
+  vcd_window         = cmdline_opts['vcd_window'] if 'vcd_window' in cmdline_opts else None
 
   if test_verilog and test_yosys_verilog:
     raise ValueError("--test-verilog and --test-yosys-verilog cannot be enabled at the same time!")
@@ -166,6 +177,8 @@ def config_model_with_cmdline_opts( top, cmdline_opts, duts ):
   # Need to transfer metadata from the new DUT
   if dump_vcd:
     top.set_metadata( VcdGenerationPass.vcd_file_name, dump_vcd )
+    if vcd_window:
+      top.set_metadata( VcdGenerationPass.vcd_window, vcd_window )
 
   if dump_textwave:
     top.set_metadata( PrintTextWavePass.enable, True )
@@ -222,11 +235,17 @@ class TestVectorSimulator:
 
         self.model.sim_tick()
 
+    except Exception:
+      # Dump the captured window of cycles that led to the failure
+      dump_vcd_window( self.model )
+      raise
+
     finally:
       # Dump out textwave at the end of simulation
       if cmdline_opts['dump_textwave']:
           self.model.print_textwave()
 
+      flush_vcd( self.model )
       finalize_verilator( self.model )
 
 def run_sim( model, cmdline_opts=None, print_line_trace=True, duts=None ):
@@ -262,16 +281,66 @@ def run_sim( model, cmdline_opts=None, print_line_trace=True, duts=None ):
     model.sim_tick()
     model.sim_tick()
 
+  except Exception:
+    # Dump the captured window of cycles that led to the failure
+    dump_vcd_window( model )
+    raise
+
   finally:
     # Dump out textwave at the end of simulation
     if cmdline_opts['dump_textwave']:
         model.print_textwave()
 
+    flush_vcd( model )
     finalize_verilator( model )
 
 class RunTestVectorSimError( Exception ):
   pass
 
+def _parse_test_vector_ports( model, port_names ):
+  in_ids  = []
+  out_ids = []
+  groups  = [ None ] * len(port_names)
+  types   = [ None ] * len(port_names)
+
+  # Preprocess default type
+  # Special case for lists of ports
+  # NOTE THAT WE ONLY SUPPORT 1D ARRAY and no interface
+  for i, port_full_name in enumerate( port_names ):
+    if port_full_name[-1] == "*":
+      out_ids.append( i )
+      port_name = port_full_name[:-1]
+    else:
+      in_ids.append( i )
+      port_name = port_full_name
+
+    if '[' in port_name:
+      # Get tokens of the full name
+      m = re.match( r'(\w+)\[(\d+)\]', port_name )
+      if not m:
+        raise Exception(f"Could not parse port name: {port_name}. "
+                        f"Currently we don't support interface or high-D array.")
+
+      groups[i] = g = ( True, m.group(1), int(m.group(2)) )
+
+      if not hasattr( model, g[1] ):
+        raise RunTestVectorSimError(f"Invalid port name: {g[1]}")
+
+      # Get type of all the ports
+      t = type( getattr( model, g[1] )[ int(g[2]) ] )
+      types[i] = None if is_bitstruct_class( t ) else t
+
+    else:
+      groups[i] = ( False, port_name )
+
+      if not hasattr( model, port_name ):
+        raise RunTestVectorSimError(f"Invalid port name: {port_name}")
+
+      t = type( getattr( model, port_name ) )
+      types[i] = None if is_bitstruct_class( t ) else t
+
+  return in_ids, out_ids, groups, types
+
 def run_test_vector_sim( model, test_vectors, cmdline_opts=None, print_line_trace=True ):
   cmdline_opts = cmdline_opts or {'dump_textwave'      : False,
                                   'dump_vcd'           : False,
@@ -303,46 +372,7 @@ def run_test_vector_sim( model, test_vectors, cmdline_opts=None, print_line_trac
     # Run the simulation
 
     row_num = 0
-    in_ids  = []
-    out_ids = []
-    groups  = [ None ] * len(port_names)
-    types   = [ None ] * len(port_names)
-
-    # Preprocess default type
-    # Special case for lists of ports
-    # NOTE THAT WE ONLY SUPPORT 1D ARRAY and no interface
-    for i, port_full_name in enumerate( port_names ):
-      if port_full_name[-1] == "*":
-        out_ids.append( i )
-        port_name = port_full_name[:-1]
-      else:
-        in_ids.append( i )
-        port_name = port_full_name
-
-      if '[' in port_name:
-        # Get tokens of the full name
-        m = re.match( r'(\w+)\[(\d+)\]', port_name )
-        if not m:
-          raise Exception(f"Could not parse port name: {port_name}. "
-                          f"Currently we don't support interface or high-D array.")
-
-        groups[i] = g = ( True, m.group(1), int(m.group(2)) )
-
-        if not hasattr( model, g[1] ):
-          raise RunTestVectorSimError(f"Invalid port name: {g[1]}")
-
-        # Get type of all the ports
-        t = type( getattr( model, g[1] )[ int(g[2]) ] )
-        types[i] = None if is_bitstruct_class( t ) else t
-
-      else:
-        groups[i] = ( False, port_name )
-
-        if not hasattr( model, port_name ):
-          raise RunTestVectorSimError(f"Invalid port name: {port_name}")
-
-        t = type( getattr( model, port_name ) )
-        types[i] = None if is_bitstruct_class( t ) else t
+    in_ids, out_ids, groups, types = _parse_test_vector_ports( model, port_names )
 
     # Run simulation
 
@@ -408,9 +438,180 @@ run_test_vector_sim received an incorrect value!
     model.sim_tick()
     model.sim_tick()
 
+  except Exception:
+    # Dump the captured window of cycles that led to the failure
+    dump_vcd_window( model )
+    raise
+
   finally:
     # Dump out textwave at the end of simulation
     if cmdline_opts['dump_textwave']:
         model.print_textwave()
 
+    flush_vcd( model )
+    finalize_verilator( model )
+
+#------------------------------------------------------------------------------
+# run_test_vector_sim_sharded
+#------------------------------------------------------------------------------
+# Sharded version of run_test_vector_sim for stateless (purely
+# combinational) DUTs. The rows don't depend on each other, so the table
+# is split into contiguous shards that are evaluated by forked worker
+# processes, each of which owns a private copy of the simulated model.
+# Instead of stopping at the first mismatch, all failures are collected
+# and reported with their row numbers.
+
+def _get_test_vector_port( model, g ):
+  if g[0]: return getattr( model, g[1] )[g[2]]
+  return getattr( model, g[1] )
+
+def _eval_test_vector_shard( model, test_vectors, lo, hi, in_ids, out_ids,
+                             groups, batch_size ):
+  in_ports  = [ _get_test_vector_port( model, groups[i] ) for i in in_ids ]
+  out_ports = [ _get_test_vector_port( model, groups[i] ) for i in out_ids ]
+
+  # Input values are assigned with @= which already checks their range,
+  # and rows can be passed as they are if the inputs come first
+  inputs_first = in_ids == list( range( len(in_ids) ) )
+
+  failures = []
+  for base in range( lo, hi, batch_size ):
+    rows = test_vectors[ base : min( base + batch_size, hi ) ]
+
+    if inputs_first:
+      inputs = rows
+    else:
+      inputs = [ [ row[i] for i in in_ids ] for row in rows ]
+    outputs = model.sim_eval_combinational_batch( in_ports, inputs, out_ports )
+
+    for k, ( row, out_values ) in enumerate( zip( rows, outputs ) ):
+      for i, out_value in zip( out_ids, out_values ):
+        ref_value = row[i]
+        if ref_value == '?':  continue
+
+        if out_value != ref_value:
+          g = groups[i]
+          port_name = f"{g[1]}[{g[2]}]" if g[0] else g[1]
+          # Row numbers start from 1 after the port names, same as
+          # run_test_vector_sim
+          failures.append( ( base + k + 1, port_name, ref_value, str(out_value) ) )
+  return failures
+
+def run_test_vector_sim_sharded( model, test_vectors, cmdline_opts=None,
+                                 num_workers=0, batch_size=4096, max_failures=20 ):
+  cmdline_opts = cmdline_opts or {'dump_textwave'      : False,
+                                  'dump_vcd'           : False,
+                                  'test_verilog'       : False,
+                                  'test_yosys_verilog' : False,
+                                  'dump_vtb'           : ''}
+
+  # Tracing hooks would only see the parent process
+  for opt in [ 'dump_textwave', 'dump_vcd', 'dump_vtb' ]:
+    if cmdline_opts.get( opt ):
+      raise ValueError(f"run_test_vector_sim_sharded doesn't support {opt}. "
+                       f"Please use run_test_vector_sim instead.")
+
+  # First row in test vectors contains port names
+
+  if isinstance(test_vectors[0],str):
+    port_names = test_vectors[0].split()
+  else:
+    port_names = test_vectors[0]
+
+  # Remaining rows contain the actual test vectors
+
+  test_vectors = test_vectors[1:]
+
+  # Check the Python model before it is replaced by an imported DUT.
+  # Imported Verilog components always tick the verilated model in an
+  # update_ff block, so we cannot tell if they are stateless.
+
+  model.elaborate()
+
+  stateful = model.get_all_update_ff()
+  if stateful:
+    blk = sorted( stateful, key=lambda x: x.__name__ )[0]
+    raise RunTestVectorSimError(f"run_test_vector_sim_sharded requires a stateless DUT, but "
+                                f"{model.get_update_block_host_component( blk )} "
+                                f"has update_ff block {blk.__name__}.")
+
+  # Setup the model
+
+  model = config_model_with_cmdline_opts( model, cmdline_opts, [] )
+
+  try:
+    model.apply( DefaultPassGroup(linetrace=False) )
+    model.sim_reset()
+
+    in_ids, out_ids, groups, _ = _parse_test_vector_ports( model, port_names )
+
+    for row_num, row in enumerate( test_vectors, 1 ):
+      for i in in_ids:
+        if row[i] == '?':
+          raise RunTestVectorSimError(f"""
+Invalid input value in row {row_num} ({row}:
+- '?' can only appear in output values (labeled with '*' in the port name specifications).
+
+Please double check the provided values.
+""" )
+
+    n_rows = len(test_vectors)
+    if num_workers <= 0:
+      num_workers = os.cpu_count() or 1
+    num_workers = max( 1, min( num_workers, n_rows // batch_size ) )
+
+    args = ( in_ids, out_ids, groups, batch_size )
+
+    if num_workers == 1:
+      failures = _eval_test_vector_shard( model, test_vectors, 0, n_rows, *args )
+
+    else:
+      # The forked workers inherit the simulated model and the test
+      # vectors, only the failures are sent back
+      def worker( lo, hi, conn ):
+        try:
+          conn.send( ( None, _eval_test_vector_shard( model, test_vectors, lo, hi, *args ) ) )
+        except BaseException as e:
+          conn.send( ( repr(e), None ) )
+        finally:
+          conn.close()
+
+      ctx = multiprocessing.get_context( "fork" )
+
+      procs, conns = [], []
+      for w in range( num_workers ):
+        lo = n_rows *  w    // num_workers
+        hi = n_rows * (w+1) // num_workers
+        recv_conn, send_conn = ctx.Pipe( duplex=False )
+        proc = ctx.Process( target=worker, args=( lo, hi, send_conn ) )
+        proc.start()
+        send_conn.close()
+        procs.append( proc )
+        conns.append( recv_conn )
+
+      results = [ conn.recv() for conn in conns ]
+      for proc in procs:
+        proc.join()
+
+      errors = [ err for err, _ in results if err is not None ]
+      if errors:
+        raise RuntimeError( "Worker process failed in run_test_vector_sim_sharded:\n - " + "\n - ".join( errors ) )
+
+      # Shards are contiguous so the failures are already sorted by row
+      failures = [ x for _, shard_failures in results for x in shard_failures ]
+
+    if failures:
+      lines = [ f"- row {row_num:<8} port {port_name}: expected {ref_value}, got {out_value}"
+                for row_num, port_name, ref_value, out_value in failures[:max_failures] ]
+      if len(failures) > max_failures:
+        lines.append( f"- ... and {len(failures) - max_failures} more" )
+
+      error = RunTestVectorSimError(
+        f"\nrun_test_vector_sim_sharded received {len(failures)} incorrect values "
+        f"in {n_rows} rows!\n" + "\n".join( lines ) )
+      error.failures = failures
+      raise error
+
+  finally:
+    flush_vcd( model )
     finalize_verilator( model )
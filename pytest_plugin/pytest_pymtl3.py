@@ -35,6 +35,9 @@ def pytest_addoption(parser):
                     default=None, help="dump text waveform for each test" )
   group.addoption( "--dump-vcd", dest="dump_vcd", action="store_true",
                     default=None, help="dump vcd for each test" )
+  group.addoption( "--vcd-window", dest="vcd_window", action="store",
+                    default=None, help="with --dump-vcd, only dump the last N cycles "
+                                       "before a test failure" )
   group.addoption( "--dump-vtb", dest="dump_vtb", action="store_true",
                     default=None, help="dump verilog test bench for each test" )
   group.addoption( "--max-cycles", dest="max_cycles", action="store",
@@ -80,6 +83,7 @@ def _any_opts_present( config ):
       ( 'test_yosys_verilog', ''   ),
       ( 'dump_textwave',      None ),
       ( 'dump_vcd',           None ),
+      ( 'vcd_window',         None ),
       ( 'dump_vtb',           None ),
       ( 'max_cycles',         None ),
   ]
@@ -123,6 +127,16 @@ def _parse_opts_from_request( request ):
     dump_vcd = ''
   opts['dump_vcd'] = dump_vcd
 
+  # vcd_window
+  vcd_window = request.config.getoption("vcd_window")
+  if vcd_window is not None:
+    assert dump_vcd, "--vcd-window requires --dump-vcd"
+    try:
+      vcd_window = int(vcd_window)
+    except ValueError:
+      raise Exception("command line option `--vcd-window` should have integer value!")
+  opts['vcd_window'] = vcd_window
+
   # dump_vtb
   dump_vtb = request.config.getoption("dump_vtb")
   if dump_vtb: